@@ -0,0 +1,98 @@
+"""
+Asenkron Veritabanı Katmanı
+VehicleManager metodlarını, bağlantı havuzu boyutunda ayrılmış bir thread
+havuzunda (DB executor) çalıştırır ve await edilebilir hale getirir.
+FastAPI'nin genel threadpool'u (varsayılan ~40 thread) kullanılmaz; event loop
+binlerce açık bağlantıyı bekletebilirken eşzamanlı veritabanı işi havuzdaki
+bağlantı sayısıyla sınırlı kalır (thread'ler bağlantı beklemez).
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from models import VehicleManager
+
+T = TypeVar("T")
+
+
+class AsyncVehicleManager:
+    """
+    VehicleManager'ın asenkron karşılığı.
+    Her public metod aynı isimle coroutine olarak kullanılabilir:
+        vehicle = await db.get_vehicle_by_id(1)
+    Birden fazla çağrıyı tek thread geçişinde yapmak için run() kullanılır.
+    """
+
+    def __init__(self, manager: VehicleManager, max_workers: Optional[int] = None):
+        self.manager = manager
+        self.max_workers = max_workers or manager.pool.pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # shutdown() sonrası (örn. uygulama yeniden başlatıldığında) tekrar oluşturulur
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], /, *args, **kwargs) -> T:
+        """Senkron bir fonksiyonu DB executor'ında çalıştırır."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.manager, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # Sonraki erişimler __getattr__'a düşmesin
+        setattr(self, name, call)
+        return call
+
+    async def run_for_vehicle(self, vehicle_id: int, func: Callable[..., T], /, *args, **kwargs) -> Optional[Tuple[Dict, T]]:
+        """
+        Araç varsa func'ı aynı executor çağrısında çalıştırır: (araç, sonuç).
+        Araç yoksa None döner (endpoint'ler 404 verir). Varlık kontrolü ile asıl
+        iş için ayrı ayrı thread geçişi yapılmaz.
+        """
+        def call():
+            vehicle = self.manager.get_vehicle_by_id(vehicle_id)
+            if not vehicle:
+                return None
+            return vehicle, func(*args, **kwargs)
+        return await self.run(call)
+
+    def iter_vehicles(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                      fields: Optional[List[str]] = None, batch_size: int = 500) -> AsyncIterator[Dict]:
+        """
+        VehicleManager.iter_vehicles'ın asenkron karşılığı: her sayfa ayrı bir
+        executor çağrısıyla okunur, sayfalar arasında thread/bağlantı tutulmaz.
+        Alanlar hemen doğrulanır (bilinmeyen alan -> ValueError), akış başlamadan önce.
+        """
+        self.manager._vehicle_select_columns(fields)
+        return self._iter_vehicle_pages(after_id, limit, fields, batch_size)
+
+    async def _iter_vehicle_pages(self, after_id: Optional[int], limit: Optional[int],
+                                  fields: Optional[List[str]], batch_size: int) -> AsyncIterator[Dict]:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            page = await self.run(self.manager.get_vehicles_page, after_id=after_id, limit=size, fields=fields)
+            for row in page:
+                yield row
+            if len(page) < size:
+                return
+            after_id = page[-1]["id"]
+            if remaining is not None:
+                remaining -= len(page)
+
+    def shutdown(self):
+        """Bekleyen işler bitene kadar bekler ve executor'ı kapatır."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
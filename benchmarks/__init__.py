@@ -0,0 +1,5 @@
+"""
+Performans ölçüm scriptleri.
+Her modül `python -m benchmarks.<modul>` ile çalıştırılır ve kendi geçici
+veritabanını oluşturur; gerçek vehicle_master.db'ye dokunmaz.
+"""
@@ -0,0 +1,290 @@
+"""
+Sentetik Filo Üreteci
+Aynı seed ile her çalıştırmada birebir aynı veritabanını üretir (deterministik).
+Araçlar motosiklet / otomobil / hafif ticari profillerinden seçilir; parça
+ömürleri, değişim km'leri ve servis geçmişi araç yaşına ve yıllık km'sine göre
+dağıtılır (bir kısmı bilerek süresi geçmiş / yaklaşan durumdadır).
+
+Veri parça parça (chunk) yazılır; 1M araçta bile bellek kullanımı sabittir.
+
+Kullanım:
+    python -m benchmarks.fleet_generator --size 1k --out fleet_1k.db
+    python -m benchmarks.fleet_generator --size 100k --out fleet_100k.db --seed 7
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from migrations import rebuild_service_log_parts
+from models import VehicleManager
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Tarihler bu güne göre üretilir (çalıştırma gününden bağımsız, deterministik)
+REFERENCE_DATE = date(2026, 1, 1)
+
+# Servis geçmişi araç başına en fazla bu kadar kayıt (en yeniler) tutulur
+MAX_LOGS_PER_VEHICLE = 40
+
+# (parça adı, maliyet aralığı, ömür km, araçta bulunma olasılığı)
+PartSpec = Tuple[str, Tuple[float, float], int, float]
+
+PROFILES = [
+    {
+        "weight": 0.2,
+        "models": [("QJ Motor", "SRV 125"), ("Honda", "PCX 125"), ("Yamaha", "NMAX 155"), ("Bajaj", "Pulsar NS200")],
+        "yakit_tipi": ["benzin"],
+        "tuketim": (2.0, 4.0),
+        "yillik_km": (3000, 12000),
+        "fiyat": (60000, 250000),
+        "bakim_araligi": [2000, 3000, 4000],
+        "bakim_maliyeti": (400, 1200),
+        "sigorta": (1500, 5000),
+        "mtv": (500, 2000),
+        "parts": [
+            ("Motor Yağı + Filtre", (400, 900), 3000, 1.0),
+            ("Zincir Dişli Seti", (3000, 7000), 20000, 0.8),
+            ("Ön Balata", (350, 700), 12000, 0.9),
+            ("Arka Balata", (300, 600), 15000, 0.9),
+            ("Lastik Seti", (2500, 5000), 15000, 0.9),
+            ("Buji", (150, 400), 10000, 0.6),
+        ],
+    },
+    {
+        "weight": 0.65,
+        "models": [("Fiat", "Egea"), ("Renault", "Clio"), ("Toyota", "Corolla"), ("Volkswagen", "Passat"),
+                   ("Hyundai", "i20"), ("Dacia", "Duster")],
+        "yakit_tipi": ["benzin", "benzin", "dizel"],
+        "tuketim": (4.5, 9.0),
+        "yillik_km": (8000, 30000),
+        "fiyat": (600000, 2000000),
+        "bakim_araligi": [10000, 15000],
+        "bakim_maliyeti": (2000, 7000),
+        "sigorta": (8000, 30000),
+        "mtv": (2000, 15000),
+        "parts": [
+            ("Motor Yağı + Filtre", (1500, 3500), 10000, 1.0),
+            ("Hava Filtresi", (300, 800), 20000, 0.9),
+            ("Polen Filtresi", (250, 600), 15000, 0.7),
+            ("Ön Balata", (1200, 3000), 30000, 0.95),
+            ("Arka Balata", (1000, 2500), 50000, 0.8),
+            ("Lastik Seti", (8000, 20000), 45000, 0.95),
+            ("Triger Seti", (6000, 15000), 90000, 0.6),
+            ("Akü", (2500, 5000), 60000, 0.7),
+            ("Buji Seti", (600, 2000), 40000, 0.5),
+        ],
+    },
+    {
+        "weight": 0.15,
+        "models": [("Ford", "Transit"), ("Fiat", "Doblo"), ("Renault", "Kangoo"), ("Mercedes", "Sprinter")],
+        "yakit_tipi": ["dizel"],
+        "tuketim": (6.5, 12.0),
+        "yillik_km": (20000, 60000),
+        "fiyat": (900000, 3000000),
+        "bakim_araligi": [15000, 20000],
+        "bakim_maliyeti": (3000, 9000),
+        "sigorta": (12000, 40000),
+        "mtv": (3000, 12000),
+        "parts": [
+            ("Motor Yağı + Filtre", (2000, 4500), 15000, 1.0),
+            ("Yakıt Filtresi", (600, 1500), 30000, 0.9),
+            ("Ön Balata", (1800, 4000), 35000, 1.0),
+            ("Arka Balata", (1500, 3500), 60000, 0.9),
+            ("Lastik Seti", (10000, 26000), 50000, 1.0),
+            ("Debriyaj Seti", (9000, 22000), 120000, 0.6),
+            ("Akü", (3000, 6000), 60000, 0.8),
+        ],
+    },
+]
+
+
+def _pick_profile(rnd: random.Random) -> Dict:
+    r = rnd.random()
+    for profile in PROFILES:
+        r -= profile["weight"]
+        if r <= 0:
+            return profile
+    return PROFILES[-1]
+
+
+def _vehicle(rnd: random.Random, profile: Dict) -> Dict:
+    marka, model = rnd.choice(profile["models"])
+    age = rnd.randint(0, 15)
+    yillik_km = rnd.randint(*profile["yillik_km"]) // 100 * 100
+    # Yaşa göre birikmiş km; sürücüler arası fark için lognormal çarpan
+    guncel_km = int(yillik_km * (age + rnd.random()) * min(2.0, rnd.lognormvariate(0, 0.25)))
+    bakim_araligi = rnd.choice(profile["bakim_araligi"])
+    # Son bakım genelde bir aralık içinde; %10'u bakımı geciktirmiş
+    overdue = rnd.random() < 0.1
+    son_bakim_km = max(0, guncel_km - rnd.randint(0, bakim_araligi * (2 if overdue else 1)))
+    fiyat = round(rnd.uniform(*profile["fiyat"]), -3)
+    return {
+        "marka": marka,
+        "model": model,
+        "yil": REFERENCE_DATE.year - age,
+        "baslangic_km": 0,
+        "guncel_km": guncel_km,
+        "yakit_tipi": rnd.choice(profile["yakit_tipi"]),
+        "ortalama_tuketim_l_100km": round(rnd.uniform(*profile["tuketim"]), 1),
+        "periyodik_bakim_km": bakim_araligi,
+        "periyodik_bakim_maliyeti": round(rnd.uniform(*profile["bakim_maliyeti"]), -1),
+        "son_bakim_km": son_bakim_km,
+        "bakim_araligi": bakim_araligi,
+        "yillik_sigorta": round(rnd.uniform(*profile["sigorta"]), -1),
+        "yillik_mtv": round(rnd.uniform(*profile["mtv"]), -1),
+        "yillik_ortalama_km": yillik_km,
+        "su_anki_fiyat": fiyat,
+        "gelecek_fiyat": round(fiyat * rnd.uniform(0.5, 0.8), -3),
+        "gelecek_km": guncel_km + yillik_km * rnd.randint(3, 6),
+    }
+
+
+def _parts(rnd: random.Random, profile: Dict, vehicle: Dict) -> List[Dict]:
+    """Araçtaki parçalar; son değişim km'si ömür içinde rastgele (%8'i süresi geçmiş)."""
+    parts = []
+    for name, cost_range, omur_km, probability in profile["parts"]:
+        if rnd.random() > probability:
+            continue
+        stretch = 1.3 if rnd.random() < 0.08 else 1.0
+        degisim_km = max(0, vehicle["guncel_km"] - int(rnd.uniform(0, omur_km * stretch)))
+        parts.append({
+            "parca_adi": name,
+            "maliyet": round(rnd.uniform(*cost_range), -1),
+            "omur_km": omur_km,
+            "degisim_km": degisim_km,
+        })
+    return parts
+
+
+def _service_logs(rnd: random.Random, vehicle: Dict, parts: List[Dict]) -> List[Tuple]:
+    """
+    Son bakımdan geriye doğru her bakim_araligi'nda bir kayıt (en fazla
+    MAX_LOGS_PER_VEHICLE). Aralıkta ömrü dolan parçalar değişen parçalara yazılır.
+    """
+    interval = vehicle["bakim_araligi"]
+    yillik_km = max(vehicle["yillik_ortalama_km"], 1)
+    logs = []
+    km = vehicle["son_bakim_km"]
+    while km > 0 and len(logs) < MAX_LOGS_PER_VEHICLE:
+        prev_km = km - interval
+        replaced = ["Motor Yağı + Filtre"] if any(p["parca_adi"] == "Motor Yağı + Filtre" for p in parts) else []
+        cost = vehicle["periyodik_bakim_maliyeti"]
+        for p in parts:
+            if p["parca_adi"] == "Motor Yağı + Filtre":
+                continue
+            # km'den önceki son değişim (degisim_km - k * omur_km; degisim_km'den sonrası olmamış)
+            last_change = min(p["degisim_km"], km - (km - p["degisim_km"]) % p["omur_km"])
+            if prev_km < last_change <= km:
+                replaced.append(p["parca_adi"])
+                cost += p["maliyet"]
+        days_ago = int((vehicle["guncel_km"] - km) / yillik_km * 365) + rnd.randint(0, 20)
+        tarih = REFERENCE_DATE - timedelta(days=days_ago)
+        islemler = "Periyodik bakım. " + ("Değişenler: " + ", ".join(replaced) + "." if replaced else "Genel kontrol.")
+        logs.append((tarih.isoformat(), km, islemler, round(cost, 2), ", ".join(replaced) or None))
+        km = prev_km
+    return logs
+
+
+def iter_fleet(vehicles: int, seed: int = 42) -> Iterator[Tuple[Dict, List[Dict], List[Tuple]]]:
+    """(araç, parçalar, servis kayıtları) üçlülerini sırayla üretir."""
+    rnd = random.Random(seed)
+    for _ in range(vehicles):
+        profile = _pick_profile(rnd)
+        vehicle = _vehicle(rnd, profile)
+        parts = _parts(rnd, profile, vehicle)
+        yield vehicle, parts, _service_logs(rnd, vehicle, parts)
+
+
+def generate_fleet(db_path: str, vehicles: int, seed: int = 42, chunk_size: int = 10_000) -> Dict[str, int]:
+    """
+    db_path'e (uygulamanın kendi şemasıyla) sentetik filo yazar.
+    Araç ID'leri 1..vehicles olur (boş veritabanı beklenir).
+    Returns: {"vehicles", "consumables", "service_logs"} satır sayıları
+    """
+    VehicleManager(db_path).close()  # Şema / migration'lar
+
+    vehicle_keys = list(_vehicle(random.Random(0), PROFILES[0]).keys())
+    vehicle_sql = (f"INSERT INTO vehicles ({', '.join(vehicle_keys)}) "
+                   f"VALUES ({', '.join('?' * len(vehicle_keys))})")
+    counts = {"vehicles": 0, "consumables": 0, "service_logs": 0}
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")  # Tek seferlik yükleme; yarıda kalırsa yeniden üretilir
+    if conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]:
+        conn.close()
+        raise ValueError(f"{db_path} boş değil; üreteç boş bir veritabanı bekler.")
+
+    # Fiyatlar taze görünsün: arka plan güncelleyici ölçüm sırasında ağa çıkmasın.
+    # Araçlardan önce yazılır; maliyet özeti tetikleyicileri bu fiyatları kullanır.
+    conn.executemany(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+        [("current_benzin_price", "45.0"), ("current_motorin_price", "46.0"),
+         ("last_fuel_price_update", f"{REFERENCE_DATE.isoformat()}T00:00:00")]
+    )
+
+    vehicle_rows, part_rows, log_rows = [], [], []
+
+    def flush():
+        conn.executemany(vehicle_sql, vehicle_rows)
+        conn.executemany(
+            "INSERT INTO consumables (vehicle_id, parca_adi, maliyet, omur_km, degisim_km) VALUES (?, ?, ?, ?, ?)",
+            part_rows)
+        conn.executemany(
+            """INSERT INTO service_logs (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet, degisen_parcalar)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            log_rows)
+        conn.commit()
+        counts["vehicles"] += len(vehicle_rows)
+        counts["consumables"] += len(part_rows)
+        counts["service_logs"] += len(log_rows)
+        vehicle_rows.clear()
+        part_rows.clear()
+        log_rows.clear()
+
+    for vehicle_id, (vehicle, parts, logs) in enumerate(iter_fleet(vehicles, seed), start=1):
+        vehicle_rows.append(tuple(vehicle[k] for k in vehicle_keys))
+        part_rows.extend((vehicle_id, p["parca_adi"], p["maliyet"], p["omur_km"], p["degisim_km"]) for p in parts)
+        log_rows.extend((vehicle_id,) + log for log in logs)
+        if len(vehicle_rows) >= chunk_size:
+            flush()
+    if vehicle_rows:
+        flush()
+
+    # Kayıtlar doğrudan yazıldı; değişen parçalar tablosu tek geçişte doldurulur
+    rebuild_service_log_parts(conn.cursor())
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return counts
+
+
+def parse_size(value: str) -> int:
+    """'1k' / '100k' / '1m' ya da doğrudan sayı."""
+    return SIZES.get(value.lower()) or int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministik sentetik filo veritabanı üretir")
+    parser.add_argument("--size", default="1k", help="1k, 100k, 1m veya araç sayısı")
+    parser.add_argument("--out", required=True, help="Oluşturulacak SQLite dosyası")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} zaten var.")
+    started = time.perf_counter()
+    counts = generate_fleet(args.out, parse_size(args.size), args.seed, args.chunk_size)
+    print(f"✅ {counts['vehicles']} araç, {counts['consumables']} parça, {counts['service_logs']} servis kaydı "
+          f"({time.perf_counter() - started:.1f} sn) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
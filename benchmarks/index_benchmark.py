@@ -0,0 +1,106 @@
+"""
+İndeks Migration Benchmark'ı
+vehicle_id indekslerinden (migration v2) önce ve sonra sorgu planlarını ve
+gecikmeleri karşılaştırır.
+
+Kullanım:
+    python -m benchmarks.index_benchmark --vehicles 2000 --logs 300000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from migrations import migrate, LATEST_VERSION
+
+QUERIES = {
+    "get_vehicle_consumables": "SELECT id, vehicle_id, parca_adi, maliyet, omur_km, degisim_km FROM consumables WHERE vehicle_id = ? ORDER BY id",
+    "get_service_logs": "SELECT * FROM service_logs WHERE vehicle_id = ? ORDER BY tarih DESC, km DESC",
+    "delete_vehicle (cascade)": "SELECT COUNT(*) FROM service_logs WHERE vehicle_id = ?",
+}
+
+
+def seed(conn: sqlite3.Connection, vehicles: int, logs: int, parts_per_vehicle: int, rnd: random.Random):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO vehicles (marka, model, yil, guncel_km) VALUES (?, ?, ?, ?)",
+        [("Marka", f"Model {i}", 2020, rnd.randint(0, 200000)) for i in range(vehicles)]
+    )
+    cursor.executemany(
+        "INSERT INTO consumables (vehicle_id, parca_adi, maliyet, omur_km, degisim_km) VALUES (?, ?, ?, ?, ?)",
+        [(v, f"Parça {p}", 500.0, 10000, 0)
+         for v in range(1, vehicles + 1) for p in range(parts_per_vehicle)]
+    )
+    cursor.executemany(
+        "INSERT INTO service_logs (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet) VALUES (?, ?, ?, ?, ?)",
+        [(rnd.randint(1, vehicles), f"20{rnd.randint(15, 25)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+          rnd.randint(0, 200000), "Periyodik bakım", 750.0)
+         for _ in range(logs)]
+    )
+    conn.commit()
+
+
+def measure(conn: sqlite3.Connection, vehicles: int, repeats: int, rnd: random.Random) -> dict:
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", (1,)).fetchall()]
+        timings = []
+        for _ in range(repeats):
+            vehicle_id = rnd.randint(1, vehicles)
+            start = time.perf_counter()
+            conn.execute(sql, (vehicle_id,)).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            "plan": plan,
+            "p50_ms": statistics.median(timings),
+            "max_ms": max(timings)
+        }
+    return results
+
+
+def print_results(title: str, results: dict):
+    print(f"\n=== {title} ===")
+    for name, r in results.items():
+        print(f"{name:28s} p50={r['p50_ms']:.3f} ms  max={r['max_ms']:.3f} ms")
+        for step in r["plan"]:
+            print(f"    plan: {step}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="vehicle_id indeksleri öncesi/sonrası sorgu ölçümü")
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=300000)
+    parser.add_argument("--parts-per-vehicle", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        rnd = random.Random(args.seed)
+
+        # İndekssiz (sadece temel şema)
+        migrate(conn, target_version=1)
+        seed(conn, args.vehicles, args.logs, args.parts_per_vehicle, rnd)
+        before = measure(conn, args.vehicles, args.repeats, random.Random(args.seed))
+        print_results("ÖNCE (şema v1, indeks yok)", before)
+
+        # Tüm migration'lar (indeksler dahil)
+        migrate(conn)
+        conn.execute("ANALYZE")
+        after = measure(conn, args.vehicles, args.repeats, random.Random(args.seed))
+        print_results(f"SONRA (şema v{LATEST_VERSION})", after)
+
+        print("\n=== HIZLANMA (p50) ===")
+        for name in QUERIES:
+            speedup = before[name]["p50_ms"] / max(after[name]["p50_ms"], 1e-6)
+            print(f"{name:28s} x{speedup:.1f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+API Yük Testi
+Geçici bir veritabanıyla uvicorn sunucusu başlatır ve farklı eşzamanlılık
+seviyelerinde (varsayılan 50 / 200 / 1000 istemci) karışık okuma/yazma
+yükü uygular; her seviye için p50 / p99 gecikme ve saniyedeki istek sayısını verir.
+
+Kullanım:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 50 200 --duration 15 --write-ratio 0.2
+    # Başka bir sürümle karşılaştırma (örn. git worktree ile açılmış eski commit):
+    python -m benchmarks.load_test --app-dir /tmp/eski-surum --json eski.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_database(db_path: str, app_dir: str, vehicles: int, parts_per_vehicle: int,
+                  logs_per_vehicle: int, rnd: random.Random):
+    """Test veritabanını hedef sürümün kendi şemasıyla oluşturur ve doldurur."""
+    subprocess.run(
+        [sys.executable, "-c", f"from models import VehicleManager; VehicleManager({db_path!r}).close()"],
+        cwd=app_dir, check=True, stdout=subprocess.DEVNULL
+    )
+    conn = sqlite3.connect(db_path)
+    # Fiyatlar taze görünsün: arka plan güncelleyici test sırasında ağa çıkmasın.
+    # Araçlardan önce yazılır (maliyet özeti tetikleyicileri bu fiyatları kullanır)
+    conn.executemany(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+        [("current_benzin_price", "45.0"), ("current_motorin_price", "46.0"),
+         ("last_fuel_price_update", datetime.now().isoformat(timespec="seconds"))]
+    )
+    conn.executemany(
+        """INSERT INTO vehicles (marka, model, yil, guncel_km, yakit_tipi, ortalama_tuketim_l_100km,
+                                 periyodik_bakim_maliyeti, su_anki_fiyat, gelecek_fiyat, gelecek_km,
+                                 yillik_sigorta, yillik_mtv)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [("Marka", f"Model {i}", 2020, rnd.randint(0, 150000), rnd.choice(["benzin", "dizel"]),
+          rnd.uniform(4, 10), rnd.uniform(2000, 9000), 900000.0, 600000.0, 250000, 12000.0, 4000.0)
+         for i in range(vehicles)]
+    )
+    conn.executemany(
+        "INSERT INTO consumables (vehicle_id, parca_adi, maliyet, omur_km, degisim_km) VALUES (?, ?, ?, ?, ?)",
+        [(v, f"Parça {p}", rnd.uniform(200, 5000), rnd.choice([10000, 30000, 60000]), rnd.randint(0, 100000))
+         for v in range(1, vehicles + 1) for p in range(parts_per_vehicle)]
+    )
+    conn.executemany(
+        "INSERT INTO service_logs (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet) VALUES (?, ?, ?, ?, ?)",
+        [(v, f"20{rnd.randint(18, 25)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+          rnd.randint(0, 150000), "Periyodik bakım", 750.0)
+         for v in range(1, vehicles + 1) for _ in range(logs_per_vehicle)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_dir: str, work_dir: str, port: int, env_overrides: dict) -> subprocess.Popen:
+    env = dict(os.environ, **env_overrides)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", app_dir,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+         "--backlog", "4096"],
+        cwd=work_dir, env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Sunucu başlatılamadı.")
+
+
+def pick_request(rnd: random.Random, vehicles: int, write_ratio: float):
+    """(method, path, json) — okuma ağırlıklı karışık yük."""
+    vehicle_id = rnd.randint(1, vehicles)
+    if rnd.random() < write_ratio:
+        return "POST", f"/vehicles/{vehicle_id}/service-logs", {
+            "vehicle_id": vehicle_id,
+            "tarih": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "km": rnd.randint(0, 150000),
+            "yapilan_islemler": "Yük testi",
+            "toplam_maliyet": 100.0
+        }
+    path = rnd.choice([
+        f"/vehicles/{vehicle_id}",
+        f"/costs/{vehicle_id}",
+        f"/vehicles/{vehicle_id}/service-logs",
+        f"/vehicles/{vehicle_id}/consumables",
+    ])
+    return "GET", path, None
+
+
+class RawHttpConnection:
+    """
+    Yük üreticinin kendi yükü ölçümü bozmasın diye minimal HTTP/1.1 keep-alive istemcisi
+    (asyncio stream üzerinde; sadece Content-Length'li yanıtları okur).
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, path: str, body=None) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+        self.writer.write(head.encode() + payload)
+        try:
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("Bağlantı kapandı")
+            status = int(status_line.split()[1])
+            length = 0
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await self.reader.readexactly(length)
+            return status
+        except Exception:
+            await self.close()
+            raise
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_level(host: str, port: int, concurrency: int, duration: float, vehicles: int,
+                    write_ratio: float, seed: int) -> dict:
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rnd = random.Random(seed * 100003 + worker_id)
+        conn = RawHttpConnection(host, port)
+        while time.perf_counter() < stop_at:
+            method, path, body = pick_request(rnd, vehicles, write_ratio)
+            start = time.perf_counter()
+            try:
+                if await conn.request(method, path, body) >= 400:
+                    errors += 1
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        await conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI uçları için eşzamanlı yük testi")
+    parser.add_argument("--app-dir", default=REPO_DIR, help="Test edilecek uygulama dizini (varsayılan: bu depo)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--duration", type=float, default=10.0, help="Her seviye için süre (saniye)")
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--parts-per-vehicle", type=int, default=5)
+    parser.add_argument("--logs-per-vehicle", type=int, default=20)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "vehicle_master.db")
+        print(f"🗄️ Test veritabanı hazırlanıyor ({args.vehicles} araç)...")
+        seed_database(db_path, os.path.abspath(args.app_dir), args.vehicles, args.parts_per_vehicle,
+                      args.logs_per_vehicle, rnd)
+
+        port = free_port()
+        server = start_server(os.path.abspath(args.app_dir), work_dir, port, {
+            "FUEL_PRICE_URL": "http://127.0.0.1:9/",
+        })
+        try:
+            results = []
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_level(
+                    "127.0.0.1", port, concurrency, args.duration,
+                    args.vehicles, args.write_ratio, args.seed
+                ))
+                results.append(result)
+                print(f"c={result['concurrency']:5d}  p50={result['p50_ms']:8.2f} ms  "
+                      f"p99={result['p99_ms']:8.2f} ms  {result['rps']:8.1f} istek/sn  "
+                      f"({result['requests']} istek, {result['errors']} hata)")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"app_dir": args.app_dir, "args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Senaryo Benchmark'ı
+Sentetik filo (fleet_generator) üzerinde main.py uçlarını ve models.py sıcak
+yollarını zamanlar; sonuçları JSON'a yazar ve isteğe bağlı olarak önceki bir
+çalıştırmayla karşılaştırır. İstekler ağ yerine ASGI üzerinden süreç içinde
+gönderilir; ölçüm uygulama kodunu (routing, doğrulama, sorgular) kapsar.
+
+Senaryolar:
+    list_first_page       GET /vehicles?limit=100
+    list_keyset_page      GET /vehicles?after_id=<rastgele>&limit=100
+    costs_card_cold       GET /costs/{id} (önbellek boşken; kart başına maliyet)
+    costs_card_warm       GET /costs/{id} (önbellekten)
+    costs_card_revalidate GET /costs/{id} + If-None-Match (değişmemiş kart, 304)
+    costs_dashboard       GET /costs?ids=<24 araç> (dashboard sayfası)
+    warnings_vehicle      GET /vehicles/{id}/warnings (önbellek boşken)
+    warnings_fleet        GET /warnings?limit=100
+    service_log_history   GET /vehicles/{id}/service-logs
+    bulk_insert_vehicles        VehicleManager.bulk_add_vehicles (1000 satır)
+    bulk_insert_service_logs    VehicleManager.bulk_add_service_logs (1000 satır)
+
+Kullanım:
+    python -m benchmarks.scenarios --size 1k --json sonuc.json
+    python -m benchmarks.scenarios --db fleet_100k.db --json yeni.json --compare eski.json
+    python -m benchmarks.scenarios --size 1k --only costs_card_cold warnings_fleet
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fleet_generator import generate_fleet, parse_size
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BULK_ROWS = 1000
+
+
+def summarize(latencies_ms: List[float], rows: Optional[int] = None) -> Dict:
+    ordered = sorted(latencies_ms)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+    result = {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1], 3),
+    }
+    if rows:
+        result["rows_per_sec"] = round(rows * len(ordered) / (sum(ordered) / 1000), 1)
+    return result
+
+
+class ScenarioRunner:
+    def __init__(self, main_module, vehicles: int, samples: int, seed: int):
+        self.main = main_module
+        self.manager = main_module.manager
+        self.vehicles = vehicles
+        self.samples = samples
+        self.rnd = random.Random(seed)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app),
+                                        base_url="http://bench")
+
+    def random_id(self) -> int:
+        return self.rnd.randint(1, self.vehicles)
+
+    async def http(self, make_path: Callable[[], str], before: Optional[Callable[[], None]] = None,
+                   headers: Optional[Dict[str, str]] = None, expected_status: int = 200) -> List[float]:
+        latencies = []
+        for _ in range(self.samples):
+            path = make_path()
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            response = await self.client.get(path, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected_status:
+                raise RuntimeError(f"{path}: HTTP {response.status_code} {response.text[:200]}")
+        return latencies
+
+    async def bulk(self, method: Callable[[List[Dict]], Dict], make_rows: Callable[[], List[Dict]],
+                   repeats: int) -> List[float]:
+        latencies = []
+        for _ in range(repeats):
+            rows = make_rows()
+            start = time.perf_counter()
+            result = await asyncio.to_thread(method, rows)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if result["errors"]:
+                raise RuntimeError(f"Toplu ekleme hatası: {result['errors'][:3]}")
+        return latencies
+
+    async def revalidate(self, path: str) -> List[float]:
+        etag = (await self.client.get(path)).headers["etag"]
+        return await self.http(lambda: path, headers={"If-None-Match": etag}, expected_status=304)
+
+    def scenarios(self) -> Dict[str, Callable]:
+        cache = self.manager.result_cache
+        warm_id = self.random_id()
+
+        def dashboard_path():
+            first = self.rnd.randint(1, max(1, self.vehicles - 23))
+            return "/costs?ids=" + ",".join(str(i) for i in range(first, min(first + 24, self.vehicles + 1)))
+
+        def vehicle_rows():
+            rows = []
+            for _ in range(BULK_ROWS):
+                guncel = self.rnd.randint(0, 200000)
+                rows.append({"marka": "Bench", "model": "Toplu", "yil": 2020, "guncel_km": guncel,
+                             "yakit_tipi": "benzin", "ortalama_tuketim_l_100km": 6.5,
+                             "gelecek_km": guncel + 60000})
+            return rows
+
+        def service_log_rows():
+            return [{"vehicle_id": self.random_id(), "tarih": "2025-12-01", "km": self.rnd.randint(0, 200000),
+                     "yapilan_islemler": "Benchmark bakımı", "toplam_maliyet": 1000.0,
+                     "degisen_parcalar": "Motor Yağı + Filtre"}
+                    for _ in range(BULK_ROWS)]
+
+        bulk_repeats = max(3, self.samples // 20)
+        return {
+            "list_first_page": lambda: self.http(lambda: "/vehicles?limit=100"),
+            "list_keyset_page": lambda: self.http(lambda: f"/vehicles?after_id={self.random_id()}&limit=100"),
+            "costs_card_cold": lambda: self.http(lambda: f"/costs/{self.random_id()}", before=cache.clear),
+            "costs_card_warm": lambda: self.http(lambda: f"/costs/{warm_id}"),
+            "costs_card_revalidate": lambda: self.revalidate(f"/costs/{warm_id}"),
+            "costs_dashboard": lambda: self.http(dashboard_path, before=cache.clear),
+            "warnings_vehicle": lambda: self.http(lambda: f"/vehicles/{self.random_id()}/warnings",
+                                                  before=cache.clear),
+            "warnings_fleet": lambda: self.http(lambda: "/warnings?limit=100"),
+            "service_log_history": lambda: self.http(lambda: f"/vehicles/{self.random_id()}/service-logs"),
+            # Yazma senaryoları en sonda: okuma ölçümlerini etkilemesinler
+            "bulk_insert_vehicles": lambda: self.bulk(self.manager.bulk_add_vehicles, vehicle_rows, bulk_repeats),
+            "bulk_insert_service_logs": lambda: self.bulk(self.manager.bulk_add_service_logs, service_log_rows,
+                                                          bulk_repeats),
+        }
+
+    async def run(self, only: Optional[List[str]] = None) -> Dict[str, Dict]:
+        results = {}
+        for name, scenario in self.scenarios().items():
+            if only and name not in only:
+                continue
+            latencies = await scenario()
+            results[name] = summarize(latencies, BULK_ROWS if name.startswith("bulk_") else None)
+            r = results[name]
+            extra = f"  {r['rows_per_sec']:.0f} satır/sn" if "rows_per_sec" in r else ""
+            print(f"{name:26s} p50={r['p50_ms']:9.3f} ms  p95={r['p95_ms']:9.3f} ms  "
+                  f"p99={r['p99_ms']:9.3f} ms{extra}")
+        await self.client.aclose()
+        return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Dict], previous_path: str, threshold_pct: float) -> List[str]:
+    """p50 farklarını yazdırır; eşiği aşan gerilemelerin adlarını döndürür."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)["scenarios"]
+    print(f"\n=== KARŞILAŞTIRMA (p50, {previous_path}) ===")
+    regressions = []
+    for name, result in current.items():
+        old = previous.get(name)
+        if not old:
+            print(f"{name:26s} (önceki sonuç yok)")
+            continue
+        change = (result["p50_ms"] - old["p50_ms"]) / max(old["p50_ms"], 1e-9) * 100
+        flag = ""
+        if change > threshold_pct:
+            regressions.append(name)
+            flag = "  ⚠️ gerileme"
+        print(f"{name:26s} {old['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms  ({change:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik filo üzerinde senaryo benchmark'ı")
+    parser.add_argument("--size", default="1k", help="Üretilecek filo: 1k, 100k, 1m veya araç sayısı")
+    parser.add_argument("--db", help="Hazır filo veritabanı (fleet_generator çıktısı); kopyası kullanılır")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--samples", type=int, default=200, help="Senaryo başına istek sayısı")
+    parser.add_argument("--only", nargs="+", help="Sadece bu senaryolar")
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki JSON sonucu")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="--compare ile: p50 bu yüzdeden fazla artarsa çıkış kodu 1")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "vehicle_master.db")
+        started = time.perf_counter()
+        if args.db:
+            shutil.copy(args.db, db_path)
+            print(f"🗄️ Filo kopyalandı: {args.db}")
+        else:
+            counts = generate_fleet(db_path, parse_size(args.size), args.seed)
+            print(f"🗄️ Filo üretildi: {counts['vehicles']} araç, {counts['consumables']} parça, "
+                  f"{counts['service_logs']} servis kaydı ({time.perf_counter() - started:.1f} sn)")
+
+        conn = sqlite3.connect(db_path)
+        counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                  for t in ("vehicles", "consumables", "service_logs")}
+        conn.close()
+
+        # main.py veritabanını çalışma dizininde açar; ağ isteği atılmaz (lifespan çalıştırılmaz)
+        os.environ.setdefault("FUEL_PRICE_URL", "http://127.0.0.1:9/")
+        os.environ.setdefault("FUEL_PRICE_CACHE_PATH", "")
+        os.chdir(work_dir)
+        sys.path.insert(0, REPO_DIR)
+        import main as app_main
+
+        runner = ScenarioRunner(app_main, counts["vehicles"], args.samples, args.seed)
+        try:
+            results = asyncio.run(runner.run(args.only))
+        finally:
+            app_main.db.shutdown()
+            app_main.manager.close()
+            os.chdir(REPO_DIR)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "samples": args.samples,
+            "source": args.db or f"generated:{args.size}",
+            "rows": counts,
+        },
+        "scenarios": results,
+    }
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Sonuçlar: {json_path}")
+
+    if compare_path and compare(results, compare_path, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
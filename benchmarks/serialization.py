@@ -0,0 +1,126 @@
+"""
+JSON Serileştirme Benchmark'ı
+Liste yanıtlarının iki yolunu karşılaştırır:
+    dict   - VehicleManager dict listesi + jsonable_encoder + JSONResponse (eski yol)
+    direct - *_json metodları: cursor tuple'ları şablonla doğrudan JSON bayta
+Her ölçümde iki yolun çıktısının bayt bayt aynı olduğu da doğrulanır.
+
+Yükler:
+    vehicles          tüm araç listesi (GET /vehicles)
+    vehicles_fields   alan seçimli tam liste (GET /vehicles?fields=...)
+    service_logs      araç başına servis kayıtları (GET /vehicles/{id}/service-logs)
+    consumables       araç başına parçalar (GET /vehicles/{id}/consumables)
+
+Kullanım:
+    python -m benchmarks.serialization --size 1k
+    python -m benchmarks.serialization --db fleet_100k.db --repeats 3 --json serilestirme.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.fleet_generator import generate_fleet, parse_size
+from models import VehicleManager
+
+LIST_FIELDS = ["marka", "model", "guncel_km", "ortalama_tuketim_l_100km"]
+PER_VEHICLE_CALLS = 200
+
+
+def encode_dicts(rows: List[Dict]) -> bytes:
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def measure(calls: List[Callable[[], bytes]], repeats: int) -> Dict:
+    """Çağrı listesini repeats kez çalıştırır; en iyi turun süresi ve toplam bayt."""
+    rounds = []
+    size = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        size = sum(len(call()) for call in calls)
+        rounds.append(time.perf_counter() - started)
+    return {"seconds": min(rounds), "bytes": size}
+
+
+def run_payload(name: str, dict_calls: List[Callable], json_calls: List[Callable],
+                rows: int, repeats: int) -> Dict:
+    for dict_call, json_call in zip(dict_calls, json_calls):
+        if encode_dicts(dict_call()) != json_call():
+            raise RuntimeError(f"{name}: iki yolun çıktısı farklı")
+    old = measure([lambda c=c: encode_dicts(c()) for c in dict_calls], repeats)
+    new = measure(json_calls, repeats)
+    return {
+        "payload": name,
+        "rows": rows,
+        "bytes": new["bytes"],
+        "dict_rows_per_sec": round(rows / old["seconds"], 1),
+        "direct_rows_per_sec": round(rows / new["seconds"], 1),
+        "dict_mb_per_sec": round(old["bytes"] / old["seconds"] / 1e6, 2),
+        "direct_mb_per_sec": round(new["bytes"] / new["seconds"] / 1e6, 2),
+        "speedup": round(old["seconds"] / new["seconds"], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Liste yanıtları için JSON serileştirme benchmark'ı")
+    parser.add_argument("--size", default="10000", help="Üretilecek filo: 1k, 100k, 1m veya araç sayısı")
+    parser.add_argument("--db", help="Hazır filo veritabanı (fleet_generator çıktısı); kopyası kullanılır")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=5, help="Yük başına tur sayısı (en iyisi raporlanır)")
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "serialization.db")
+        if args.db:
+            shutil.copy(args.db, db_path)
+        else:
+            generate_fleet(db_path, parse_size(args.size), args.seed)
+        manager = VehicleManager(db_path)
+        try:
+            with manager.pool.connection() as conn:
+                counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                          for t in ("vehicles", "consumables", "service_logs")}
+            rnd = random.Random(args.seed)
+            ids = [rnd.randint(1, counts["vehicles"]) for _ in range(PER_VEHICLE_CALLS)]
+            payloads = [
+                ("vehicles", [manager.get_all_vehicles], [manager.get_all_vehicles_json], counts["vehicles"]),
+                ("vehicles_fields", [lambda: list(manager.iter_vehicles(fields=LIST_FIELDS))],
+                 [lambda: manager.get_all_vehicles_json(LIST_FIELDS)], counts["vehicles"]),
+                ("service_logs",
+                 [lambda i=i: manager.get_service_logs(i) for i in ids],
+                 [lambda i=i: manager.get_service_logs_json(i) for i in ids],
+                 sum(len(manager.get_service_logs(i)) for i in ids)),
+                ("consumables",
+                 [lambda i=i: manager.get_vehicle_consumables(i) for i in ids],
+                 [lambda i=i: manager.get_vehicle_consumables_json(i) for i in ids],
+                 sum(len(manager.get_vehicle_consumables(i)) for i in ids)),
+            ]
+
+            print(f"{counts['vehicles']} araç, tur başına en iyi süre ({args.repeats} tur)\n")
+            results = []
+            for name, dict_calls, json_calls, rows in payloads:
+                r = run_payload(name, dict_calls, json_calls, rows, args.repeats)
+                results.append(r)
+                print(f"{name:16s} {rows:8d} satır  dict {r['dict_rows_per_sec']:11.1f} satır/sn "
+                      f"({r['dict_mb_per_sec']:6.2f} MB/sn)  direct {r['direct_rows_per_sec']:11.1f} satır/sn "
+                      f"({r['direct_mb_per_sec']:6.2f} MB/sn)  x{r['speedup']}")
+        finally:
+            manager.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"vehicles": counts["vehicles"], "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Sonuçlar: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Eşzamanlı Yazma Benchmark'ı
+VehicleManager yazma metodlarını (add_service_log: kayıt ekleme + araç güncelleme)
+farklı eşzamanlılık seviyelerinde thread'lerden çağırır; grup commit kapalı
+(her yazma ayrı commit) ve açık (farklı bekleme pencereleri) ayarlarını
+karşılaştırır. Her ölçüm boş bir geçici veritabanında yapılır.
+
+Kullanım:
+    python -m benchmarks.writes
+    python -m benchmarks.writes --concurrency 1 8 32 --synchronous FULL --ops 3000
+    python -m benchmarks.writes --modes direct group-2ms --json yazma.json
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.fleet_generator import generate_fleet
+from models import VehicleManager
+
+# mod adı -> (write_batch_size, write_batch_window_ms)
+MODES = {
+    "direct": (0, 0.0),
+    "group-0ms": (64, 0.0),
+    "group-2ms": (64, 2.0),
+    "group-5ms": (256, 5.0),
+}
+FLEET_SIZE = 200
+
+
+def run_level(mode: str, concurrency: int, ops: int, synchronous: str, seed: int) -> Dict:
+    batch_size, window_ms = MODES[mode]
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "writes.db")
+        generate_fleet(db_path, FLEET_SIZE, seed)
+        manager = VehicleManager(db_path, synchronous=synchronous, write_batch_size=batch_size,
+                                 write_batch_window_ms=window_ms)
+        per_thread = max(1, ops // concurrency)
+        latencies: List[float] = []
+        errors = []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(concurrency + 1)
+
+        def worker(worker_id: int):
+            rnd = random.Random(seed + worker_id)
+            local = []
+            start_gate.wait()
+            for _ in range(per_thread):
+                started = time.perf_counter()
+                log_id = manager.add_service_log(rnd.randint(1, FLEET_SIZE), "2026-01-15",
+                                                 rnd.randint(0, 200000), "Benchmark bakımı", 1000.0)
+                local.append((time.perf_counter() - started) * 1000)
+                if log_id == -1:
+                    errors.append(worker_id)
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        start_gate.wait()
+        started = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        batches = manager.writer.batches if manager.writer else len(latencies)
+        manager.close()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "ops": len(latencies),
+        "errors": len(errors),
+        "writes_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+        "avg_batch": round(len(latencies) / max(batches, 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eşzamanlı yazma (grup commit) benchmark'ı")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--ops", type=int, default=2000, help="Seviye başına toplam yazma sayısı")
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    print(f"synchronous={args.synchronous}, seviye başına {args.ops} yazma (add_service_log)\n")
+    results = []
+    for mode in args.modes:
+        for concurrency in args.concurrency:
+            r = run_level(mode, concurrency, args.ops, args.synchronous, args.seed)
+            results.append(r)
+            print(f"{mode:10s} c={concurrency:<4d} {r['writes_per_sec']:9.1f} yazma/sn  "
+                  f"p50={r['p50_ms']:8.3f} ms  p99={r['p99_ms']:8.3f} ms  "
+                  f"commit başına {r['avg_batch']:5.1f} işlem  hata={r['errors']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"synchronous": args.synchronous, "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Sonuçlar: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
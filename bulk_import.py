@@ -0,0 +1,169 @@
+"""
+Toplu İçe Aktarma (Bulk Import)
+Araç, parça ve servis kayıtlarını CSV veya NDJSON (satır başına bir JSON nesnesi)
+dosyalarından içe aktarır. Satırlar API ile aynı Pydantic şemalarıyla doğrulanır,
+geçerli satırlar parçalar (chunk) halinde tek transaction + executemany ile yazılır.
+Hatalı satırlar atlanır ve satır numarasıyla raporlanır.
+
+Kullanım:
+    python bulk_import.py vehicles araclar.csv
+    python bulk_import.py consumables parcalar.ndjson --chunk-size 5000
+    python bulk_import.py service_logs servis.csv --db vehicle_master.db
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from schemas import VehicleCreate, ComponentCreate, ServiceLogCreate
+
+# Tür -> (doğrulama şeması, VehicleManager toplu ekleme metodu)
+IMPORT_KINDS = {
+    "vehicles": (VehicleCreate, "bulk_add_vehicles"),
+    "consumables": (ComponentCreate, "bulk_add_consumables"),
+    "service_logs": (ServiceLogCreate, "bulk_add_service_logs"),
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+# Yanıtta döndürülecek en fazla hata sayısı (toplam hata sayısı ayrıca raporlanır)
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Dosyayı satır satır okur; tüm dosyayı belleğe almaz.
+    Üretilen değer: (satır_no, kayıt veya None, ayrıştırma hatası veya None)
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        # Başlık satırı 1. satırdır; veri satırları 2'den başlar
+        for row_no, row in enumerate(reader, start=2):
+            # Boş hücreler "değer verilmedi" demektir (şemadaki varsayılan kullanılır)
+            yield row_no, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+    elif fmt == "ndjson":
+        for row_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_no, None, f"Geçersiz JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_no, None, "Her satır bir JSON nesnesi olmalı."
+                continue
+            yield row_no, {k: v for k, v in record.items() if v is not None}, None
+    else:
+        raise ValueError(f"Desteklenmeyen format: {fmt} (csv veya ndjson)")
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+    )
+
+
+def import_records(manager, kind: str, records: Iterable[Tuple[int, Optional[Dict], Optional[str]]],
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """
+    Kayıtları doğrular ve parçalar halinde veritabanına yazar.
+    Returns: {kind, total, inserted, failed, errors, elapsed_seconds, rows_per_second}
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Bilinmeyen tür: {kind} ({', '.join(IMPORT_KINDS)})")
+    schema, method_name = IMPORT_KINDS[kind]
+    bulk_insert = getattr(manager, method_name)
+
+    started = time.perf_counter()
+    total = inserted = failed = 0
+    errors: List[Dict] = []
+    chunk: List[Dict] = []
+    chunk_rows: List[int] = []
+
+    def add_errors(new_errors: List[Dict]):
+        nonlocal failed
+        failed += len(new_errors)
+        room = MAX_REPORTED_ERRORS - len(errors)
+        if room > 0:
+            errors.extend(new_errors[:room])
+
+    def flush():
+        nonlocal inserted
+        if not chunk:
+            return
+        result = bulk_insert(chunk, chunk_rows)
+        inserted += result["inserted"]
+        add_errors(result["errors"])
+        chunk.clear()
+        chunk_rows.clear()
+
+    for row_no, record, parse_error in records:
+        total += 1
+        if parse_error:
+            add_errors([{"row": row_no, "error": parse_error}])
+            continue
+        try:
+            chunk.append(schema(**record).dict())
+            chunk_rows.append(row_no)
+        except ValidationError as e:
+            add_errors([{"row": row_no, "error": _format_validation_error(e)}])
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "total": total,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def import_file(manager, kind: str, stream: TextIO, fmt: str,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """Açık bir metin akışını (dosya veya yüklenen içerik) içe aktarır."""
+    return import_records(manager, kind, iter_records(stream, fmt), chunk_size=chunk_size)
+
+
+def detect_format(filename: str) -> str:
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV / NDJSON dosyasından toplu veri aktarımı")
+    parser.add_argument("kind", choices=list(IMPORT_KINDS))
+    parser.add_argument("path", help="İçe aktarılacak dosya")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Varsayılan: dosya uzantısından")
+    parser.add_argument("--db", default="vehicle_master.db")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from models import VehicleManager
+    manager = VehicleManager(args.db)
+    fmt = args.format or detect_format(args.path)
+
+    with io.open(args.path, "r", encoding="utf-8-sig", newline="") as stream:
+        report = import_file(manager, args.kind, stream, fmt, chunk_size=args.chunk_size)
+    manager.close()
+
+    print(f"📥 {report['kind']}: {report['inserted']}/{report['total']} satır eklendi, "
+          f"{report['failed']} hatalı ({report['elapsed_seconds']} sn, {report['rows_per_second']} satır/sn)")
+    for err in report["errors"][:20]:
+        print(f"   ❌ Satır {err['row']}: {err['error']}")
+    if report["failed"] > 20:
+        print(f"   ... ve {report['failed'] - 20} hata daha")
+
+
+if __name__ == "__main__":
+    main()
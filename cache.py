@@ -0,0 +1,141 @@
+"""
+Araç Bazlı Sonuç Önbelleği
+Maliyet, bakım durumu ve uyarı hesaplamalarının sonuçlarını araç bazında saklar.
+Boyut (LRU) ve süre (TTL) sınırlıdır; yazma işlemlerinde sadece etkilenen aracın
+kayıtları silinir, yakıt fiyatı değiştiğinde tüm önbellek temizlenir.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+_MISSING = object()
+
+
+class VehicleResultCache:
+    """
+    (vehicle_id, anahtar) -> sonuç eşlemesi tutan, thread-safe LRU + TTL önbellek.
+    Hesaplama sırasında araç verisi değişirse (invalidate) eski sonucun önbelleğe
+    yazılmaması için nesil (generation) sayacı kullanılır.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._keys_by_vehicle: Dict[int, set] = {}
+        self._generations: Dict[int, int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl_seconds > 0
+
+    def generation(self, vehicle_id: int) -> Tuple[int, int]:
+        """Hesaplamaya başlamadan önce alınır; set() çağrısına geri verilir."""
+        with self._lock:
+            return self._global_generation, self._generations.get(vehicle_id, 0)
+
+    def get(self, vehicle_id: int, key: Hashable) -> Any:
+        """Geçerli kayıt varsa döndürür, yoksa _MISSING."""
+        with self._lock:
+            entry = self._entries.get((vehicle_id, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove((vehicle_id, key))
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end((vehicle_id, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, vehicle_id: int, key: Hashable, value: Any, generation: Tuple[int, int]):
+        """Sonucu saklar; hesaplama sırasında araç geçersiz kılındıysa saklamaz."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != (self._global_generation, self._generations.get(vehicle_id, 0)):
+                return
+            full_key = (vehicle_id, key)
+            self._entries[full_key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(full_key)
+            self._keys_by_vehicle.setdefault(vehicle_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def _remove(self, full_key: Tuple[int, Hashable]):
+        self._entries.pop(full_key, None)
+        vehicle_id, key = full_key
+        keys = self._keys_by_vehicle.get(vehicle_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_vehicle[vehicle_id]
+
+    def invalidate_vehicle(self, vehicle_id: int):
+        """Aracın tüm önbellek kayıtlarını siler."""
+        with self._lock:
+            self._generations[vehicle_id] = self._generations.get(vehicle_id, 0) + 1
+            for key in list(self._keys_by_vehicle.get(vehicle_id, ())):
+                self._remove((vehicle_id, key))
+
+    def forget_vehicle(self, vehicle_id: int):
+        """
+        Silinen aracın kayıtlarını ve nesil sayacını kaldırır (sözlük araç sayısıyla sınırlı kalır).
+        Sayaç silindiği için genel nesil artırılır; devam eden hesaplamalar önbelleğe yazılmaz.
+        """
+        with self._lock:
+            self._global_generation += 1
+            self._generations.pop(vehicle_id, None)
+            for key in list(self._keys_by_vehicle.get(vehicle_id, ())):
+                self._remove((vehicle_id, key))
+
+    def clear(self):
+        """Tüm önbelleği temizler (örn. yakıt fiyatı değiştiğinde)."""
+        with self._lock:
+            self._global_generation += 1
+            self._entries.clear()
+            self._keys_by_vehicle.clear()
+            self._generations.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+def cached_per_vehicle(method):
+    """
+    VehicleManager metodlarını self.result_cache ile önbelleğe alır.
+    Metodun ilk argümanı vehicle_id olmalıdır; diğer argümanlar anahtara eklenir.
+    Dönen nesneler paylaşılır, çağıran taraf değiştirmemelidir.
+    """
+    @functools.wraps(method)
+    def wrapper(self, vehicle_id: int, *args, **kwargs):
+        cache: VehicleResultCache = self.result_cache
+        if not cache.enabled:
+            return method(self, vehicle_id, *args, **kwargs)
+
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        value = cache.get(vehicle_id, key)
+        if value is not _MISSING:
+            return value
+
+        generation = cache.generation(vehicle_id)
+        value = method(self, vehicle_id, *args, **kwargs)
+        cache.set(vehicle_id, key, value, generation)
+        return value
+
+    return wrapper
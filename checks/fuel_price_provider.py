@@ -0,0 +1,156 @@
+"""
+Yakıt Fiyatı Sağlayıcısı Çevrimdışı Kontrolü
+FuelPriceProvider'ı ağa çıkmadan, kaydedilmiş sayfayı (fixtures/akaryakit-fiyatlari.html)
+yayınlayan yerel bir http.server'a karşı çalıştırır:
+    1. İlk istek: 200, sayfa akışla ayrıştırılır, doğrulayıcılar diske yazılır
+    2. Yeni sağlayıcı (aynı önbellek dosyası): If-None-Match + If-Modified-Since -> 304,
+       fiyatlar diskteki önbellekten döner
+    3. Sadece ETag / sadece Last-Modified saklıyken de 304 alınır
+    4. Sayfa değişince (yeni ETag) tekrar 200 ve yeni fiyatlar
+    5. Bölge satırı yoksa ilk satır kullanılır
+
+Kullanım:
+    python -m checks.fuel_price_provider
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from fuel_prices import FuelPriceProvider
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGE = "akaryakit-fiyatlari.html"
+EXPECTED = {'benzin': 53.16, 'motorin': 54.59}       # ISTANBUL (AVRUPA) satırı
+FIRST_ROW = {'benzin': 53.48, 'motorin': 54.91}      # ADANA (bölge bulunamazsa)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    http.server'ın Last-Modified / If-Modified-Since desteğine ETag / If-None-Match ekler
+    ve her isteğin durum kodunu ve koşullu başlıklarını sunucuya kaydeder.
+    """
+
+    def _etag(self, path: str) -> str:
+        st = os.stat(path)
+        return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        self._current_etag = self._etag(path) if os.path.isfile(path) else None
+        if self._current_etag and self.headers.get("If-None-Match") == self._current_etag:
+            self.send_response(304)
+            self.end_headers()
+            return None
+        return super().send_head()
+
+    def send_response(self, code, message=None):
+        self.server.log.append({
+            "status": code,
+            "if_none_match": self.headers.get("If-None-Match"),
+            "if_modified_since": self.headers.get("If-Modified-Since"),
+        })
+        super().send_response(code, message)
+
+    def end_headers(self):
+        if getattr(self, "_current_etag", None):
+            self.send_header("ETag", self._current_etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+async def fetch_once(url: str, cache_path: str, region: str = "ISTANBUL (AVRUPA)"):
+    provider = FuelPriceProvider(url=url, cache_path=cache_path, region=region)
+    try:
+        prices = await provider.fetch()
+        return prices, provider
+    finally:
+        await provider.aclose()
+
+
+def edit_cache(cache_path: str, **changes):
+    with open(cache_path, "r", encoding="utf-8") as f:
+        cache = json.load(f)
+    cache.update(changes)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+
+async def run(url: str, work_dir: str, server: ThreadingHTTPServer):
+    cache_path = os.path.join(work_dir, "fuel_price_cache.json")
+    page_path = os.path.join(work_dir, PAGE)
+
+    prices, provider = await fetch_once(url, cache_path)
+    check(prices == EXPECTED, f"200: sayfa ayrıştırıldı {prices}")
+    check(provider.downloaded_count == 1 and server.log[-1]["status"] == 200, "200: koşulsuz ilk istek")
+    with open(cache_path, "r", encoding="utf-8") as f:
+        cache = json.load(f)
+    check(bool(cache.get("etag")) and bool(cache.get("last_modified")), "200: ETag / Last-Modified diske yazıldı")
+
+    prices, provider = await fetch_once(url, cache_path)
+    request = server.log[-1]
+    check(request["status"] == 304 and request["if_none_match"] == cache["etag"]
+          and request["if_modified_since"] == cache["last_modified"],
+          "304: yeni sağlayıcı diskteki doğrulayıcılarla koşullu istek gönderdi")
+    check(prices == EXPECTED and provider.not_modified_count == 1 and provider.downloaded_count == 0,
+          "304: fiyatlar disk önbelleğinden döndü")
+
+    edit_cache(cache_path, last_modified=None)
+    prices, _ = await fetch_once(url, cache_path)
+    check(server.log[-1]["status"] == 304 and server.log[-1]["if_modified_since"] is None
+          and prices == EXPECTED, "304: sadece ETag (If-None-Match) ile")
+
+    edit_cache(cache_path, etag=None, last_modified=cache["last_modified"])
+    prices, _ = await fetch_once(url, cache_path)
+    check(server.log[-1]["status"] == 304 and server.log[-1]["if_none_match"] is None
+          and prices == EXPECTED, "304: sadece Last-Modified (If-Modified-Since) ile")
+
+    # Sayfa değişti: mtime ileri alınır (yeni ETag / Last-Modified)
+    with open(page_path, "r", encoding="utf-8") as f:
+        html = f.read()
+    with open(page_path, "w", encoding="utf-8") as f:
+        f.write(html.replace("53,16", "54,02"))
+    st = os.stat(page_path)
+    os.utime(page_path, (st.st_atime + 3600, st.st_mtime + 3600))
+    edit_cache(cache_path, etag=cache["etag"])
+    prices, _ = await fetch_once(url, cache_path)
+    check(server.log[-1]["status"] == 200 and prices == dict(EXPECTED, benzin=54.02),
+          "200: sayfa değişince yeniden indirildi")
+
+    prices, _ = await fetch_once(url, os.path.join(work_dir, "other_cache.json"), region="HAKKARI")
+    check(prices == FIRST_ROW, "Bölge bulunamayınca ilk satır kullanıldı")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        shutil.copy(os.path.join(FIXTURES_DIR, PAGE), work_dir)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=work_dir))
+        server.log = []
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/{PAGE}"
+            asyncio.run(run(url, work_dir, server))
+        finally:
+            server.shutdown()
+            server.server_close()
+    print("\n✅ Tüm kontroller geçti")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Vektörel Filo Maliyet Motoru
+Araç ve parça tablolarını sütun bazlı (columnar) NumPy dizilerine yükler ve
+VehicleManager.calculate_total_km_cost ile aynı formülleri tüm filo için
+tek seferde uygular. Sonuçlar yuvarlama sonrası skaler hesapla birebir aynıdır:
+işlemler aynı sırada ve aynı IEEE-754 çift duyarlıklı aritmetikle yapılır,
+parça toplamları da np.bincount ile araç bazında sırayla (id sırasıyla) toplanır.
+"""
+
+import json
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+# Motorun kullandığı sayısal araç sütunları (sıra önemli değil, isimle erişilir)
+VEHICLE_NUMERIC_COLUMNS = [
+    'ortalama_tuketim_l_100km', 'periyodik_bakim_maliyeti', 'periyodik_bakim_km',
+    'su_anki_fiyat', 'gelecek_fiyat', 'guncel_km', 'gelecek_km',
+    'yillik_sigorta', 'yillik_mtv', 'yillik_ortalama_km'
+]
+
+
+class FleetArrays:
+    """Filonun sütun bazlı (columnar) görünümü."""
+
+    def __init__(self, vehicle_ids: np.ndarray, is_diesel: np.ndarray, columns: Dict[str, np.ndarray],
+                 part_vehicle_idx: np.ndarray, part_maliyet: np.ndarray, part_omur_km: np.ndarray):
+        self.vehicle_ids = vehicle_ids          # (n,) int64, artan sırada
+        self.is_diesel = is_diesel              # (n,) bool
+        self.columns = columns                  # sütun adı -> (n,) float64 (NULL = nan)
+        self.part_vehicle_idx = part_vehicle_idx  # (m,) her parçanın araç satır indeksi
+        self.part_maliyet = part_maliyet        # (m,) float64 (NULL = nan)
+        self.part_omur_km = part_omur_km        # (m,) float64 (NULL = nan)
+
+    def __len__(self):
+        return len(self.vehicle_ids)
+
+    @classmethod
+    def from_rows(cls, vehicles: List[Dict], consumables: List[Dict]) -> "FleetArrays":
+        """Önceden yüklenmiş sözlük satırlarından diziler oluşturur (araçlar id sırasında olmalı)."""
+        vehicle_ids = np.fromiter((v['id'] for v in vehicles), dtype=np.int64, count=len(vehicles))
+        is_diesel = np.fromiter(((v.get('yakit_tipi') or 'benzin') == 'dizel' for v in vehicles),
+                                dtype=bool, count=len(vehicles))
+        columns = {
+            col: np.array([_nan_if_none(v.get(col)) for v in vehicles], dtype=np.float64)
+            for col in VEHICLE_NUMERIC_COLUMNS
+        }
+        part_vehicle_ids = np.fromiter((c['vehicle_id'] for c in consumables), dtype=np.int64,
+                                       count=len(consumables))
+        part_maliyet = np.array([_nan_if_none(c.get('maliyet')) for c in consumables], dtype=np.float64)
+        part_omur_km = np.array([_nan_if_none(c.get('omur_km')) for c in consumables], dtype=np.float64)
+        return cls(vehicle_ids, is_diesel, columns,
+                   _vehicle_index(vehicle_ids, part_vehicle_ids), part_maliyet, part_omur_km)
+
+    @classmethod
+    def load(cls, conn, vehicle_ids: Optional[List[int]] = None) -> "FleetArrays":
+        """
+        Diziler doğrudan veritabanından (satır sözlükleri oluşturmadan) yüklenir.
+        NULL değerler 0 olarak okunur; formüllerde `x or default` kullanıldığı için
+        bu sonucu değiştirmez. Parçalar id sırasıyla okunur (tekil hesapla aynı toplama sırası).
+        """
+        select_cols = ', '.join(
+            ['id', "COALESCE(yakit_tipi, 'benzin') = 'dizel'"] +
+            [f"COALESCE({col}, 0)" for col in VEHICLE_NUMERIC_COLUMNS]
+        )
+        if vehicle_ids is None:
+            where, params = "", ()
+        else:
+            where = "WHERE {col} IN (SELECT value FROM json_each(?))"
+            params = (json.dumps([int(i) for i in vehicle_ids]),)
+
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {select_cols} FROM vehicles {where.format(col='id')} ORDER BY id", params)
+        rows = cursor.fetchall()
+        table = np.array([tuple(r) for r in rows], dtype=np.float64).reshape(len(rows), -1)
+        ids = table[:, 0].astype(np.int64)
+        is_diesel = table[:, 1].astype(bool)
+        columns = {col: table[:, 2 + i] for i, col in enumerate(VEHICLE_NUMERIC_COLUMNS)}
+
+        cursor.execute(
+            f"""SELECT COALESCE(vehicle_id, -1), COALESCE(maliyet, 0), COALESCE(omur_km, 0)
+                FROM consumables {where.format(col='vehicle_id')} ORDER BY id""",
+            params
+        )
+        parts = cursor.fetchall()
+        parts = np.array([tuple(r) for r in parts], dtype=np.float64).reshape(len(parts), 3)
+        part_idx = _vehicle_index(ids, parts[:, 0].astype(np.int64))
+        return cls(ids, is_diesel, columns, part_idx, parts[:, 1], parts[:, 2])
+
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
+
+
+def _vehicle_index(vehicle_ids: np.ndarray, part_vehicle_ids: np.ndarray) -> np.ndarray:
+    """Her parçanın ait olduğu aracın satır indeksini bulur (filoda olmayan araçlar için -1)."""
+    if len(vehicle_ids) == 0:
+        return np.full(len(part_vehicle_ids), -1, dtype=np.int64)
+    pos = np.searchsorted(vehicle_ids, part_vehicle_ids)
+    pos_clipped = np.minimum(pos, len(vehicle_ids) - 1)
+    return np.where(vehicle_ids[pos_clipped] == part_vehicle_ids, pos_clipped, -1)
+
+
+def _or_default(values: np.ndarray, default: float) -> np.ndarray:
+    """Python'daki `x or default` ifadesinin vektörel karşılığı (NULL ve 0 -> default)."""
+    return np.where(np.isnan(values) | (values == 0), default, values)
+
+
+def _div_safely(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """VehicleManager.div_safely'nin vektörel karşılığı (payda 0/NULL veya pay NULL ise 0)."""
+    valid = ~np.isnan(numerator) & ~np.isnan(denominator) & (denominator != 0)
+    out = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=valid)
+    return out
+
+
+def compute_fleet_costs(fleet: FleetArrays, benzin_price: float, motorin_price: float,
+                        manual_price: Optional[Union[str, float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Tüm filo için km başı maliyet bileşenlerini hesaplar (yuvarlanmamış ham değerler).
+    Returns: {fuel_price, fuel_cost, maintenance_cost, consumable_cost, part_cost,
+              depreciation_cost, fixed_total, fixed_cost_per_km, total_cost_per_km}
+    """
+    cols = fleet.columns
+    n = len(fleet)
+
+    # 1. Yakıt Maliyeti
+    if manual_price:
+        fuel_price = np.full(n, float(manual_price))
+    else:
+        fuel_price = np.where(fleet.is_diesel, motorin_price, benzin_price)
+    avg_consumption = _or_default(cols['ortalama_tuketim_l_100km'], 0)
+    fuel_cost = (avg_consumption / 100) * fuel_price
+
+    # 2. Bakım Birim Maliyeti
+    maint_cost = _or_default(cols['periyodik_bakim_maliyeti'], 0)
+    maint_km = _or_default(cols['periyodik_bakim_km'], 10000)
+    maintenance_cost = _div_safely(maint_cost, maint_km)
+
+    # 3. Parça Eskime Payı (araç bazında gruplanmış toplam)
+    part_cost = _div_safely(fleet.part_maliyet, fleet.part_omur_km)
+    in_fleet = fleet.part_vehicle_idx >= 0
+    consumable_cost = np.bincount(fleet.part_vehicle_idx[in_fleet], weights=part_cost[in_fleet],
+                                  minlength=n).astype(np.float64)
+
+    # 4. KM Başı Değer Kaybı
+    current_price = _or_default(cols['su_anki_fiyat'], 0)
+    future_price = _or_default(cols['gelecek_fiyat'], 0)
+    current_km = _or_default(cols['guncel_km'], 0)
+    future_km = _or_default(cols['gelecek_km'], 0)
+    km_diff = future_km - current_km
+    depreciation_cost = np.zeros(n, dtype=np.float64)
+    np.divide(current_price - future_price, km_diff, out=depreciation_cost, where=km_diff > 0)
+    depreciation_cost[depreciation_cost < 0] = 0.0
+
+    # 5. Sabit Gider Payı
+    fixed_total = _or_default(cols['yillik_sigorta'], 0) + _or_default(cols['yillik_mtv'], 0)
+    yearly_avg_km = _or_default(cols['yillik_ortalama_km'], 15000)
+    fixed_cost_per_km = _div_safely(fixed_total, yearly_avg_km)
+
+    total_cost_per_km = fuel_cost + maintenance_cost + consumable_cost + depreciation_cost
+
+    return {
+        "fuel_price": fuel_price,
+        "fuel_cost": fuel_cost,
+        "maintenance_cost": maintenance_cost,
+        "consumable_cost": consumable_cost,
+        "part_cost": part_cost,
+        "depreciation_cost": depreciation_cost,
+        "fixed_total": fixed_total,
+        "fixed_cost_per_km": fixed_cost_per_km,
+        "total_cost_per_km": total_cost_per_km
+    }
+
+
+def compute_cost_curve(fleet: FleetArrays, benzin_prices: List[Optional[float]],
+                       motorin_prices: List[Optional[float]]) -> Dict[str, np.ndarray]:
+    """
+    Fiyat zaman serisi için (nokta x araç) km başı maliyet matrisleri.
+    Yakıt dışı bileşenler fiyattan bağımsız olduğu için bir kez hesaplanır;
+    toplam, compute_fleet_costs ile aynı işlem sırasıyla bulunur. Fiyatı bilinmeyen
+    noktalar (None) nan olur.
+    Returns: {fuel_price, fuel_cost, total_cost_per_km} — her biri (len(prices), len(fleet))
+    """
+    base = compute_fleet_costs(fleet, benzin_price=0.0, motorin_price=0.0)
+    benzin = np.array([_nan_if_none(p) for p in benzin_prices], dtype=np.float64).reshape(-1, 1)
+    motorin = np.array([_nan_if_none(p) for p in motorin_prices], dtype=np.float64).reshape(-1, 1)
+
+    fuel_price = np.where(fleet.is_diesel[None, :], motorin, benzin)
+    avg_consumption = _or_default(fleet.columns['ortalama_tuketim_l_100km'], 0)
+    fuel_cost = (avg_consumption / 100)[None, :] * fuel_price
+    total_cost_per_km = (fuel_cost + base['maintenance_cost'] + base['consumable_cost']
+                         + base['depreciation_cost'])
+    return {
+        "fuel_price": fuel_price,
+        "fuel_cost": fuel_cost,
+        "total_cost_per_km": total_cost_per_km
+    }
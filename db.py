@@ -0,0 +1,226 @@
+"""
+SQLite Bağlantı Havuzu
+Her istek (thread) kendi bağlantısını havuzdan alır; tek bir paylaşılan
+bağlantı üzerinde istekler birbirini beklemez veya birbirine karışmaz.
+Yazmalar WriteQueue ile tek bir yazıcı thread'inde gruplanarak commit edilir.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ConnectionPool:
+    """
+    Sabit boyutlu SQLite bağlantı havuzu.
+    Bağlantılar WAL modunda açılır: okuyucular yazarı, yazar okuyucuları bloklamaz.
+    Aynı thread içinde iç içe connection() çağrıları aynı bağlantıyı paylaşır
+    (örn. calculate_total_km_cost -> get_vehicle_consumables), böylece havuz
+    dolu olsa bile kilitlenme (deadlock) oluşmaz.
+    """
+
+    def __init__(self, db_name: str, pool_size: int = 8, busy_timeout_ms: int = 5000,
+                 synchronous: str = "NORMAL", acquire_timeout: float = 30.0,
+                 connection_factory: type = sqlite3.Connection):
+        if pool_size < 1:
+            raise ValueError("pool_size en az 1 olmalı.")
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.acquire_timeout = acquire_timeout
+        # Örn. metrics.TimedConnection (sorgu süresi ölçümü için)
+        self.connection_factory = connection_factory
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._local = threading.local()
+        self._all_connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread=False: bağlantı havuza geri döndükten sonra başka bir thread'e verilebilir
+        conn = sqlite3.connect(self.db_name, check_same_thread=False,
+                               timeout=self.busy_timeout_ms / 1000, factory=self.connection_factory)
+        # Row factory ile sonuçları sözlük gibi (dictionary-like) alabiliriz
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        with self._lock:
+            self._all_connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Havuzdan bir bağlantı ödünç verir; blok bitince geri alır."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            # Aynı thread zaten bir bağlantı tutuyor (iç içe çağrı)
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        if self._closed:
+            raise sqlite3.ProgrammingError("Bağlantı havuzu kapatıldı.")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise sqlite3.OperationalError("Bağlantı havuzu dolu (zaman aşımı).")
+
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+
+            self._local.conn = conn
+            self._local.depth = 1
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                self._local.depth = 0
+                # Commit edilmemiş (yarım kalmış) işlemler bir sonraki kullanıcıya sızmasın
+                if conn.in_transaction:
+                    conn.rollback()
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def close(self):
+        """Havuzdaki tüm bağlantıları kapatır."""
+        self._closed = True
+        with self._lock:
+            for conn in self._all_connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all_connections.clear()
+
+
+class WriteQueue:
+    """
+    Tek yazıcılı grup commit (group commit) kuyruğu.
+    Eşzamanlı isteklerden gelen yazma işlemleri tek bir thread'de, tek transaction
+    içinde toplanır (commit başına bir fsync). Bir commit sürerken gelen yazmalar
+    kuyrukta birikir ve sonraki grupta birlikte yazılır; max_delay_ms > 0 ise ilk
+    işlemden sonra bu kadar daha beklenir. Grup en fazla max_batch işlem içerir.
+    Her işlem kendi SAVEPOINT'inde çalışır; hata veren işlem geri alınır, aynı
+    gruptaki diğer işlemler etkilenmez. Çağıran sonucunu (lastrowid vb.) veya
+    hatasını ancak commit tamamlandıktan sonra alır.
+    """
+
+    def __init__(self, pool: ConnectionPool, max_batch: int = 64, max_delay_ms: float = 0.0):
+        if max_batch < 1:
+            raise ValueError("max_batch en az 1 olmalı.")
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: "queue.Queue[Optional[Tuple[Callable, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        # İstatistik: toplam commit edilen grup ve işlem sayısı
+        self.batches = 0
+        self.operations = 0
+
+    def _ensure_started(self):
+        # Yazıcı thread'i ilk yazmada başlar (sadece okuyan araçlar thread açmasın)
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Yazma kuyruğu kapatıldı.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, func: Callable[[sqlite3.Cursor], T]) -> "Future[T]":
+        """func(cursor)'ı sıradaki gruba ekler; sonucu commit sonrası tamamlanan Future döner."""
+        if threading.current_thread() is self._thread:
+            # Yazma işlemi içinden yeni yazma: kendi commit'ini bekleyip kilitlenirdi
+            raise RuntimeError("Yazma işlemi içinden WriteQueue'ya iş gönderilemez.")
+        self._ensure_started()
+        future: "Future[T]" = Future()
+        self._queue.put((func, future))
+        return future
+
+    def execute(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        """submit + sonucu bekler (hata varsa aynen fırlatır)."""
+        return self.submit(func).result()
+
+    def _run(self):
+        conn = self.pool._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(conn, batch)
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[Tuple[Callable, Future]]):
+        results = []
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for func, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute("SAVEPOINT write_op")
+                try:
+                    result = func(cursor)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_op")
+                    cursor.execute("RELEASE write_op")
+                    results.append((future, None, e))
+                    continue
+                cursor.execute("RELEASE write_op")
+                results.append((future, result, None))
+            conn.commit()
+        except sqlite3.Error as e:
+            # BEGIN / COMMIT başarısız: gruptaki hiçbir işlem kalıcı değil
+            if conn.in_transaction:
+                conn.rollback()
+            for func, future in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(results)
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """Kuyruktaki işleri bitirir ve yazıcı thread'ini durdurur."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
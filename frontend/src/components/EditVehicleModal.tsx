@@ -4,6 +4,7 @@ import { useState, useEffect } from "react";
 import axios from "axios";
 import { Vehicle } from "@/types/vehicle";
 import { X, Save, Upload, ChevronDown, ChevronUp } from "lucide-react";
+import { thumbnailUrl, fallbackToOriginal } from "@/lib/thumbnails";
 
 const API_BASE = "http://127.0.0.1:8000";
 
@@ -37,7 +38,9 @@ export default function EditVehicleModal({ vehicle, onSuccess, onCancel }: EditV
 
   const [uploading, setUploading] = useState(false);
   const [saving, setSaving] = useState(false);
-  const [previewUrl, setPreviewUrl] = useState<string | null>(vehicle.fotograf_url || null);
+  const [previewUrl, setPreviewUrl] = useState<string | null>(
+    vehicle.fotograf_url ? thumbnailUrl(vehicle.fotograf_url, "modal") : null
+  );
   
   // Accordion state - all sections open by default
   const [openSections, setOpenSections] = useState({
@@ -202,7 +205,12 @@ export default function EditVehicleModal({ vehicle, onSuccess, onCancel }: EditV
                       <div className="space-y-2">
                         {previewUrl && (
                           <div className="relative w-full h-24 rounded-lg overflow-hidden bg-slate-100 dark:bg-slate-800 border border-slate-300 dark:border-slate-600">
-                            <img src={previewUrl} alt="Önizleme" className="w-full h-full object-cover" />
+                            <img
+                              src={previewUrl}
+                              alt="Önizleme"
+                              className="w-full h-full object-cover"
+                              onError={vehicle.fotograf_url ? fallbackToOriginal(vehicle.fotograf_url) : undefined}
+                            />
                           </div>
                         )}
                         <label className="flex items-center justify-center gap-2 px-3 py-2 bg-slate-50 dark:bg-slate-800 border-2 border-dashed border-slate-300 dark:border-slate-600 rounded-lg cursor-pointer hover:bg-slate-100 dark:hover:bg-slate-750 transition-colors">
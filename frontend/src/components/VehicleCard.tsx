@@ -8,6 +8,7 @@ import AddComponentForm from "./AddComponentForm";
 import VehicleDetailModal from "./VehicleDetailModal";
 import ServiceHistory from "./ServiceHistory";
 import EditVehicleModal from "./EditVehicleModal";
+import { thumbnailUrl, fallbackToOriginal } from "@/lib/thumbnails";
 
 const API_BASE = "http://127.0.0.1:8000";
 
@@ -86,9 +87,11 @@ export default function VehicleCard({ vehicle, onDelete, onUpdate }: VehicleCard
       <div className="h-40 w-full bg-gray-200 dark:bg-gray-700 relative shrink-0">
         {vehicle.fotograf_url ? (
           <img
-            src={vehicle.fotograf_url}
+            src={thumbnailUrl(vehicle.fotograf_url, "card")}
             alt={`${vehicle.marka} ${vehicle.model}`}
             className="w-full h-full object-cover"
+            loading="lazy"
+            onError={fallbackToOriginal(vehicle.fotograf_url)}
           />
         ) : (
           <div className="flex items-center justify-center h-full text-gray-400">
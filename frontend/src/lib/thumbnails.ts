@@ -0,0 +1,22 @@
+import type { SyntheticEvent } from "react";
+
+// Yüklenen fotoğrafların küçük resim (WebP) adresleri backend'deki kurala göre türetilir:
+//   /uploads/<uuid>.<uzantı>  ->  /uploads/<uuid>_<boyut>.webp
+// Eski yüklemeler veya dış adresler için orijinal adres döner.
+export type ThumbnailSize = "card" | "modal";
+
+const UPLOAD_PATTERN = /^(.*\/uploads\/[0-9a-f]{32})\.(jpg|png|gif|webp)$/;
+
+export function thumbnailUrl(url: string, size: ThumbnailSize): string {
+  const match = url.match(UPLOAD_PATTERN);
+  return match ? `${match[1]}_${size}.webp` : url;
+}
+
+// Küçük resim yoksa (örn. backend'de Pillow kurulu değil) orijinal resme geri dön
+export function fallbackToOriginal(original: string) {
+  return (e: SyntheticEvent<HTMLImageElement>) => {
+    if (e.currentTarget.src !== original) {
+      e.currentTarget.src = original;
+    }
+  };
+}
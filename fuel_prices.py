@@ -0,0 +1,233 @@
+"""
+Asenkron Yakıt Fiyatı Sağlayıcısı
+Petrol Ofisi fiyat sayfasını kalıcı (havuzlu) bir HTTP istemcisiyle çeker:
+- Koşullu istek: ETag / Last-Modified saklanır, If-None-Match / If-Modified-Since
+  gönderilir; 304 yanıtında sayfa indirilmez, diskteki son sonuç kullanılır.
+- Akış halinde ayrıştırma: sayfa parça parça okunur ve sadece `tr.price-row`
+  satırları işlenir; aranan bölge satırı bulunduğunda indirme kesilir.
+
+Çevrimdışı deneme: kaydedilmiş sayfa (checks/fixtures/akaryakit-fiyatlari.html) yerel
+sunucuyla yayınlanıp URL ona yönlendirilir (http.server Last-Modified/304 destekler):
+    python -m http.server 8765 --directory checks/fixtures/
+    FUEL_PRICE_URL=http://127.0.0.1:8765/akaryakit-fiyatlari.html python fuel_prices.py
+200 -> ayrıştırma ve ETag / If-Modified-Since -> 304 -> disk önbelleği yolları için:
+    python -m checks.fuel_price_provider
+
+Sadece httpx gerektirir (requests / BeautifulSoup'a bağlı değildir).
+"""
+
+import asyncio
+import json
+import os
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+import httpx
+
+from metrics import track_scrape
+
+DEFAULT_URL = "https://www.petrolofisi.com.tr/akaryakit-fiyatlari"
+DEFAULT_REGION = "ISTANBUL (AVRUPA)"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+}
+
+
+def parse_price(price_str: str) -> float:
+    """'53,16 TL/L' gibi metinleri float'a çevirir; çevrilemezse 0.0."""
+    try:
+        return float(re.sub(r'[^\d,.]', '', price_str).replace(',', '.'))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class PriceRowParser(HTMLParser):
+    """
+    Sadece `tr.price-row` satırlarını izleyen artımlı (incremental) HTML ayrıştırıcı.
+    feed() ile parça parça beslenir; hedef bölge satırı kapandığında `done` olur.
+    """
+
+    def __init__(self, region: str = DEFAULT_REGION):
+        super().__init__(convert_charrefs=True)
+        self.region_variants = {region.upper(), region.upper().replace('I', 'İ', 1)}
+        self.first_row_prices: Optional[List[str]] = None
+        self.region_prices: Optional[List[str]] = None
+        self.done = False
+
+        self._in_row = False
+        self._row_is_region = False
+        self._row_prices: List[str] = []
+        self._span_depth = 0        # with-tax span'ı içindeki iç içe span derinliği
+        self._span_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag == 'tr' and 'price-row' in classes:
+            district = (attrs.get('data-disctrict-name') or '').upper()
+            self._in_row = True
+            self._row_is_region = any(variant in district for variant in self.region_variants)
+            self._row_prices = []
+        elif self._in_row and tag == 'span':
+            if self._span_depth:
+                self._span_depth += 1
+            elif 'with-tax' in classes:
+                self._span_depth = 1
+                self._span_text = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._in_row:
+            return
+        if tag == 'span' and self._span_depth:
+            self._span_depth -= 1
+            if not self._span_depth:
+                self._row_prices.append(''.join(self._span_text))
+        elif tag == 'tr':
+            self._in_row = False
+            if self.first_row_prices is None:
+                self.first_row_prices = self._row_prices
+            if self._row_is_region:
+                self.region_prices = self._row_prices
+                self.done = True
+
+    def handle_data(self, data):
+        if self._span_depth:
+            self._span_text.append(data)
+
+    def prices(self) -> Optional[Dict[str, float]]:
+        """Bulunan fiyatlar: önce hedef bölge, yoksa ilk satır (utils ile aynı kural)."""
+        for candidate in (self.region_prices, self.first_row_prices):
+            if candidate and len(candidate) >= 2:
+                benzin = parse_price(candidate[0])
+                motorin = parse_price(candidate[1])
+                if benzin > 0 and motorin > 0:
+                    return {'benzin': benzin, 'motorin': motorin}
+        return None
+
+
+class FuelPriceProvider:
+    """
+    Kalıcı httpx.AsyncClient ile yakıt fiyatlarını çeker.
+    Son başarılı yanıtın doğrulayıcıları (ETag / Last-Modified) ve fiyatları
+    cache_path dosyasında saklanır; süreç yeniden başlasa da koşullu istek yapılabilir.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, cache_path: Optional[str] = "fuel_price_cache.json",
+                 region: str = DEFAULT_REGION, timeout: float = 15.0):
+        self.url = url
+        self.cache_path = cache_path
+        self.region = region
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: Optional[Dict] = None
+        self.not_modified_count = 0
+        self.downloaded_count = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=2, max_keepalive_connections=1)
+            )
+        return self._client
+
+    def _load_cache(self) -> Dict:
+        if self._cache is None:
+            self._cache = {}
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        self._cache = json.load(f)
+                except (OSError, ValueError):
+                    self._cache = {}
+        return self._cache
+
+    def _save_cache(self, cache: Dict):
+        self._cache = cache
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Fiyat önbelleği yazılamadı: {e}")
+
+    @track_scrape("provider")
+    async def fetch(self) -> Optional[Dict[str, float]]:
+        """
+        Güncel fiyatları döndürür ({'benzin': float, 'motorin': float}).
+        Sayfa değişmemişse (304) önbellekteki fiyatlar döner. Hata durumunda None.
+        """
+        cache = self._load_cache()
+        headers = {}
+        if cache.get('prices'):
+            if cache.get('etag'):
+                headers['If-None-Match'] = cache['etag']
+            if cache.get('last_modified'):
+                headers['If-Modified-Since'] = cache['last_modified']
+
+        try:
+            async with self._get_client().stream("GET", self.url, headers=headers) as response:
+                if response.status_code == 304 and cache.get('prices'):
+                    self.not_modified_count += 1
+                    print("✅ Fiyat sayfası değişmemiş (304), önbellekteki fiyatlar kullanılıyor.")
+                    return dict(cache['prices'])
+                if response.status_code != 200:
+                    print(f"⚠️ Fiyat sayfası yanıtı: HTTP {response.status_code}")
+                    return None
+
+                parser = PriceRowParser(self.region)
+                async for chunk in response.aiter_text():
+                    parser.feed(chunk)
+                    if parser.done:
+                        break  # Aranan satır bulundu, sayfanın geri kalanı indirilmez
+                parser.close()
+                self.downloaded_count += 1
+
+                prices = parser.prices()
+                if not prices:
+                    print("⚠️ Fiyat sayfasında fiyat satırı bulunamadı.")
+                    return None
+
+                self._save_cache({
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'prices': prices,
+                    'fetched_at': datetime.now().isoformat(timespec='seconds')
+                })
+                print(f"✅ Fiyatlar çekildi - Benzin: {prices['benzin']} TL, Motorin: {prices['motorin']} TL")
+                return prices
+        except httpx.HTTPError as e:
+            print(f"⚠️ Fiyat çekme hatası (Petrol Ofisi): {e}")
+            return None
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+async def _main():
+    provider = FuelPriceProvider(
+        url=os.environ.get("FUEL_PRICE_URL", DEFAULT_URL),
+        cache_path=os.environ.get("FUEL_PRICE_CACHE_PATH", "fuel_price_cache.json")
+    )
+    try:
+        print(await provider.fetch())
+    finally:
+        await provider.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,21 +1,98 @@
-from fastapi import FastAPI, HTTPException, Body, UploadFile, File
+from fastapi import FastAPI, HTTPException, Body, UploadFile, File, Query, Request
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
-from models import VehicleManager
+from contextlib import asynccontextmanager
+from models import VehicleManager, normalize_as_of, FLEET_VERSION_KEY, SETTINGS_VERSION_KEY, SEARCH_CANDIDATES
+from async_models import AsyncVehicleManager
+from schemas import (
+    VehicleCreate, VehicleUpdate, ComponentCreate, ComponentUpdate,
+    ServiceLogCreate, SettingsUpdate, OdometerBatch
+)
+from price_refresher import FuelPriceRefresher
+from odometer import OdometerIngestor, normalize_reading_ts
+from bulk_import import import_file, detect_format
+from uploads import UploadError, ThumbnailWorker, save_upload, generate_thumbnails, remove_upload
+import metrics
+import asyncio
+import hashlib
+import io
+import json
 import os
-import uuid
+import sqlite3
+
+try:
+    from fuel_prices import FuelPriceProvider, DEFAULT_URL as DEFAULT_FUEL_PRICE_URL
+except ImportError:
+    # httpx kurulu değilse bloklayıcı (requests) çekiciye geri dönülür
+    FuelPriceProvider = None
+
+# Ölçüm katmanı (/metrics); METRICS_ENABLED=0 ile kapatılır
+metrics.set_enabled(os.environ.get("METRICS_ENABLED", "1") != "0")
 
 # Uploads klasörü
 UPLOADS_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_MB", 10)) * 1024 * 1024
+
+# Küçük resimler ayrı süreçlerde üretilir (Pillow kurulu değilse devre dışı)
+thumbnail_worker = ThumbnailWorker(max_workers=int(os.environ.get("THUMBNAIL_WORKERS", 2)))
+
+# Veritabanı yöneticisi (sadece şema kurulumu yapar, ağ isteği atmaz)
+manager = VehicleManager(
+    pool_size=int(os.environ.get("DB_POOL_SIZE", 8)),
+    busy_timeout_ms=int(os.environ.get("DB_BUSY_TIMEOUT_MS", 5000)),
+    result_cache_size=int(os.environ.get("RESULT_CACHE_SIZE", 1024)),
+    result_cache_ttl=float(os.environ.get("RESULT_CACHE_TTL", 300)),
+    synchronous=os.environ.get("DB_SYNCHRONOUS", "NORMAL"),
+    write_batch_size=int(os.environ.get("WRITE_BATCH_SIZE", 64)),
+    write_batch_window_ms=float(os.environ.get("WRITE_BATCH_WINDOW_MS", 0))
+)
+metrics.register_cache_stats(manager.cache_stats)
+# Endpoint'ler veritabanına bu asenkron katman üzerinden erişir (ayrı DB executor'ı)
+db = AsyncVehicleManager(manager, max_workers=int(os.environ.get("DB_EXECUTOR_WORKERS", 0)) or None)
+
+# Asenkron fiyat sağlayıcısı (kalıcı HTTP oturumu, koşullu istek, disk önbelleği)
+fuel_price_provider = None
+if FuelPriceProvider is not None:
+    fuel_price_provider = FuelPriceProvider(
+        url=os.environ.get("FUEL_PRICE_URL", DEFAULT_FUEL_PRICE_URL),
+        cache_path=os.environ.get("FUEL_PRICE_CACHE_PATH", "fuel_price_cache.json") or None
+    )
+
+# Yakıt fiyatları arka planda güncellenir (saniye cinsinden aralıklar ortam değişkeni ile ayarlanabilir)
+fuel_refresher = FuelPriceRefresher(
+    manager,
+    interval_seconds=int(os.environ.get("FUEL_PRICE_REFRESH_INTERVAL", 6 * 3600)),
+    retry_seconds=int(os.environ.get("FUEL_PRICE_RETRY_INTERVAL", 300)),
+    provider=fuel_price_provider
+)
+
+# Telematik km okumaları bellekte birleştirilip periyodik olarak yazılır
+ODOMETER_MAX_BATCH = 10000
+odometer_ingestor = OdometerIngestor(
+    manager,
+    flush_interval_seconds=float(os.environ.get("ODOMETER_FLUSH_INTERVAL", 5)),
+    max_pending=int(os.environ.get("ODOMETER_MAX_PENDING", 10000))
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    fuel_refresher.start()
+    odometer_ingestor.start()
+    yield
+    await odometer_ingestor.stop()
+    await fuel_refresher.stop()
+    thumbnail_worker.shutdown()
+    db.shutdown()
 
 # Uygulama Başlatma
 app = FastAPI(
     title="Vehicle Master API",
     description="Araç Takip ve Maliyet Analiz Sistemi Backend API",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS Ayarları (Next.js vb. frontendler için)
@@ -24,115 +101,120 @@ app.add_middleware(
     allow_origins=["*"], 
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-manager = VehicleManager()
+# Endpoint gecikme histogramları (route şablonu bazında)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Static files - yüklenen fotoğraflar için
 app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
 
-# --- PYDANTIC MODELLERİ ---
-
-class VehicleBase(BaseModel):
-    marka: str
-    model: str
-    yil: int = Field(..., ge=1900, le=2030)
-    fotograf_url: Optional[str] = None
-    
-    # KM Bilgileri
-    baslangic_km: int = 0
-    guncel_km: int = 0
-    
-    # Yakıt
-    yakit_tipi: str = "benzin"  # benzin veya dizel
-    ortalama_tuketim_l_100km: float = 0.0
-    
-    # Bakım
-    periyodik_bakim_km: int = 10000
-    periyodik_bakim_maliyeti: float = 0.0
-    
-    # Servis Takibi (YENİ)
-    son_bakim_km: int = 0
-    bakim_araligi: int = 2000
-    
-    # Sabit Giderler
-    yillik_sigorta: float = 0.0
-    yillik_mtv: float = 0.0
-    yillik_ortalama_km: int = 15000
-    
-    # Değer Kaybı
-    su_anki_fiyat: float = 0.0
-    gelecek_fiyat: float = 0.0
-    gelecek_km: int = 0
-
-class VehicleCreate(BaseModel):
-    # Zorunlu Alanlar
-    marka: str = Field(..., min_length=1, description="Araç Markası")
-    model: str = Field(..., min_length=1, description="Araç Modeli")
-    yil: int = Field(..., ge=1900, le=2030, description="Üretim Yılı")
-    guncel_km: int = Field(..., ge=0, description="Güncel Kilometre")
-
-    # Opsiyonel / Varsayılan Değerli Alanlar
-    fotograf_url: Optional[str] = None
-    baslangic_km: Optional[int] = 0
-    yakit_tipi: Optional[str] = "benzin"
-    ortalama_tuketim_l_100km: Optional[float] = 0.0
-    periyodik_bakim_km: Optional[int] = 10000
-    periyodik_bakim_maliyeti: Optional[float] = 0.0
-    son_bakim_km: Optional[int] = 0
-    bakim_araligi: Optional[int] = 2000
-    yillik_sigorta: Optional[float] = 0.0
-    yillik_mtv: Optional[float] = 0.0
-    yillik_ortalama_km: Optional[int] = 15000
-    su_anki_fiyat: Optional[float] = 0.0
-    gelecek_fiyat: Optional[float] = 0.0
-    gelecek_km: Optional[int] = 0
-
-class VehicleUpdate(VehicleBase):
-    pass
-
-class ComponentCreate(BaseModel):
-    vehicle_id: int
-    parca_adi: str = Field(..., min_length=1)
-    maliyet: float = Field(..., ge=0)
-    omur_km: int = Field(..., gt=0, description="Parçanın ömrü 0 olamaz")
-    degisim_km: Optional[int] = Field(0, ge=0)
-
-class ServiceLogCreate(BaseModel):
-    vehicle_id: int
-    tarih: str
-    km: int = Field(..., ge=0)
-    yapilan_islemler: str = Field(..., min_length=1)
-    toplam_maliyet: float = Field(0.0, ge=0)
-    degisen_parcalar: Optional[str] = None
-
-class SettingsUpdate(BaseModel):
-    manual_fuel_price: Optional[float] = Field(None, ge=0)
+# --- HTTP ÖNBELLEK (ETag / koşullu GET) ---
+# Yanıtlar tarayıcıda saklanır ama her kullanımda doğrulanır (no-cache). Veri değişmediyse
+# sunucu sadece değişiklik sayacını okur ve gövdesiz 304 döner (hesap / serileştirme yok).
+CACHE_CONTROL = "private, no-cache"
+
+async def _version_etag(prefix: str, keys: List[int]) -> Optional[str]:
+    """
+    Anahtarların değişiklik sayaçlarından (entity_versions) ETag üretir.
+    Sayacı olmayan (hiç var olmamış) araç varsa None: yanıt koşulsuz üretilir.
+    """
+    versions = await db.get_versions(keys)
+    if any(k > 0 and versions[k] == 0 for k in keys):
+        return None
+    tag = ".".join(str(versions[k]) for k in keys)
+    if len(keys) > 4:
+        # Uzun id listelerinde başlık kısa kalsın
+        tag = hashlib.blake2b(f"{keys}:{tag}".encode(), digest_size=8).hexdigest()
+    return f'"{prefix}-{tag}"'
+
+def _not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """ETag / Cache-Control başlıklarını yazar; If-None-Match eşleşirse 304 yanıtı döner."""
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or
+                          etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+class JSONBytesResponse(Response):
+    """
+    Modelde önceden serileştirilmiş JSON gövdesi (bkz. serialization.rows_to_json);
+    jsonable_encoder / json.dumps adımları atlanır. Doğrudan döndürülen Response'a
+    enjekte edilen response'un başlıkları (ETag) aktarılmaz, headers ile verilir.
+    """
+    media_type = "application/json"
 
 # --- API ENDPOINTS ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Vehicle Master API v2 Çalışıyor 🚀"}
 
 @app.get("/vehicles")
-def get_vehicles():
-    """Tüm araçları listeler."""
-    return manager.get_all_vehicles()
+async def get_vehicles(
+    request: Request,
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Araçları listeler.
+    Parametresiz çağrı tüm araçları tek dizi olarak döndürür (geriye uyumlu).
+    - after_id / limit: keyset sayfalama; yanıt {items, next_after_id} olur
+    - fields: virgülle ayrılmış alan listesi (örn. fields=marka,model,guncel_km); id her zaman döner
+    - format=ndjson: satır başına bir araç, liste belleğe alınmadan akış (streaming) olarak gönderilir
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    not_modified = _not_modified(request, response, await _version_etag("vl", [FLEET_VERSION_KEY]))
+    if not_modified:
+        return not_modified
+
+    try:
+        if format == "ndjson":
+            rows = db.iter_vehicles(after_id=after_id, limit=limit, fields=field_list)
+            return StreamingResponse(
+                (json.dumps(row, ensure_ascii=False) + "\n" async for row in rows),
+                media_type="application/x-ndjson",
+                headers=dict(response.headers)
+            )
+
+        if limit is None and after_id is None:
+            body = await db.get_all_vehicles_json(fields=field_list)
+            return JSONBytesResponse(body, headers=dict(response.headers))
+
+        page_size = limit or 100
+        items = await db.get_vehicles_page(after_id=after_id, limit=page_size, fields=field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "items": items,
+        "next_after_id": items[-1]["id"] if len(items) == page_size else None
+    }
 
 @app.get("/vehicles/{vehicle_id}")
-def get_vehicle_detail(vehicle_id: int):
+async def get_vehicle_detail(vehicle_id: int, request: Request, response: Response):
     """Araç detaylarını getirir."""
-    v = manager.get_vehicle_by_id(vehicle_id)
+    not_modified = _not_modified(request, response, await _version_etag(f"v{vehicle_id}", [vehicle_id]))
+    if not_modified:
+        return not_modified
+    v = await db.get_vehicle_by_id(vehicle_id)
     if not v:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
     return v
 
 @app.post("/vehicles", status_code=201)
-def create_vehicle(vehicle: VehicleCreate):
+async def create_vehicle(vehicle: VehicleCreate):
     """Yeni araç oluşturur."""
     data = vehicle.dict()
-    vehicle_id = manager.add_vehicle(data)
+    vehicle_id = await db.add_vehicle(data)
     
     if vehicle_id == -1:
         raise HTTPException(status_code=500, detail="Veritabanı hatası.")
@@ -140,24 +222,26 @@ def create_vehicle(vehicle: VehicleCreate):
     return {"id": vehicle_id, "message": "Araç eklendi."}
 
 @app.put("/vehicles/{vehicle_id}")
-def update_vehicle(vehicle_id: int, vehicle: VehicleUpdate):
+async def update_vehicle(vehicle_id: int, vehicle: VehicleUpdate):
     """Araç bilgilerini günceller."""
-    if not manager.get_vehicle_by_id(vehicle_id):
+    found = await db.run_for_vehicle(vehicle_id, manager.update_vehicle, vehicle_id, vehicle.dict())
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
         
-    success = manager.update_vehicle(vehicle_id, vehicle.dict())
+    _, success = found
     if not success:
         raise HTTPException(status_code=500, detail="Güncelleme başarısız.")
         
     return {"message": "Araç güncellendi."}
 
 @app.delete("/vehicles/{vehicle_id}")
-def delete_vehicle(vehicle_id: int):
+async def delete_vehicle(vehicle_id: int):
     """Aracı siler."""
-    if not manager.get_vehicle_by_id(vehicle_id):
+    found = await db.run_for_vehicle(vehicle_id, manager.delete_vehicle, vehicle_id)
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
         
-    success = manager.delete_vehicle(vehicle_id)
+    _, success = found
     if not success:
         raise HTTPException(status_code=500, detail="Silme işlemi başarısız.")
         
@@ -166,33 +250,39 @@ def delete_vehicle(vehicle_id: int):
 # --- COMPONENTS ---
 
 @app.get("/vehicles/{vehicle_id}/consumables")
-def get_components(vehicle_id: int):
-    return manager.get_vehicle_consumables(vehicle_id)
+async def get_components(vehicle_id: int, request: Request, response: Response):
+    not_modified = _not_modified(request, response, await _version_etag(f"p{vehicle_id}", [vehicle_id]))
+    if not_modified:
+        return not_modified
+    body = await db.get_vehicle_consumables_json(vehicle_id)
+    return JSONBytesResponse(body, headers=dict(response.headers))
 
 @app.post("/vehicles/{vehicle_id}/consumables")
-def add_component(vehicle_id: int, comp: ComponentCreate):
+async def add_component(vehicle_id: int, comp: ComponentCreate):
     # URL'deki ID ile body'deki ID uyuşsun veya override edelim
     if comp.vehicle_id != vehicle_id:
         comp.vehicle_id = vehicle_id
-    manager.add_consumable_with_km(comp.vehicle_id, comp.parca_adi, comp.maliyet, comp.omur_km, comp.degisim_km or 0)
+    await db.add_consumable_with_km(comp.vehicle_id, comp.parca_adi, comp.maliyet, comp.omur_km, comp.degisim_km or 0)
     return {"message": "Parça eklendi."}
 
 # --- SERVICE LOGS (SERVİS DEFTERİ) ---
 
 @app.get("/vehicles/{vehicle_id}/service-logs")
-def get_service_logs(vehicle_id: int):
+async def get_service_logs(vehicle_id: int, request: Request, response: Response):
     """Araca ait servis kayıtlarını getirir."""
-    if not manager.get_vehicle_by_id(vehicle_id):
+    not_modified = _not_modified(request, response, await _version_etag(f"sl{vehicle_id}", [vehicle_id]))
+    if not_modified:
+        return not_modified
+    found = await db.run_for_vehicle(vehicle_id, manager.get_service_logs_json, vehicle_id)
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-    return manager.get_service_logs(vehicle_id)
+    return JSONBytesResponse(found[1], headers=dict(response.headers))
 
 @app.post("/vehicles/{vehicle_id}/service-logs", status_code=201)
-def add_service_log(vehicle_id: int, log: ServiceLogCreate):
+async def add_service_log(vehicle_id: int, log: ServiceLogCreate):
     """Yeni servis kaydı ekler."""
-    if not manager.get_vehicle_by_id(vehicle_id):
-        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-    
-    log_id = manager.add_service_log(
+    found = await db.run_for_vehicle(
+        vehicle_id, manager.add_service_log,
         vehicle_id=vehicle_id,
         tarih=log.tarih,
         km=log.km,
@@ -200,16 +290,72 @@ def add_service_log(vehicle_id: int, log: ServiceLogCreate):
         toplam_maliyet=log.toplam_maliyet,
         degisen_parcalar=log.degisen_parcalar
     )
+    if found is None:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
     
+    _, log_id = found
     if log_id == -1:
         raise HTTPException(status_code=500, detail="Servis kaydı eklenemedi.")
     
     return {"id": log_id, "message": "Servis kaydı eklendi."}
 
+@app.get("/vehicles/{vehicle_id}/part-replacements")
+async def get_part_replacements(vehicle_id: int, request: Request, response: Response, parca: Optional[str] = None):
+    """
+    Servis kayıtlarındaki değişen parçalar (parça, km sırasıyla). lifetime_km / lifetime_days:
+    aynı parçanın önceki değişiminden bu yana. parca: tek parça (Türkçe karakter duyarsız).
+    """
+    not_modified = _not_modified(request, response, await _version_etag(f"pr{vehicle_id}", [vehicle_id]))
+    if not_modified:
+        return not_modified
+    found = await db.run_for_vehicle(vehicle_id, manager.get_vehicle_part_replacements, vehicle_id, parca)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
+    return found[1]
+
+@app.get("/service-logs/search")
+async def search_service_logs(
+    q: str = Query(..., min_length=1, max_length=200),
+    ids: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Servis kayıtlarında tam metin arama (yapılan işlemler / değişen parçalar), en iyi eşleşme önce.
+    Kelimelerin hepsi aranır; büyük/küçük harf ve Türkçe karakter duyarsız. "zincir*" ön ek araması yapar.
+    ids: araç filtresi; start / end: servis tarihi aralığı.
+    truncated: araç filtresiz çok yaygın bir terimde sadece en yeni SEARCH_CANDIDATES eşleşme
+    sıralandı; sayfalama bu sınırda biter, daha eski kayıtlar için ids / tarih aralığı daraltılmalı.
+    """
+    vehicle_ids = _parse_ids(ids)
+    start, end = _parse_range(start, end)
+    try:
+        result = await db.search_service_logs(q, vehicle_ids, start and start[:10], end and end[:10],
+                                              limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.OperationalError as e:
+        # Kilit / meşgul zaman aşımı geçicidir; diğer veritabanı hataları 500 olarak kalır
+        if "locked" not in str(e):
+            raise
+        raise HTTPException(status_code=503, detail="Veritabanı meşgul, arama daha sonra tekrar denenmeli.",
+                            headers={"Retry-After": "1"})
+    if result is None:
+        raise HTTPException(status_code=503, detail="Arama indeksi kullanılamıyor (python manage.py rebuild-search).")
+    items, truncated = result["items"], result["truncated"]
+    has_more = len(items) == limit and not (truncated and offset + limit >= SEARCH_CANDIDATES)
+    return {
+        "items": items,
+        "next_offset": offset + limit if has_more else None,
+        "truncated": truncated
+    }
+
 @app.delete("/service-logs/{log_id}")
-def delete_service_log(log_id: int):
+async def delete_service_log(log_id: int):
     """Servis kaydını siler."""
-    success = manager.delete_service_log(log_id)
+    success = await db.delete_service_log(log_id)
     if not success:
         raise HTTPException(status_code=500, detail="Servis kaydı silinemedi.")
     return {"message": "Servis kaydı silindi."}
@@ -217,66 +363,229 @@ def delete_service_log(log_id: int):
 # --- MAINTENANCE STATUS (BAKIM DURUMU) ---
 
 @app.get("/vehicles/{vehicle_id}/maintenance-status")
-def get_maintenance_status(vehicle_id: int):
+async def get_maintenance_status(vehicle_id: int):
     """Bakım durumu bilgilerini getirir."""
-    if not manager.get_vehicle_by_id(vehicle_id):
+    found = await db.run_for_vehicle(vehicle_id, manager.get_maintenance_status, vehicle_id)
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-    return manager.get_maintenance_status(vehicle_id)
+    return found[1]
 
 # --- CRITICAL WARNINGS (KRİTİK UYARILAR) ---
 
 @app.get("/vehicles/{vehicle_id}/warnings")
-def get_critical_warnings(vehicle_id: int, threshold: int = 500):
+async def get_critical_warnings(vehicle_id: int, threshold: int = 500):
     """Kritik parça ve bakım uyarılarını getirir."""
-    if not manager.get_vehicle_by_id(vehicle_id):
+    found = await db.run_for_vehicle(vehicle_id, manager.get_critical_warnings, vehicle_id, threshold)
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-    return manager.get_critical_warnings(vehicle_id, threshold)
+    return found[1]
+
+@app.get("/warnings")
+async def get_fleet_warnings(
+    threshold: int = 500,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    include_maintenance: bool = True,
+    ids: Optional[str] = None
+):
+    """
+    Filo genelindeki kritik uyarılar, kalan km'ye göre artan sırada.
+    - after: önceki yanıttaki next_after değeri (keyset sayfalama)
+    - include_maintenance=false: sadece parça uyarıları
+    - ids: virgülle ayrılmış araç ID'leri (verilmezse tüm filo)
+    """
+    after_key = None
+    if after:
+        try:
+            kalan, vehicle_id, parca_id = (int(p) for p in after.split(","))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="after parametresi 'kalan_km,arac_id,parca_id' biçiminde olmalı.")
+        after_key = (kalan, vehicle_id, parca_id)
+
+    items = await db.get_fleet_warnings(threshold, limit, after_key, include_maintenance, _parse_ids(ids))
+    next_after = None
+    if len(items) == limit:
+        last = items[-1]
+        next_after = f"{last['kalan_omur_km']},{last['vehicle_id']},{last['parca_id'] or 0}"
+    return {"items": items, "next_after": next_after}
 
 # --- COST ANALYSIS ---
 
+async def _parse_as_of(as_of: Optional[str]) -> Optional[str]:
+    """as_of parametresini doğrular; verilen tarihte fiyat kaydı yoksa 404 döner."""
+    if as_of is None:
+        return None
+    try:
+        normalized = normalize_as_of(as_of)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="as_of ISO formatında olmalı (örn. 2024-05-01 veya 2024-05-01T12:00:00).")
+    if not any((await db.get_fuel_prices_as_of(normalized)).values()):
+        raise HTTPException(status_code=404, detail="Bu tarih için yakıt fiyatı kaydı yok.")
+    return normalized
+
+def _parse_range(start: Optional[str], end: Optional[str]):
+    """start / end tarih aralığını doğrular (sadece tarih verilirse günün başı / sonu)."""
+    try:
+        return (normalize_as_of(start, end_of_day=False) if start else None,
+                normalize_as_of(end) if end else None)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start / end ISO formatında olmalı.")
+
 @app.get("/vehicles/{vehicle_id}/analysis")
-def get_analysis(vehicle_id: int):
-    """Detaylı maliyet analizi."""
-    if not manager.get_vehicle_by_id(vehicle_id):
+async def get_analysis(vehicle_id: int, as_of: Optional[str] = None):
+    """Detaylı maliyet analizi. as_of verilirse yakıt o tarihteki fiyattan hesaplanır."""
+    as_of = await _parse_as_of(as_of)
+    found = await db.run_for_vehicle(vehicle_id, manager.calculate_total_km_cost, vehicle_id, as_of=as_of)
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-        
-    return manager.calculate_total_km_cost(vehicle_id)
+
+    return found[1]
+
+# --- MALİYET PROJEKSİYONU ---
+
+@app.get("/vehicles/{vehicle_id}/projection")
+async def get_projection(vehicle_id: int, years: Optional[float] = Query(None, gt=0, le=50)):
+    """
+    Toplam sahip olma maliyeti projeksiyonu: parça değişimleri, bakımlar, yıllık sabit
+    giderler, yakıt ve değer kaybıyla kümülatif maliyet eğrisi.
+    years verilmezse gelecek_km'ye kadar hesaplanır.
+    """
+    try:
+        found = await db.run_for_vehicle(vehicle_id, manager.project_costs, vehicle_id, years)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if found is None:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
+    return found[1]
+
+@app.get("/projections")
+async def get_fleet_projections(ids: Optional[str] = None, years: float = Query(10, gt=0, le=50)):
+    """Filo için N yıllık projeksiyon özetleri (eğri ve toplamlar; olay listesi yok)."""
+    return await db.get_fleet_projections(_parse_ids(ids), years)
+
+# --- KM OKUMALARI (TELEMATİK) ---
+
+@app.post("/odometer/readings", status_code=202)
+async def ingest_odometer_readings(batch: OdometerBatch):
+    """
+    Km okumalarını kabul eder; yazma arka planda, araç başına birleştirilerek yapılır.
+    Aynı araç için eski (zamanı geride) veya km'si geriye giden okumalar atılır.
+    """
+    if len(batch.readings) > ODOMETER_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Tek istekte en fazla {ODOMETER_MAX_BATCH} okuma gönderilebilir.")
+    return odometer_ingestor.submit([(r.vehicle_id, r.km, r.ts) for r in batch.readings])
+
+@app.post("/odometer/flush")
+async def flush_odometer_readings():
+    """Bekleyen okumaları hemen yazar."""
+    return await asyncio.to_thread(odometer_ingestor.flush)
+
+@app.get("/odometer/status")
+async def get_odometer_status():
+    return odometer_ingestor.status()
+
+@app.get("/vehicles/{vehicle_id}/odometer")
+async def get_odometer_history(vehicle_id: int, start: Optional[str] = None, end: Optional[str] = None):
+    """Aracın saatlik km geçmişi."""
+    try:
+        start = normalize_reading_ts(start) if start else None
+        end = normalize_reading_ts(end) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start / end ISO formatında olmalı.")
+    found = await db.run_for_vehicle(vehicle_id, manager.get_odometer_history, vehicle_id, start, end)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
+    return found[1]
+
+# --- FİLO ANALİTİĞİ ---
+
+def _parse_group_by(group_by: Optional[str]) -> Optional[List[str]]:
+    return [g.strip() for g in group_by.split(",") if g.strip()] if group_by else None
+
+@app.get("/analytics/costs")
+async def get_cost_analytics(group_by: Optional[str] = None):
+    """
+    Km maliyeti istatistikleri. group_by: marka, model, yil, yakit_tipi (virgülle birleştirilebilir,
+    örn. ?group_by=marka,yakit_tipi). Verilmezse filo geneli tek satır döner.
+    """
+    try:
+        return await db.get_cost_analytics(_parse_group_by(group_by))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/cost-percentiles")
+async def get_cost_percentiles(group_by: Optional[str] = None, p: str = "50,90,95,99"):
+    """Km maliyeti yüzdelikleri (nearest-rank), isteğe bağlı gruplu. p: virgülle ayrılmış yüzdelikler."""
+    try:
+        percentiles = [float(x) for x in p.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="p parametresi virgülle ayrılmış sayılardan oluşmalı.")
+    try:
+        return await db.get_cost_percentiles(percentiles, _parse_group_by(group_by))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/service-spend")
+async def get_service_spend(start: Optional[str] = None, end: Optional[str] = None, ids: Optional[str] = None):
+    """Ay bazında servis harcaması (kayıt sayısı, toplam, ortalama). start / end: 'YYYY-AA' (dahil)."""
+    try:
+        return await db.get_monthly_service_spend(start, end, _parse_ids(ids))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/parts")
+async def get_part_replacement_stats(parca: Optional[str] = None, ids: Optional[str] = None):
+    """
+    Parça bazında değişim sayısı ve servis kayıtlarından gözlenen ortalama ömür (km / gün),
+    parçalarda tanımlı ömürle (configured_omur_km) birlikte. parca: tek parça; ids: araç filtresi.
+    """
+    return await db.get_part_replacement_stats(parca, _parse_ids(ids))
+
+# --- YAKIT FİYATI GEÇMİŞİ ---
+
+@app.get("/fuel-prices/history")
+async def get_fuel_price_history(start: Optional[str] = None, end: Optional[str] = None):
+    """Tarih aralığındaki yakıt fiyatı değişimleri."""
+    return await db.get_fuel_price_history(*_parse_range(start, end))
+
+# --- METRICS ---
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metin formatında ölçümler (gecikmeler, sorgu süreleri, önbellek oranları)."""
+    if not metrics.is_enabled():
+        raise HTTPException(status_code=404, detail="Ölçüm katmanı kapalı (METRICS_ENABLED=0).")
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 # --- SETTINGS ---
 
-@app.get("/settings")
-def get_settings():
-    benzin = manager.get_setting('current_benzin_price')
-    motorin = manager.get_setting('current_motorin_price')
-    manual = manager.get_setting('manual_fuel_price')
+def _settings_snapshot() -> Dict:
+    """Ayarları tek executor çağrısında okur (önbellek boşsa tek sorgu)."""
     return {
-        "live_benzin": benzin,
-        "live_motorin": motorin,
-        "manual_fuel_price": manual
+        "live_benzin": manager.get_setting('current_benzin_price'),
+        "live_motorin": manager.get_setting('current_motorin_price'),
+        "manual_fuel_price": manager.get_setting('manual_fuel_price'),
+        "last_fuel_price_update": manager.get_setting('last_fuel_price_update'),
+        "settings_cache": manager.settings_cache_stats()
     }
 
+@app.get("/settings")
+async def get_settings():
+    settings = await db.run(_settings_snapshot)
+    settings["fuel_price_refresh"] = fuel_refresher.status()
+    return settings
+
 @app.post("/settings")
-def update_settings(settings: SettingsUpdate):
+async def update_settings(settings: SettingsUpdate):
     if settings.manual_fuel_price is not None:
-        cursor = manager.conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ('manual_fuel_price', str(settings.manual_fuel_price)))
-        manager.conn.commit()
+        if not await db.set_setting('manual_fuel_price', str(settings.manual_fuel_price)):
+            raise HTTPException(status_code=500, detail="Ayarlar kaydedilemedi.")
     return {"message": "Ayarlar güncellendi."}
 
 # --- FRONTEND UYUMLULUK ENDPOINTLERİ ---
 
-@app.get("/costs/{vehicle_id}")
-def get_costs(vehicle_id: int):
-    """VehicleCard için maliyet analizi endpoint'i."""
-    if not manager.get_vehicle_by_id(vehicle_id):
-        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-    
-    result = manager.calculate_total_km_cost(vehicle_id)
-    vehicle = manager.get_vehicle_by_id(vehicle_id)
-    maint_status = manager.get_maintenance_status(vehicle_id)
-    warnings = manager.get_critical_warnings(vehicle_id)
-    
-    # Frontend'in beklediği format
+def _build_cost_report(result: Dict, vehicle: Dict, maint_status: Dict, warnings: List[Dict]) -> Dict:
+    """Maliyet sonucunu VehicleCard'ın beklediği formata dönüştürür."""
     return {
         "vehicle_id": result.get("vehicle_id"),
         "total_cost_per_km": result.get("total_cost_per_km", 0),
@@ -296,61 +605,165 @@ def get_costs(vehicle_id: int):
         "warnings": warnings
     }
 
+def _parse_ids(ids: Optional[str]) -> Optional[List[int]]:
+    if not ids:
+        return None
+    try:
+        return [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids parametresi virgülle ayrılmış sayılardan oluşmalı.")
+
+@app.get("/costs")
+async def get_fleet_costs(request: Request, response: Response, ids: Optional[str] = None):
+    """
+    Birden fazla araç için maliyet analizi (dashboard tek istekte yüklenir).
+    ids: virgülle ayrılmış araç ID'leri (örn. ?ids=1,2,3). Verilmezse tüm filo döner.
+    """
+    vehicle_ids = _parse_ids(ids)
+    keys = (vehicle_ids if vehicle_ids is not None else [FLEET_VERSION_KEY]) + [SETTINGS_VERSION_KEY]
+    not_modified = _not_modified(request, response, await _version_etag("cl", keys))
+    if not_modified:
+        return not_modified
+
+    return [
+        _build_cost_report(item["cost"], item["vehicle"], item["maintenance_status"], item["warnings"])
+        for item in await db.get_fleet_costs(vehicle_ids)
+    ]
+
+@app.get("/costs/history")
+async def get_cost_history(ids: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None):
+    """
+    Km başı maliyet eğrisi: başlangıçta ve aralıktaki her yakıt fiyatı değişiminde bir nokta.
+    ids verilmezse tüm filo döner.
+    """
+    return await db.get_cost_history(_parse_ids(ids), *_parse_range(start, end))
+
+@app.get("/costs/summary")
+async def get_cost_summary(ids: Optional[str] = None):
+    """
+    Önceden hesaplanmış maliyet özeti (vehicle_cost_summary): araç başına tek satır okunur.
+    ids verilmezse tüm filo ve filo ortalamaları döner.
+    """
+    vehicle_ids = _parse_ids(ids)
+    items, totals = await db.run(lambda: (
+        manager.get_cost_summaries(vehicle_ids),
+        manager.get_cost_summary_totals() if vehicle_ids is None else None
+    ))
+    return {"items": items, "totals": totals}
+
+@app.get("/costs/{vehicle_id}")
+async def get_costs(vehicle_id: int, request: Request, response: Response, as_of: Optional[str] = None):
+    """VehicleCard için maliyet analizi endpoint'i. as_of: geçmiş tarihli yakıt fiyatı."""
+    as_of = await _parse_as_of(as_of)
+    if as_of is None:
+        # Geçmiş tarihli sorgular fiyat geçmişine bağlı; ETag sadece güncel maliyet için
+        etag = await _version_etag(f"c{vehicle_id}", [vehicle_id, SETTINGS_VERSION_KEY])
+        not_modified = _not_modified(request, response, etag)
+        if not_modified:
+            return not_modified
+    # Araç ve üç hesap tek executor çağrısında (çoğunlukla önbellekten) yapılır
+    found = await db.run_for_vehicle(vehicle_id, lambda: (
+        manager.calculate_total_km_cost(vehicle_id, as_of=as_of),
+        manager.get_maintenance_status(vehicle_id),
+        manager.get_critical_warnings(vehicle_id)
+    ))
+    if found is None:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı.")
+    vehicle, (result, maint_status, warnings) = found
+    
+    # Frontend'in beklediği format
+    return _build_cost_report(result, vehicle, maint_status, warnings)
+
 @app.post("/components")
-def add_component_direct(comp: ComponentCreate):
+async def add_component_direct(comp: ComponentCreate):
     """AddComponentForm için parça ekleme endpoint'i."""
-    if not manager.get_vehicle_by_id(comp.vehicle_id):
+    found = await db.run_for_vehicle(
+        comp.vehicle_id, manager.add_consumable_with_km,
+        comp.vehicle_id, comp.parca_adi, comp.maliyet, comp.omur_km, comp.degisim_km or 0
+    )
+    if found is None:
         raise HTTPException(status_code=404, detail="Araç bulunamadı.")
-    manager.add_consumable_with_km(comp.vehicle_id, comp.parca_adi, comp.maliyet, comp.omur_km, comp.degisim_km or 0)
     return {"message": "Parça eklendi."}
 
 
-class ComponentUpdate(BaseModel):
-    parca_adi: Optional[str] = None
-    maliyet: Optional[float] = None
-    omur_km: Optional[int] = None
-    degisim_km: Optional[int] = None
-
 @app.put("/consumables/{consumable_id}")
-def update_consumable(consumable_id: int, comp: ComponentUpdate):
+async def update_consumable(consumable_id: int, comp: ComponentUpdate):
     """Parça bilgilerini günceller."""
-    success = manager.update_consumable(consumable_id, comp.dict(exclude_none=True))
+    success = await db.update_consumable(consumable_id, comp.dict(exclude_none=True))
     if not success:
         raise HTTPException(status_code=500, detail="Parça güncellenemedi.")
     return {"message": "Parça güncellendi."}
 
 @app.delete("/consumables/{consumable_id}")
-def delete_consumable(consumable_id: int):
+async def delete_consumable(consumable_id: int):
     """Parçayı siler."""
-    success = manager.delete_consumable(consumable_id)
+    success = await db.delete_consumable(consumable_id)
     if not success:
         raise HTTPException(status_code=500, detail="Parça silinemedi.")
     return {"message": "Parça silindi."}
 
 
+# --- TOPLU İÇE AKTARMA (BULK IMPORT) ---
+
+@app.post("/bulk/import")
+async def bulk_import_data(
+    kind: str = Query(..., pattern="^(vehicles|consumables|service_logs)$"),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    file: UploadFile = File(...)
+):
+    """
+    CSV veya NDJSON dosyasından toplu araç / parça / servis kaydı aktarır.
+    Format verilmezse dosya uzantısından belirlenir (.ndjson/.jsonl -> ndjson, diğerleri csv).
+    Hatalı satırlar atlanır ve yanıtta satır numarasıyla raporlanır.
+    """
+    fmt = format or detect_format(file.filename or "")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        # Dosya okuma ve yazma işlemleri DB executor'ında (event loop bloklanmaz)
+        return await db.run(import_file, manager, kind, stream, fmt)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Dosya UTF-8 kodlamalı olmalı.")
+    finally:
+        stream.detach()
+
 # --- DOSYA YÜKLEME ---
 
 @app.post("/upload")
 async def upload_image(file: UploadFile = File(...)):
-    """Fotoğraf yükler ve URL döndürür."""
-    # Sadece resim dosyalarına izin ver
-    allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Sadece resim dosyaları yüklenebilir (JPEG, PNG, GIF, WebP).")
-    
-    # Benzersiz dosya adı oluştur
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    unique_filename = f"{uuid.uuid4()}.{ext}"
-    file_path = os.path.join(UPLOADS_DIR, unique_filename)
-    
-    # Dosyayı kaydet
+    """
+    Fotoğraf yükler ve URL döndürür.
+    Dosya thread'de parça parça diske yazılır (boyut sınırı: UPLOAD_MAX_MB), türü
+    ilk baytlardan belirlenir. Kart ve pencere boyutlarında WebP küçük resimler üretilir.
+    """
+    # Boyut biliniyorsa kopyalamaya başlamadan reddet
+    if file.size is not None and file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Dosya çok büyük (en fazla {UPLOAD_MAX_BYTES // (1024 * 1024)} MB).")
+
     try:
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
-    except Exception as e:
+        unique_filename = await asyncio.to_thread(save_upload, file.file, UPLOADS_DIR, UPLOAD_MAX_BYTES)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except OSError as e:
         raise HTTPException(status_code=500, detail=f"Dosya kaydedilemedi: {str(e)}")
-    
+    finally:
+        await file.close()
+
+    thumbnails = {}
+    if thumbnail_worker.enabled:
+        loop = asyncio.get_running_loop()
+        try:
+            thumbnails = await loop.run_in_executor(
+                thumbnail_worker.executor(), generate_thumbnails, os.path.join(UPLOADS_DIR, unique_filename)
+            )
+        except Exception as e:
+            # İmzası doğru ama açılamayan (bozuk) dosya
+            await asyncio.to_thread(remove_upload, UPLOADS_DIR, unique_filename)
+            print(f"❌ Küçük resim üretilemedi ({unique_filename}): {e}")
+            raise HTTPException(status_code=400, detail="Resim dosyası bozuk veya okunamıyor.")
+
     # URL döndür
-    return {"url": f"http://127.0.0.1:8000/uploads/{unique_filename}"}
+    return {
+        "url": f"http://127.0.0.1:8000/uploads/{unique_filename}",
+        "thumbnails": {size: f"http://127.0.0.1:8000/uploads/{name}" for size, name in thumbnails.items()}
+    }
 
@@ -0,0 +1,44 @@
+"""
+Bakım Komutları
+Tetikleyicilerle güncel tutulan türetilmiş tabloları baştan oluşturur (ilk kurulum,
+sonradan etkinleşen SQLite özellikleri veya tutarlılık onarımı için).
+
+Kullanım:
+    python manage.py rebuild-search
+    python manage.py rebuild-cost-summary --db vehicle_master.db
+"""
+
+import argparse
+import time
+
+# Komut -> (VehicleManager metodu, açıklama)
+COMMANDS = {
+    "rebuild-search": ("rebuild_service_log_search", "Servis kaydı arama indeksi (FTS5)"),
+    "rebuild-cost-summary": ("rebuild_cost_summary", "Araç maliyet özeti tablosu"),
+    "rebuild-parts": ("rebuild_service_log_parts", "Değişen parçalar tablosu ve özeti"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Türetilmiş tabloları yeniden oluşturma komutları")
+    parser.add_argument("command", choices=list(COMMANDS))
+    parser.add_argument("--db", default="vehicle_master.db")
+    args = parser.parse_args()
+
+    from models import VehicleManager
+    manager = VehicleManager(args.db)
+    method, description = COMMANDS[args.command]
+
+    started = time.perf_counter()
+    success = getattr(manager, method)()
+    manager.close()
+
+    if success:
+        print(f"✅ {description} yeniden oluşturuldu ({time.perf_counter() - started:.1f} sn)")
+    else:
+        print(f"❌ {description} yeniden oluşturulamadı")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Ölçüm (Metrics) Katmanı
+Sayaç (Counter) ve histogram tutar, /metrics için Prometheus metin formatında
+(text exposition 0.0.4) çıktı üretir. Dış bağımlılık yoktur.
+
+Ölçülenler:
+- HTTP endpoint gecikmeleri (MetricsMiddleware, route şablonu bazında)
+- VehicleManager SQL sorguları (TimedConnection; sorguyu çalıştıran metod bazında)
+- Sıcak metodlar (@timed: calculate_total_km_cost, get_fleet_costs, ...)
+- Yakıt fiyatı çekme süresi ve hata sayısı (@track_scrape)
+- Önbellek isabet oranları (scrape anında okunan geri çağırımlar)
+
+Kayıt maliyeti düşük tutulur (perf_counter + kilit altında birkaç toplama);
+set_enabled(False) ile tamamen devre dışı bırakılabilir.
+"""
+
+import asyncio
+import functools
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Gecikme histogramları için saniye cinsinden üst sınırlar
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+_enabled = True
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Sadece artan sayaç; etiket değerleri sırasıyla verilir: inc("GET", "/vehicles")."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Sabit kovalı (bucket) histogram. Her gözlem tek bir kovaya yazılır; kümülatif
+    toplamlar sadece render sırasında hesaplanır (kayıt yolu ucuz kalır).
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> [kova sayıları..., +Inf sayısı, toplam]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        if not _enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrikleri ve scrape anında okunan değer geri çağırımlarını (gauge / counter) tutar."""
+
+    def __init__(self):
+        self._metrics: List = []
+        # (ad, açıklama, tür, etiketler, read)
+        self._callbacks: List[Tuple[str, str, str, Tuple[str, ...],
+                                    Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]]] = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def _callback(self, name: str, help_text: str, kind: str, labels: Tuple[str, ...],
+                  read: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        self._callbacks = [c for c in self._callbacks if c[0] != name]
+        self._callbacks.append((name, help_text, kind, labels, read))
+
+    def gauge_callback(self, name: str, help_text: str, labels: Tuple[str, ...],
+                       read: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        """read() -> [(etiket değerleri, değer), ...]; her scrape'te çağrılır."""
+        self._callback(name, help_text, "gauge", labels, read)
+
+    def counter_callback(self, name: str, help_text: str, labels: Tuple[str, ...],
+                         read: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        """
+        Başka bir yerde tutulan, sadece artan sayaçlar (gauge_callback gibi okunur).
+        Süreç yeniden başlayınca sıfırlanması Prometheus'ta counter olarak doğru ele alınır.
+        """
+        self._callback(name, help_text, "counter", labels, read)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, kind, labels, read in self._callbacks:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for label_values, value in read():
+                lines.append(f"{name}{_format_labels(labels, label_values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP istek sayısı", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP istek süresi", ("method", "route"))
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL sorgu süresi (execute; sorguyu çalıştıran metod bazında)",
+    ("caller",), QUERY_BUCKETS)
+DB_FETCH_LATENCY = REGISTRY.histogram(
+    "db_fetch_duration_seconds", "Sorgu sonuçlarının okunma süresi (fetchall)", ("caller",), QUERY_BUCKETS)
+DB_QUERY_ERRORS = REGISTRY.counter(
+    "db_query_errors_total", "Hata veren SQL sorguları", ("caller",))
+CALL_LATENCY = REGISTRY.histogram(
+    "vehicle_manager_call_duration_seconds", "VehicleManager metod süresi (önbellek dahil)", ("method",))
+SCRAPE_LATENCY = REGISTRY.histogram(
+    "fuel_price_scrape_duration_seconds", "Yakıt fiyatı çekme süresi", ("source",))
+SCRAPE_FAILURES = REGISTRY.counter(
+    "fuel_price_scrape_failures_total", "Başarısız yakıt fiyatı çekme denemeleri", ("source",))
+
+
+# --- SQL SORGU ÖLÇÜMÜ ---
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    execute / executemany / fetchall sürelerini, çağıran metodun adıyla kaydeder.
+    SQLite execute sırasında sadece ilk satıra kadar çalışır; kalan satırlar fetchall
+    süresine yansır.
+    """
+
+    def execute(self, sql, parameters=()):
+        if not _enabled:
+            return super().execute(sql, parameters)
+        caller = sys._getframe(1).f_code.co_name
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.Error:
+            DB_QUERY_ERRORS.inc(caller)
+            raise
+        finally:
+            DB_QUERY_LATENCY.observe(time.perf_counter() - start, caller)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _enabled:
+            return super().executemany(sql, seq_of_parameters)
+        caller = sys._getframe(1).f_code.co_name
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error:
+            DB_QUERY_ERRORS.inc(caller)
+            raise
+        finally:
+            DB_QUERY_LATENCY.observe(time.perf_counter() - start, caller)
+
+    def fetchall(self):
+        if not _enabled:
+            return super().fetchall()
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            DB_FETCH_LATENCY.observe(time.perf_counter() - start, sys._getframe(1).f_code.co_name)
+
+
+class TimedConnection(sqlite3.Connection):
+    """cursor() varsayılan olarak TimedCursor döndürür (sqlite3.connect(factory=...))."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+
+# --- METOD VE SCRAPE ÖLÇÜMÜ ---
+
+def timed(func: Callable) -> Callable:
+    """Metodun süresini vehicle_manager_call_duration_seconds'a kaydeder."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            CALL_LATENCY.observe(time.perf_counter() - start, name)
+    return wrapper
+
+
+def track_scrape(source: str) -> Callable:
+    """
+    Fiyat çekme fonksiyonlarını (senkron veya async) ölçer.
+    None dönüşü veya istisna başarısız deneme sayılır.
+    """
+    def decorator(func: Callable) -> Callable:
+        def record(start: float, result) -> None:
+            SCRAPE_LATENCY.observe(time.perf_counter() - start, source)
+            if result is None:
+                SCRAPE_FAILURES.inc(source)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start, result = time.perf_counter(), None
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    record(start, result)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start, result = time.perf_counter(), None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                record(start, result)
+        return wrapper
+    return decorator
+
+
+# --- ÖNBELLEK ORANLARI ---
+
+def register_cache_stats(read: Callable[[], Dict[str, Tuple[int, int]]]):
+    """
+    read() -> {önbellek adı: (isabet, ıska)}. İsabet/ıska sayıları ve isabet oranı
+    scrape anında okunur; kayıt yolunda ek iş yapılmaz.
+    """
+    def counts(index: int):
+        return [((name,), stats[index]) for name, stats in read().items()]
+
+    def ratios():
+        return [((name,), hits / (hits + misses) if hits + misses else 0.0)
+                for name, (hits, misses) in read().items()]
+
+    REGISTRY.counter_callback("cache_hits_total", "Önbellek isabet sayısı", ("cache",), lambda: counts(0))
+    REGISTRY.counter_callback("cache_misses_total", "Önbellek ıska sayısı", ("cache",), lambda: counts(1))
+    REGISTRY.gauge_callback("cache_hit_ratio", "Önbellek isabet oranı", ("cache",), ratios)
+
+
+# --- HTTP ---
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware: istek süresini route şablonuyla (/vehicles/{vehicle_id})
+    kaydeder; ham yol kullanılmadığı için etiket sayısı sınırlı kalır.
+    Eşleşmeyen yollar "<unmatched>" olarak toplanır.
+    """
+
+    def __init__(self, app, exclude_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _enabled or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, route_path)
+            HTTP_REQUESTS.inc(method, route_path, str(status))
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
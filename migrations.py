@@ -0,0 +1,785 @@
+"""
+Veritabanı Şema Migration Sistemi
+Şema değişiklikleri sıralı, numaralı adımlar olarak tanımlanır. Uygulanan son
+sürüm SQLite'ın `PRAGMA user_version` alanında tutulur; her açılışta sadece
+henüz uygulanmamış adımlar çalışır. Her adım kendi transaction'ı içinde çalışır:
+ya tamamen uygulanır ya da hiç uygulanmaz.
+
+Yeni bir şema değişikliği için MIGRATIONS listesinin sonuna yeni bir adım ekleyin;
+mevcut adımları asla değiştirmeyin (uygulanmış veritabanlarında tekrar çalışmazlar).
+"""
+
+import functools
+import json
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+def _existing_columns(cursor: sqlite3.Cursor, table: str) -> set:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _existing_columns_with_generated(cursor: sqlite3.Cursor, table: str) -> set:
+    # table_info üretilmiş (generated) sütunları listelemez, table_xinfo listeler
+    cursor.execute(f"PRAGMA table_xinfo({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: List[Tuple[str, str]]):
+    """Tabloda olmayan sütunları ekler (sürümsüz eski veritabanlarını yakalamak için)."""
+    existing = _existing_columns(cursor, table)
+    for col_name, col_type in columns:
+        if col_name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+
+
+def _m001_base_schema(cursor: sqlite3.Cursor):
+    """Temel şema: araçlar, parçalar, servis kayıtları ve ayarlar."""
+    # 1. Vehicle tablosu
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            marka TEXT NOT NULL,
+            model TEXT NOT NULL,
+            yil INTEGER,
+            fotograf_url TEXT,
+
+            -- Kilometre Bilgileri
+            baslangic_km INTEGER DEFAULT 0,
+            guncel_km INTEGER DEFAULT 0,
+
+            -- Yakıt ve Tüketim
+            yakit_tipi TEXT DEFAULT 'benzin',
+            ortalama_tuketim_l_100km REAL DEFAULT 0,
+
+            -- Bakım (Maintenance)
+            periyodik_bakim_km INTEGER DEFAULT 10000,
+            periyodik_bakim_maliyeti REAL DEFAULT 0,
+
+            -- Servis Takibi
+            son_bakim_km INTEGER DEFAULT 0,
+            bakim_araligi INTEGER DEFAULT 2000,
+
+            -- Sabit Giderler (FixedCosts)
+            yillik_sigorta REAL DEFAULT 0,
+            yillik_mtv REAL DEFAULT 0,
+            yillik_ortalama_km INTEGER DEFAULT 15000,
+
+            -- Değer Kaybı (Depreciation Parametreleri)
+            su_anki_fiyat REAL DEFAULT 0,
+            gelecek_fiyat REAL DEFAULT 0,
+            gelecek_km INTEGER DEFAULT 0
+        )
+    """)
+
+    # Sürüm numarası tutulmadan önce oluşturulmuş veritabanlarında eksik olabilecek sütunlar
+    _add_missing_columns(cursor, "vehicles", [
+        ("baslangic_km", "INTEGER DEFAULT 0"),
+        ("guncel_km", "INTEGER DEFAULT 0"),
+        ("yakit_tipi", "TEXT DEFAULT 'benzin'"),
+        ("ortalama_tuketim_l_100km", "REAL DEFAULT 0"),
+        ("periyodik_bakim_km", "INTEGER DEFAULT 10000"),
+        ("periyodik_bakim_maliyeti", "REAL DEFAULT 0"),
+        ("son_bakim_km", "INTEGER DEFAULT 0"),
+        ("bakim_araligi", "INTEGER DEFAULT 2000"),
+        ("yillik_sigorta", "REAL DEFAULT 0"),
+        ("yillik_mtv", "REAL DEFAULT 0"),
+        ("yillik_ortalama_km", "INTEGER DEFAULT 15000"),
+        ("su_anki_fiyat", "REAL DEFAULT 0"),
+        ("gelecek_fiyat", "REAL DEFAULT 0"),
+        ("gelecek_km", "INTEGER DEFAULT 0")
+    ])
+
+    # 2. Consumables (Parçalar/Sarf Malzeme) Tablosu
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS consumables (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vehicle_id INTEGER,
+            parca_adi TEXT,
+            maliyet REAL,
+            omur_km INTEGER,
+            degisim_km INTEGER DEFAULT 0,
+            FOREIGN KEY (vehicle_id) REFERENCES vehicles (id) ON DELETE CASCADE
+        )
+    """)
+    _add_missing_columns(cursor, "consumables", [
+        ("degisim_km", "INTEGER DEFAULT 0"),
+    ])
+
+    # 3. Service Logs (Servis Kayıtları) Tablosu
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS service_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vehicle_id INTEGER,
+            tarih TEXT NOT NULL,
+            km INTEGER NOT NULL,
+            yapilan_islemler TEXT,
+            toplam_maliyet REAL DEFAULT 0,
+            degisen_parcalar TEXT,
+            FOREIGN KEY (vehicle_id) REFERENCES vehicles (id) ON DELETE CASCADE
+        )
+    """)
+
+    # 4. Settings Tablosu (Konfigürasyon ve Fiyatlar)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+def _m002_vehicle_indexes(cursor: sqlite3.Cursor):
+    """vehicle_id ile filtrelenen sorgular için indeksler (tam tablo taraması yerine)."""
+    # get_vehicle_consumables, delete_vehicle (cascade)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_consumables_vehicle ON consumables (vehicle_id)")
+    # get_service_logs: WHERE vehicle_id = ? ORDER BY tarih DESC, km DESC
+    # İndeks sırası sorgu sırasıyla aynı olduğu için ayrıca sıralama (temp b-tree) gerekmez
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_service_logs_vehicle_tarih_km
+        ON service_logs (vehicle_id, tarih DESC, km DESC)
+    """)
+
+
+def _m003_fuel_price_history(cursor: sqlite3.Cursor):
+    """
+    Yakıt fiyatı geçmişi: her fiyat değişimi bir satır olarak saklanır.
+    Birincil anahtar (region, ts, fuel_type) hem "tarihteki fiyat" aramasını hem de
+    tarih aralığı taramasını karşılar; WITHOUT ROWID ile ayrı indeks tutulmaz.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fuel_prices (
+            ts TEXT NOT NULL,            -- ISO zaman damgası (YYYY-MM-DDTHH:MM:SS)
+            fuel_type TEXT NOT NULL,     -- 'benzin' / 'motorin'
+            region TEXT NOT NULL,
+            price REAL NOT NULL,
+            PRIMARY KEY (region, ts, fuel_type)
+        ) WITHOUT ROWID
+    """)
+
+    # Mevcut canlı fiyatlar geçmişin ilk kaydı olur
+    cursor.execute("SELECT key, value FROM settings WHERE key IN "
+                   "('current_benzin_price', 'current_motorin_price', 'last_fuel_price_update')")
+    settings = {row[0]: row[1] for row in cursor.fetchall()}
+    try:
+        ts = datetime.fromisoformat(settings.get('last_fuel_price_update') or '').isoformat(timespec='seconds')
+    except ValueError:
+        # Eski sürümler zaman yerine 'Just Now' yazıyordu
+        ts = datetime.now().isoformat(timespec='seconds')
+    for fuel_type in ('benzin', 'motorin'):
+        try:
+            price = float(settings.get(f'current_{fuel_type}_price') or 0)
+        except ValueError:
+            price = 0
+        if price > 0:
+            cursor.execute(
+                "INSERT OR IGNORE INTO fuel_prices (ts, fuel_type, region, price) VALUES (?, ?, ?, ?)",
+                (ts, fuel_type, 'ISTANBUL (AVRUPA)', price)
+            )
+
+
+def _m004_consumable_end_km(cursor: sqlite3.Cursor):
+    """
+    Parçanın ömrünün bittiği km (degisim_km + omur_km) üretilmiş sütun olarak tutulur.
+    (vehicle_id, bitis_km) indeksi filo uyarı sorgusunda her araç için sadece
+    eşiğin altındaki parçaları okur; tek başına vehicle_id indeksinin yerini de alır.
+    omur_km boşsa uygulamadaki varsayılan (10000) kullanılır.
+    """
+    if "bitis_km" not in _existing_columns_with_generated(cursor, "consumables"):
+        cursor.execute("""
+            ALTER TABLE consumables ADD COLUMN bitis_km INTEGER
+            GENERATED ALWAYS AS (COALESCE(degisim_km, 0) + COALESCE(NULLIF(omur_km, 0), 10000)) VIRTUAL
+        """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_consumables_vehicle_bitis ON consumables (vehicle_id, bitis_km)")
+    cursor.execute("DROP INDEX IF EXISTS idx_consumables_vehicle")
+
+
+def fuel_price_sql(fuel_type_expr: str) -> str:
+    """
+    Yakıt tipine göre kullanılacak litre fiyatı (VehicleManager._resolve_fuel_price ile aynı kural):
+    manuel fiyat varsa o, yoksa tipe göre canlı fiyat, o da yoksa 45.0.
+    Alt sorgular ilişkisiz (uncorrelated) olduğu için toplu UPDATE'te bir kez çalışır.
+    """
+    def setting(key: str) -> str:
+        return f"(SELECT CAST(value AS REAL) FROM settings WHERE key = '{key}' AND value != '')"
+    return (f"COALESCE({setting('manual_fuel_price')}, "
+            f"CASE WHEN {fuel_type_expr} = 'dizel' THEN {setting('current_motorin_price')} "
+            f"ELSE {setting('current_benzin_price')} END, 45.0)")
+
+
+def _vehicle_cost_columns(v: str) -> List[Tuple[str, str]]:
+    """
+    vehicle_cost_summary'nin araç satırından türeyen sütunları (_compute_cost ile aynı
+    formüller ve varsayılanlar). v: araç satırının takma adı (NEW, v, ...).
+    """
+    fuel_type = f"COALESCE(NULLIF({v}.yakit_tipi, ''), 'benzin')"
+    km_diff = f"(COALESCE({v}.gelecek_km, 0) - COALESCE({v}.guncel_km, 0))"
+    fixed_total = f"(COALESCE({v}.yillik_sigorta, 0) + COALESCE({v}.yillik_mtv, 0))"
+    return [
+        ("fuel_type", fuel_type),
+        ("consumption", f"COALESCE({v}.ortalama_tuketim_l_100km, 0)"),
+        ("fuel_price", fuel_price_sql(fuel_type)),
+        ("maintenance_cost", f"1.0 * COALESCE({v}.periyodik_bakim_maliyeti, 0) "
+                             f"/ COALESCE(NULLIF({v}.periyodik_bakim_km, 0), 10000)"),
+        ("depreciation_cost", f"CASE WHEN {km_diff} > 0 THEN MAX(0.0, 1.0 * (COALESCE({v}.su_anki_fiyat, 0) "
+                              f"- COALESCE({v}.gelecek_fiyat, 0)) / {km_diff}) ELSE 0.0 END"),
+        ("fixed_cost_per_km", f"1.0 * {fixed_total} / COALESCE(NULLIF({v}.yillik_ortalama_km, 0), 15000)"),
+        ("total_fixed_yearly", fixed_total),
+    ]
+
+
+def _consumable_cost_sql(c: str) -> str:
+    """Tek parçanın km başı payı (div_safely: ömür 0/boşsa 0)."""
+    return f"COALESCE(1.0 * {c}.maliyet / NULLIF({c}.omur_km, 0), 0.0)"
+
+
+def rebuild_cost_summary(cursor: sqlite3.Cursor):
+    """vehicle_cost_summary'yi baştan hesaplar (ilk doldurma / tutarlılık onarımı)."""
+    columns = _vehicle_cost_columns("v")
+    cursor.execute("DELETE FROM vehicle_cost_summary")
+    cursor.execute(f"""
+        INSERT INTO vehicle_cost_summary (vehicle_id, {', '.join(name for name, _ in columns)}, consumable_cost)
+        SELECT v.id, {', '.join(expr for _, expr in columns)},
+               COALESCE((SELECT SUM({_consumable_cost_sql('c')}) FROM consumables c WHERE c.vehicle_id = v.id), 0.0)
+        FROM vehicles v
+    """)
+
+
+def _m005_vehicle_cost_summary(cursor: sqlite3.Cursor):
+    """
+    Araç başına km maliyeti dökümü (materialized). Tetikleyicilerle güncel tutulur:
+    - araç eklenince / maliyet sütunları değişince araçtan türeyen sütunlar yeniden yazılır
+    - parça eklenince / silinince / değişince consumable_cost sadece fark kadar değişir
+    Yakıt fiyatı değişiminde fuel_price tek bir toplu UPDATE ile yenilenir
+    (bkz. VehicleManager._refresh_summary_fuel_prices). fuel_cost ve toplam üretilmiş sütundur.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vehicle_cost_summary (
+            vehicle_id INTEGER PRIMARY KEY,
+            fuel_type TEXT NOT NULL,
+            consumption REAL NOT NULL,
+            fuel_price REAL NOT NULL,
+            maintenance_cost REAL NOT NULL,
+            consumable_cost REAL NOT NULL DEFAULT 0,
+            depreciation_cost REAL NOT NULL,
+            fixed_cost_per_km REAL NOT NULL,
+            total_fixed_yearly REAL NOT NULL,
+            fuel_cost REAL GENERATED ALWAYS AS (consumption / 100 * fuel_price) STORED,
+            total_cost_per_km REAL GENERATED ALWAYS AS
+                (fuel_cost + maintenance_cost + consumable_cost + depreciation_cost) STORED
+        )
+    """)
+
+    insert_columns = _vehicle_cost_columns("NEW")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cost_summary_vehicle_insert AFTER INSERT ON vehicles
+        BEGIN
+            INSERT OR REPLACE INTO vehicle_cost_summary
+                (vehicle_id, {', '.join(name for name, _ in insert_columns)}, consumable_cost)
+            VALUES (NEW.id, {', '.join(expr for _, expr in insert_columns)},
+                    COALESCE((SELECT SUM({_consumable_cost_sql('c')}) FROM consumables c
+                              WHERE c.vehicle_id = NEW.id), 0.0));
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cost_summary_vehicle_update
+        AFTER UPDATE OF yakit_tipi, ortalama_tuketim_l_100km, periyodik_bakim_maliyeti, periyodik_bakim_km,
+                        su_anki_fiyat, gelecek_fiyat, guncel_km, gelecek_km,
+                        yillik_sigorta, yillik_mtv, yillik_ortalama_km ON vehicles
+        BEGIN
+            UPDATE vehicle_cost_summary
+            SET {', '.join(f'{name} = {expr}' for name, expr in insert_columns)}
+            WHERE vehicle_id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cost_summary_vehicle_delete AFTER DELETE ON vehicles
+        BEGIN
+            DELETE FROM vehicle_cost_summary WHERE vehicle_id = OLD.id;
+        END
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cost_summary_consumable_insert AFTER INSERT ON consumables
+        BEGIN
+            UPDATE vehicle_cost_summary SET consumable_cost = consumable_cost + {_consumable_cost_sql('NEW')}
+            WHERE vehicle_id = NEW.vehicle_id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cost_summary_consumable_delete AFTER DELETE ON consumables
+        BEGIN
+            UPDATE vehicle_cost_summary SET consumable_cost = consumable_cost - {_consumable_cost_sql('OLD')}
+            WHERE vehicle_id = OLD.vehicle_id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cost_summary_consumable_update
+        AFTER UPDATE OF vehicle_id, maliyet, omur_km ON consumables
+        BEGIN
+            UPDATE vehicle_cost_summary SET consumable_cost = consumable_cost - {_consumable_cost_sql('OLD')}
+            WHERE vehicle_id = OLD.vehicle_id;
+            UPDATE vehicle_cost_summary SET consumable_cost = consumable_cost + {_consumable_cost_sql('NEW')}
+            WHERE vehicle_id = NEW.vehicle_id;
+        END
+    """)
+
+    rebuild_cost_summary(cursor)
+
+
+def _m006_fleet_analytics(cursor: sqlite3.Cursor):
+    """
+    Filo analitiği:
+    - service_spend_monthly: ay bazında servis kaydı sayısı / harcama toplamı. Tetikleyiciler
+      her kayıtta sadece ilgili ayın satırını fark kadar günceller; filo geneli aylık
+      harcama service_logs taranmadan okunur.
+    - total_cost_per_km indeksi: filo yüzdelikleri sıralama yapmadan OFFSET ile bulunur.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS service_spend_monthly (
+            month TEXT PRIMARY KEY,
+            log_count INTEGER NOT NULL,
+            total_spend REAL NOT NULL
+        )
+    """)
+    cursor.execute("DELETE FROM service_spend_monthly")
+    cursor.execute("""
+        INSERT INTO service_spend_monthly (month, log_count, total_spend)
+        SELECT substr(tarih, 1, 7), COUNT(*), SUM(COALESCE(toplam_maliyet, 0))
+        FROM service_logs GROUP BY substr(tarih, 1, 7)
+    """)
+
+    add = """
+        INSERT INTO service_spend_monthly (month, log_count, total_spend)
+        VALUES (substr(NEW.tarih, 1, 7), 1, COALESCE(NEW.toplam_maliyet, 0))
+        ON CONFLICT (month) DO UPDATE SET log_count = log_count + 1,
+                                          total_spend = total_spend + excluded.total_spend;
+    """
+    remove = """
+        UPDATE service_spend_monthly
+        SET log_count = log_count - 1, total_spend = total_spend - COALESCE(OLD.toplam_maliyet, 0)
+        WHERE month = substr(OLD.tarih, 1, 7);
+        DELETE FROM service_spend_monthly WHERE month = substr(OLD.tarih, 1, 7) AND log_count <= 0;
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_service_spend_insert AFTER INSERT ON service_logs
+        BEGIN {add} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_service_spend_delete AFTER DELETE ON service_logs
+        BEGIN {remove} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_service_spend_update
+        AFTER UPDATE OF tarih, toplam_maliyet ON service_logs
+        BEGIN {remove} {add} END
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cost_summary_total
+        ON vehicle_cost_summary (total_cost_per_km)
+    """)
+
+
+def _m007_entity_versions(cursor: sqlite3.Cursor):
+    """
+    Değişiklik sayaçları (HTTP ETag'leri için). Anahtarlar:
+    - araç id'si: araç, parçaları veya servis kayıtları değişince artar
+    - 0: filoda herhangi bir değişiklikte artar (liste / toplu maliyet uçları)
+    - -1: maliyeti etkileyen yakıt ayarları değişince artar
+    Mevcut araçlar 1'den başlar; satırı olmayan araç (sürüm 0) hiç var olmamıştır.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entity_versions (
+            entity_key INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO entity_versions (entity_key, version) SELECT id, 1 FROM vehicles")
+    cursor.execute("INSERT OR IGNORE INTO entity_versions (entity_key, version) VALUES (0, 1), (-1, 1)")
+
+    def bump(key: str) -> str:
+        return f"""
+            INSERT INTO entity_versions (entity_key, version) VALUES ({key}, 1)
+            ON CONFLICT (entity_key) DO UPDATE SET version = version + 1;
+        """
+
+    for table, vehicle_col in (("vehicles", "id"), ("consumables", "vehicle_id"), ("service_logs", "vehicle_id")):
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            moved = ""
+            if event == "UPDATE" and table != "vehicles":
+                # Kayıt başka araca taşınırsa eski araç da değişmiş sayılır
+                moved = f"""
+                    INSERT INTO entity_versions (entity_key, version)
+                    SELECT OLD.vehicle_id, 1 WHERE OLD.vehicle_id IS NOT NEW.vehicle_id
+                    ON CONFLICT (entity_key) DO UPDATE SET version = version + 1;
+                """
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_versions_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN {bump(f"{row}.{vehicle_col}")} {moved} {bump("0")} END
+            """)
+
+    fuel_keys = "('current_benzin_price', 'current_motorin_price', 'manual_fuel_price')"
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_versions_settings_{event.lower()}
+            AFTER {event} ON settings WHEN {row}.key IN {fuel_keys}
+            BEGIN {bump("-1")} END
+        """)
+
+
+def _m008_odometer_readings(cursor: sqlite3.Cursor):
+    """
+    Telematik km okumaları:
+    - vehicles.km_updated_at: guncel_km'nin ait olduğu son okuma zamanı (eski okumalar atılır)
+    - odometer_readings: araç başına saatte en fazla bir satır (saatin son okuması)
+    """
+    _add_missing_columns(cursor, "vehicles", [("km_updated_at", "TEXT")])
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS odometer_readings (
+            vehicle_id INTEGER NOT NULL,
+            hour TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            km INTEGER NOT NULL,
+            PRIMARY KEY (vehicle_id, hour)
+        ) WITHOUT ROWID
+    """)
+
+
+# Servis kaydı aramasında indekslenen sütunlar
+SEARCH_COLUMNS = ("yapilan_islemler", "degisen_parcalar")
+
+
+def _search_text_sql(expr: str) -> str:
+    # unicode61 noktasız "ı"yı "i"ye katlamaz; sorgu tarafında da aynısı yapılır (models._search_match_query)
+    return f"replace({expr}, 'ı', 'i')"
+
+
+def create_service_log_search(cursor: sqlite3.Cursor) -> bool:
+    """
+    Servis kayıtları için FTS5 tam metin indeksi (yapilan_islemler, degisen_parcalar).
+    Metin service_logs'ta kalır (external content); indekse tetikleyicilerle yazılır.
+    Büyük/küçük harf ve aksan duyarsız: "Yağı", "YAGI" ve "yagi" aynı terimdir.
+    İndekse "ı" -> "i" çevrilmiş metin yazıldığından FTS5'in içerik tablosunu okuyan 'rebuild'
+    komutu yerine rebuild_service_log_search kullanılmalı.
+    SQLite FTS5 olmadan derlenmişse False döner (arama kapalı, şema yine de güncellenir).
+    """
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS service_logs_fts USING fts5(
+                {', '.join(SEARCH_COLUMNS)},
+                content = 'service_logs', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Servis kaydı araması kapalı (FTS5 yok): {e}")
+        return False
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    # External content: silmede indekslenmiş metnin aynısı 'delete' komutuyla verilmeli
+    delete_old = f"""
+        INSERT INTO service_logs_fts (service_logs_fts, rowid, {columns})
+        VALUES ('delete', OLD.id, {', '.join(_search_text_sql(f'OLD.{c}') for c in SEARCH_COLUMNS)});
+    """
+    insert_new = f"""
+        INSERT INTO service_logs_fts (rowid, {columns})
+        VALUES (NEW.id, {', '.join(_search_text_sql(f'NEW.{c}') for c in SEARCH_COLUMNS)});
+    """
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_service_logs_fts_insert AFTER INSERT ON service_logs BEGIN {insert_new} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_service_logs_fts_delete AFTER DELETE ON service_logs BEGIN {delete_old} END")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_service_logs_fts_update
+        AFTER UPDATE OF {columns} ON service_logs
+        BEGIN {delete_old} {insert_new} END
+    """)
+    return True
+
+
+def rebuild_service_log_search(cursor: sqlite3.Cursor) -> bool:
+    """Arama indeksini service_logs'tan baştan oluşturur (ilk doldurma / onarım); yoksa önce oluşturur."""
+    if not create_service_log_search(cursor):
+        return False
+    columns = ", ".join(SEARCH_COLUMNS)
+    # FTS5 'rebuild' metni normalleştirmeden okurdu; tetikleyicilerle aynı ifadeyle yeniden yazılır
+    cursor.execute("INSERT INTO service_logs_fts (service_logs_fts) VALUES ('delete-all')")
+    cursor.execute(f"""
+        INSERT INTO service_logs_fts (rowid, {columns})
+        SELECT id, {', '.join(_search_text_sql(c) for c in SEARCH_COLUMNS)} FROM service_logs
+    """)
+    # Tek segmentte birleştirilmiş indeks: sorgular daha az b-tree okur
+    cursor.execute("INSERT INTO service_logs_fts (service_logs_fts) VALUES ('optimize')")
+    return True
+
+
+def _m009_service_log_search(cursor: sqlite3.Cursor):
+    """Servis kayıtlarında tam metin arama (bkz. create_service_log_search); mevcut kayıtlar indekslenir."""
+    rebuild_service_log_search(cursor)
+
+
+# --- DEĞİŞEN PARÇALAR (service_log_parts) ---
+
+# Parça ayırıcıları; "+" ayırıcı değildir ("Motor Yağı + Filtre" tek kalemdir)
+_PART_SEPARATORS = re.compile(r"[,;\n]")
+
+
+@functools.lru_cache(maxsize=4096)
+def part_key(name: str) -> str:
+    """
+    Parça adının eşleştirme anahtarı: küçük harf, aksansız, tek boşluklu
+    ("Ön Balata", "ON  BALATA" ve "ön balata" -> "on balata").
+    SQLite'ın lower()'ı sadece ASCII harfleri çevirdiği için Python'da hesaplanır.
+    """
+    folded = unicodedata.normalize("NFKD", name.replace("İ", "i").lower().replace("ı", "i"))
+    return " ".join("".join(ch for ch in folded if not unicodedata.combining(ch)).split())
+
+
+@functools.lru_cache(maxsize=4096)
+def split_replaced_parts(text: Optional[str]) -> Tuple[Tuple[str, str], ...]:
+    """
+    degisen_parcalar metnini (parça adı, part_key) çiftlerine böler; boş ve aynı anahtarlı
+    tekrarlar atlanır. Metinler filoda çok tekrarlandığından sonuç önbelleklenir.
+    """
+    parts, seen = [], set()
+    for name in _PART_SEPARATORS.split(text or ""):
+        name = " ".join(name.split()).strip(".")
+        key = part_key(name)
+        if key and key not in seen:
+            seen.add(key)
+            parts.append((name, key))
+    return tuple(parts)
+
+
+def record_replaced_parts(cursor: sqlite3.Cursor, logs: Iterable[tuple], reset_consumables: bool = True):
+    """
+    Servis kayıtlarının (id, vehicle_id, km, tarih, degisen_parcalar) değişen parçalarını
+    service_log_parts'a yazar. Parça, aynı aracın adı (part_key) aynı olan parçasına bağlanır.
+    reset_consumables: eşleşen parçaların degisim_km'si kaydın km'sine çekilir; sadece ileri,
+    geç girilen eski bir kayıt sonraki değişimi geri almaz.
+    """
+    rows = []
+    for log_id, vehicle_id, km, tarih, text in logs:
+        for position, (name, key) in enumerate(split_replaced_parts(text)):
+            rows.append([log_id, position, vehicle_id, key, name, km, tarih, None])
+    if not rows:
+        return
+
+    cursor.execute(
+        "SELECT id, vehicle_id, parca_adi FROM consumables "
+        "WHERE vehicle_id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (json.dumps(sorted({row[2] for row in rows})),)
+    )
+    consumables = {}
+    for consumable_id, vehicle_id, parca_adi in cursor.fetchall():
+        consumables.setdefault((vehicle_id, part_key(parca_adi or "")), []).append(consumable_id)
+
+    resets = {}
+    for row in rows:
+        matched = consumables.get((row[2], row[3]), ())
+        if matched:
+            row[7] = matched[0]
+        for consumable_id in matched:
+            resets[consumable_id] = max(resets.get(consumable_id, row[5]), row[5])
+
+    cursor.executemany("""
+        INSERT OR REPLACE INTO service_log_parts
+            (service_log_id, position, vehicle_id, parca_key, parca_adi, km, tarih, consumable_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    if reset_consumables and resets:
+        cursor.executemany(
+            "UPDATE consumables SET degisim_km = ? WHERE id = ? AND COALESCE(degisim_km, 0) < ?",
+            [(km, consumable_id, km) for consumable_id, km in resets.items()]
+        )
+
+
+def _part_summary_sql(where: str) -> str:
+    """(parca_key, vehicle_id) gruplarının özet satırları; where grupları seçer."""
+    return f"""
+        INSERT INTO part_replacement_summary
+            (parca_key, vehicle_id, replacements, intervals, first_km, last_km,
+             first_tarih, last_tarih, consumable_id)
+        SELECT parca_key, vehicle_id, COUNT(*), COUNT(DISTINCT km) - 1, MIN(km), MAX(km),
+               MIN(tarih), MAX(tarih), MAX(consumable_id)
+        FROM service_log_parts {where}
+        GROUP BY parca_key, vehicle_id
+    """
+
+
+def create_part_summary_triggers(cursor: sqlite3.Cursor):
+    """
+    part_replacement_summary tetikleyicileri: değişen (parça, araç) grubunun satırı
+    (parca_key, vehicle_id, ...) indeksinden birkaç satır okunarak yeniden hesaplanır.
+    En küçük / en büyük km silmede farkla güncellenemediği için artımlı değil, grup bazında.
+    """
+    def refresh(row: str) -> str:
+        return f"""
+            DELETE FROM part_replacement_summary
+            WHERE parca_key = {row}.parca_key AND vehicle_id = {row}.vehicle_id;
+            {_part_summary_sql(f"WHERE parca_key = {row}.parca_key AND vehicle_id = {row}.vehicle_id")};
+        """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_part_summary_insert AFTER INSERT ON service_log_parts
+        BEGIN {refresh("NEW")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_part_summary_delete AFTER DELETE ON service_log_parts
+        BEGIN {refresh("OLD")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_part_summary_update AFTER UPDATE ON service_log_parts
+        BEGIN {refresh("OLD")} {refresh("NEW")} END
+    """)
+
+
+def rebuild_service_log_parts(cursor: sqlite3.Cursor, chunk_size: int = 50000):
+    """
+    service_log_parts'ı service_logs.degisen_parcalar metninden, özet tablosunu da ondan
+    baştan oluşturur (ilk doldurma, sonradan eklenen / yeniden adlandırılan parçalarla
+    eşleştirme). degisim_km'lere dokunmaz. Satır başına özet tetikleyicisi çalışmasın diye
+    tetikleyiciler kaldırılıp sonda tek GROUP BY ile doldurulur.
+    """
+    for event in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_part_summary_{event}")
+    cursor.execute("DELETE FROM service_log_parts")
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, vehicle_id, km, tarih, degisen_parcalar FROM service_logs
+            WHERE id > ? AND degisen_parcalar IS NOT NULL AND degisen_parcalar != ''
+            ORDER BY id LIMIT ?
+        """, (last_id, chunk_size))
+        logs = cursor.fetchall()
+        if not logs:
+            break
+        record_replaced_parts(cursor, logs, reset_consumables=False)
+        last_id = logs[-1][0]
+
+    cursor.execute("DELETE FROM part_replacement_summary")
+    cursor.execute(_part_summary_sql(""))
+    create_part_summary_triggers(cursor)
+
+
+def _m010_service_log_parts(cursor: sqlite3.Cursor):
+    """
+    Değişen parçalar:
+    - service_log_parts: servis kaydı başına parça satırı (degisen_parcalar virgüllü metni);
+      vehicle_id / km / tarih kayıttan kopyalanır. Araç geçmişi (vehicle_id, parca_key, km)
+      indeksinden sıralamasız okunur.
+    - part_replacement_summary: (parça, araç) başına değişim sayısı, ilk / son değişim km'si ve
+      tarihi. Ardışık değişimler arası km'lerin toplamı son - ilk olduğundan gözlenen ortalama
+      ömür filo geneli parça satırları taranmadan hesaplanır.
+    Mevcut kayıtlar ayrıştırılır; geçmiş kayıtlar degisim_km'leri değiştirmez.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS service_log_parts (
+            service_log_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            vehicle_id INTEGER NOT NULL,
+            parca_key TEXT NOT NULL,
+            parca_adi TEXT NOT NULL,
+            km INTEGER NOT NULL,
+            tarih TEXT NOT NULL,
+            consumable_id INTEGER,
+            PRIMARY KEY (service_log_id, position)
+        ) WITHOUT ROWID
+    """)
+    # Özet tetikleyicisinin grup hesabı tablo okumadan (covering) yapılır
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_service_log_parts_key
+        ON service_log_parts (parca_key, vehicle_id, km, tarih, consumable_id)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_service_log_parts_vehicle ON service_log_parts (vehicle_id, parca_key, km)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_service_log_parts_consumable
+        ON service_log_parts (consumable_id) WHERE consumable_id IS NOT NULL
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS part_replacement_summary (
+            parca_key TEXT NOT NULL,
+            vehicle_id INTEGER NOT NULL,
+            replacements INTEGER NOT NULL,
+            intervals INTEGER NOT NULL,
+            first_km INTEGER NOT NULL,
+            last_km INTEGER NOT NULL,
+            first_tarih TEXT NOT NULL,
+            last_tarih TEXT NOT NULL,
+            consumable_id INTEGER,
+            PRIMARY KEY (parca_key, vehicle_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_part_summary_vehicle ON part_replacement_summary (vehicle_id)")
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_service_log_parts_delete AFTER DELETE ON service_logs
+        BEGIN DELETE FROM service_log_parts WHERE service_log_id = OLD.id; END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_service_log_parts_update
+        AFTER UPDATE OF vehicle_id, km, tarih ON service_logs
+        BEGIN
+            UPDATE service_log_parts SET vehicle_id = NEW.vehicle_id, km = NEW.km, tarih = NEW.tarih
+            WHERE service_log_id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_service_log_parts_consumable_delete AFTER DELETE ON consumables
+        BEGIN UPDATE service_log_parts SET consumable_id = NULL WHERE consumable_id = OLD.id; END
+    """)
+    rebuild_service_log_parts(cursor)
+
+
+# (sürüm, açıklama, fonksiyon) — sürümler 1'den başlayıp birer artmalı
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "Temel şema", _m001_base_schema),
+    (2, "vehicle_id indeksleri", _m002_vehicle_indexes),
+    (3, "Yakıt fiyatı geçmişi", _m003_fuel_price_history),
+    (4, "Parça bitiş km indeksi", _m004_consumable_end_km),
+    (5, "Araç maliyet özeti tablosu", _m005_vehicle_cost_summary),
+    (6, "Filo analitiği (aylık servis harcaması, maliyet indeksi)", _m006_fleet_analytics),
+    (7, "Değişiklik sayaçları (ETag)", _m007_entity_versions),
+    (8, "Km okumaları (odometre)", _m008_odometer_readings),
+    (9, "Servis kaydı tam metin araması (FTS5)", _m009_service_log_search),
+    (10, "Değişen parçalar tablosu", _m010_service_log_parts),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target_version: int = LATEST_VERSION) -> int:
+    """
+    Bekleyen migration adımlarını sırayla uygular ve son şema sürümünü döndürür.
+    Aynı anda açılan birden fazla süreç (örn. uvicorn worker'ları) için güvenlidir:
+    her adım BEGIN IMMEDIATE ile yazma kilidi alır ve sürümü kilit altında tekrar okur.
+    """
+    for version, description, apply in MIGRATIONS:
+        if version > target_version:
+            break
+        if get_schema_version(conn) >= version:
+            continue
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Kilidi beklerken başka bir süreç bu adımı uygulamış olabilir
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+            print(f"🗄️ Şema güncellendi: v{version} ({description})")
+        except Exception:
+            conn.rollback()
+            raise
+
+    return get_schema_version(conn)
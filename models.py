@@ -1,7 +1,24 @@
 import sqlite3
 import json
-from typing import List, Dict, Optional, Union
+import math
+import re
+import threading
+from typing import Callable, Iterator, List, Dict, Optional, TypeVar, Union
 from datetime import datetime
+from db import ConnectionPool, WriteQueue
+from migrations import (migrate, fuel_price_sql, rebuild_cost_summary, rebuild_service_log_search,
+                        part_key, record_replaced_parts, rebuild_service_log_parts)
+from cache import VehicleResultCache, cached_per_vehicle
+from metrics import TimedConnection, timed
+import projection
+from serialization import rows_to_json
+
+T = TypeVar("T")
+try:
+    # NumPy kurulu değilse filo hesapları skaler motorla yapılır
+    import cost_engine
+except ImportError:
+    cost_engine = None
 try:
     from utils import get_current_fuel_prices
 except ImportError:
@@ -9,150 +26,168 @@ except ImportError:
     def get_current_fuel_prices():
         return {'benzin': 45.0, 'motorin': 46.0}
 
+# vehicles tablosunun sütunları (alan seçimi / projection doğrulaması için)
+VEHICLE_COLUMNS = [
+    'id', 'marka', 'model', 'yil', 'fotograf_url',
+    'baslangic_km', 'guncel_km', 'yakit_tipi', 'ortalama_tuketim_l_100km',
+    'periyodik_bakim_km', 'periyodik_bakim_maliyeti',
+    'son_bakim_km', 'bakim_araligi',
+    'yillik_sigorta', 'yillik_mtv', 'yillik_ortalama_km',
+    'su_anki_fiyat', 'gelecek_fiyat', 'gelecek_km', 'km_updated_at'
+]
+
+# consumables tablosunun API'de dönen sütunları (sanal bitis_km sütunu hariç; bkz. migrations v4)
+CONSUMABLE_COLUMNS = ['id', 'vehicle_id', 'parca_adi', 'maliyet', 'omur_km', 'degisim_km']
+CONSUMABLE_SELECT = ', '.join(CONSUMABLE_COLUMNS)
+
+# Maliyet hesabını etkileyen ayar anahtarları
+FUEL_SETTING_KEYS = frozenset({'current_benzin_price', 'current_motorin_price', 'manual_fuel_price'})
+
+# entity_versions anahtarları (araç id'lerinin dışında; bkz. migrations._m007_entity_versions)
+FLEET_VERSION_KEY = 0
+SETTINGS_VERSION_KEY = -1
+
+# Analitik gruplama anahtarları -> vehicles sütunları (model, marka ile birlikte gruplanır)
+ANALYTICS_GROUPS = {
+    'marka': ['marka'],
+    'model': ['marka', 'model'],
+    'yil': ['yil'],
+    'yakit_tipi': ['yakit_tipi'],
+}
+
+# Araç filtresiz aramada sıralamaya (bm25) giren en fazla eşleşme; daha yaygın terimlerde en yeniler
+SEARCH_CANDIDATES = 1000
+# Arama indeksinin olmadığını (migration uygulanmamış / SQLite FTS5'siz) gösteren hatalar
+SEARCH_UNAVAILABLE_ERRORS = ("no such table: service_logs_fts", "no such module: fts5")
+_SEARCH_TERM = re.compile(r"\w+\*?")
+
+# Fiyat geçmişinin tutulduğu bölge (utils / fuel_prices bu bölgenin fiyatını çeker)
+FUEL_PRICE_REGION = 'ISTANBUL (AVRUPA)'
+
+
+def normalize_as_of(value: str, end_of_day: bool = True) -> str:
+    """
+    'as_of' parametresini fuel_prices.ts ile karşılaştırılabilir ISO metnine çevirir.
+    Sadece tarih verilirse (YYYY-MM-DD) o günün sonu (end_of_day=False ise başı)
+    kabul edilir. Geçersizse ValueError.
+    """
+    parsed = datetime.fromisoformat(value)
+    if len(value) == 10 and end_of_day:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed.replace(tzinfo=None).isoformat(timespec='seconds')
+
 class VehicleManager:
     """
     Araç veritabanı işlemlerini yöneten sınıf.
     SQLite veritabanı bağlantısı, kayıt tutma ve maliyet hesaplama işlemlerini kapsar.
     """
-    def __init__(self, db_name="vehicle_master.db"):
-        # check_same_thread=False, çok kanallı (multi-threaded) ortamlarda (FastAPI vb.)
-        # aynı bağlantının farklı thread'lerden çağrılabilmesini sağlar.
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        # Row factory ile sonuçları sözlük gibi (dictionary-like) alabiliriz
-        self.conn.row_factory = sqlite3.Row 
+    def __init__(self, db_name="vehicle_master.db", pool_size: int = 8, busy_timeout_ms: int = 5000,
+                 result_cache_size: int = 1024, result_cache_ttl: float = 300,
+                 synchronous: str = "NORMAL", write_batch_size: int = 64, write_batch_window_ms: float = 0.0):
+        # Her thread (FastAPI threadpool) havuzdan kendi bağlantısını alır;
+        # WAL modu sayesinde okumalar yazmaları beklemeden paralel ilerler.
+        # TimedConnection: sorgu süreleri metrics katmanına (/metrics) yazılır
+        self.pool = ConnectionPool(db_name, pool_size=pool_size, busy_timeout_ms=busy_timeout_ms,
+                                   synchronous=synchronous, connection_factory=TimedConnection)
+
+        # Yazmalar tek yazıcıda gruplanıp commit edilir (bkz. _write); write_batch_size=0 ile kapalı
+        self.writer = WriteQueue(self.pool, max_batch=write_batch_size, max_delay_ms=write_batch_window_ms) \
+            if write_batch_size > 0 else None
+
+        # Maliyet / bakım durumu / uyarı sonuçları için araç bazlı LRU önbellek
+        self.result_cache = VehicleResultCache(maxsize=result_cache_size, ttl_seconds=result_cache_ttl)
+
+        # Ayar önbelleği (bkz. _load_settings)
+        self._settings_cache: Optional[Dict[str, str]] = None
+        self._settings_lock = threading.Lock()
+        self.settings_cache_hits = 0
+        self.settings_cache_misses = 0
+
         self.create_tables()
 
     def create_tables(self):
-        """Tüm gerekli tabloları oluşturur ve şema güncellemelerini yapar."""
-        cursor = self.conn.cursor()
-        
-        # 1. Vehicle tablosu
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS vehicles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                marka TEXT NOT NULL,
-                model TEXT NOT NULL,
-                yil INTEGER,
-                fotograf_url TEXT,
-                
-                -- Kilometre Bilgileri
-                baslangic_km INTEGER DEFAULT 0,
-                guncel_km INTEGER DEFAULT 0,
-                
-                -- Yakıt ve Tüketim
-                yakit_tipi TEXT DEFAULT 'benzin',
-                ortalama_tuketim_l_100km REAL DEFAULT 0,
-                
-                -- Bakım (Maintenance)
-                periyodik_bakim_km INTEGER DEFAULT 10000,
-                periyodik_bakim_maliyeti REAL DEFAULT 0,
-                
-                -- Servis Takibi (NEW)
-                son_bakim_km INTEGER DEFAULT 0,
-                bakim_araligi INTEGER DEFAULT 2000,
-                
-                -- Sabit Giderler (FixedCosts)
-                yillik_sigorta REAL DEFAULT 0,
-                yillik_mtv REAL DEFAULT 0,
-                yillik_ortalama_km INTEGER DEFAULT 15000,
-                
-                -- Değer Kaybı (Depreciation Parametreleri)
-                su_anki_fiyat REAL DEFAULT 0,
-                gelecek_fiyat REAL DEFAULT 0,
-                gelecek_km INTEGER DEFAULT 0
-            )
-        """)
-
-        # Migration: Vehicles tablosuna yeni sütunları ekle (eğer yoksa)
-        columns_to_add = [
-            ("baslangic_km", "INTEGER DEFAULT 0"),
-            ("guncel_km", "INTEGER DEFAULT 0"),
-            ("yakit_tipi", "TEXT DEFAULT 'benzin'"),
-            ("ortalama_tuketim_l_100km", "REAL DEFAULT 0"),
-            ("periyodik_bakim_maliyeti", "REAL DEFAULT 0"),
-            ("son_bakim_km", "INTEGER DEFAULT 0"),
-            ("bakim_araligi", "INTEGER DEFAULT 2000"),
-            ("yillik_sigorta", "REAL DEFAULT 0"),
-            ("yillik_mtv", "REAL DEFAULT 0"),
-            ("yillik_ortalama_km", "INTEGER DEFAULT 15000"),
-            ("su_anki_fiyat", "REAL DEFAULT 0"),
-            ("gelecek_fiyat", "REAL DEFAULT 0"),
-            ("gelecek_km", "INTEGER DEFAULT 0")
-        ]
-        
-        for col_name, col_type in columns_to_add:
-            try:
-                cursor.execute(f"ALTER TABLE vehicles ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError:
-                pass # Sütun zaten var
-
-        # 2. Consumables (Parçalar/Sarf Malzeme) Tablosu
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS consumables (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vehicle_id INTEGER,
-                parca_adi TEXT,
-                maliyet REAL,
-                omur_km INTEGER,
-                degisim_km INTEGER DEFAULT 0,
-                FOREIGN KEY (vehicle_id) REFERENCES vehicles (id) ON DELETE CASCADE
-            )
-        """)
-
-        # Migration: Consumables tablosuna yeni sütunları ekle (eğer yoksa)
-        consumable_columns = [
-            ("degisim_km", "INTEGER DEFAULT 0"),
-        ]
-        for col_name, col_type in consumable_columns:
-            try:
-                cursor.execute(f"ALTER TABLE consumables ADD COLUMN {col_name} {col_type}")
-            except sqlite3.OperationalError:
-                pass
-
-        # 3. Service Logs (Servis Kayıtları) Tablosu - YENİ
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS service_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vehicle_id INTEGER,
-                tarih TEXT NOT NULL,
-                km INTEGER NOT NULL,
-                yapilan_islemler TEXT,
-                toplam_maliyet REAL DEFAULT 0,
-                degisen_parcalar TEXT,
-                FOREIGN KEY (vehicle_id) REFERENCES vehicles (id) ON DELETE CASCADE
-            )
-        """)
+        """
+        Tüm gerekli tabloları oluşturur ve şema güncellemelerini yapar.
+        Şema adımları migrations.py içinde sürümlü olarak tanımlıdır; sadece
+        bu veritabanına henüz uygulanmamış adımlar çalışır.
+        """
+        with self.pool.connection() as conn:
+            self.schema_version = migrate(conn)
+        # Not: Fiyat güncellemesi burada yapılmaz (ağ isteği açılışı bloklamasın).
+        # Periyodik güncelleme için bkz. price_refresher.FuelPriceRefresher
 
-        # 4. Settings Tablosu (Konfigürasyon ve Fiyatlar)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        
-        self.conn.commit()
-        
-        # Fiyatları güncelle
-        self.update_fuel_prices_if_needed()
+    def _write(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        """
+        func(cursor)'ı tek transaction'da çalıştırıp commit eder ve sonucunu döndürür.
+        Grup commit açıksa işlem yazıcı kuyruğunda eşzamanlı diğer yazmalarla aynı
+        commit'i paylaşır; kapalıysa havuzdan alınan bağlantıda hemen commit edilir.
+        Hatalar (sqlite3.Error) çağırana aynen iletilir.
+        """
+        if self.writer is not None:
+            return self.writer.execute(func)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            result = func(cursor)
+            conn.commit()
+            return result
 
-    def update_fuel_prices_if_needed(self):
-        """İnternetten güncel fiyatları çeker ve veritabanına yazar."""
+    def update_fuel_prices_if_needed(self) -> bool:
+        """
+        İnternetten güncel fiyatları çeker ve veritabanına yazar.
+        Başarılıysa True döner; son başarılı güncelleme zamanı
+        'last_fuel_price_update' ayarına ISO formatında yazılır.
+        """
         prices = get_current_fuel_prices()
         
-        cursor = self.conn.cursor()
         if prices:
-            try:
-                cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ('current_benzin_price', str(prices['benzin'])))
-                cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ('current_motorin_price', str(prices['motorin'])))
-                cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ('last_fuel_price_update', 'Just Now')) 
-                self.conn.commit()
-                print(f"🌍 Fiyatlar güncellendi: Benzin {prices['benzin']}, Motorin {prices['motorin']}")
-            except sqlite3.Error as e:
-                print(f"⚠️ Ayarlar güncellenemedi: {e}") 
-        else:
-            # İnternet yoksa veya fiyat çekilemezse, mevcut eski fiyatları korur
-            print("⚠️ Canlı fiyat çekilemedi, veritabanındaki eski fiyatlar kullanılacak.")
+            return self.store_fuel_prices(prices)
+        # İnternet yoksa veya fiyat çekilemezse, mevcut eski fiyatları korur
+        print("⚠️ Canlı fiyat çekilemedi, veritabanındaki eski fiyatlar kullanılacak.")
+        return False
+
+    def store_fuel_prices(self, prices: Dict[str, float]) -> bool:
+        """
+        Dışarıda çekilmiş fiyatları ({'benzin', 'motorin'}) veritabanına yazar.
+        Asenkron sağlayıcı (fuel_prices.FuelPriceProvider) bu metodu kullanır.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        fuel_updates = {
+            'current_benzin_price': str(prices['benzin']),
+            'current_motorin_price': str(prices['motorin'])
+        }
+        changed = 0
+        def write_fuel_prices(cursor):
+            nonlocal changed
+            changed = self._upsert_settings(cursor, fuel_updates)
+            self._upsert_settings(cursor, {'last_fuel_price_update': now})
+            # Geçmişe sadece fiyat değiştiyse yeni satır eklenir (tablo küçük kalır)
+            cursor.executemany("""
+                INSERT OR IGNORE INTO fuel_prices (ts, fuel_type, region, price)
+                SELECT :ts, :fuel_type, :region, :price
+                WHERE COALESCE((
+                    SELECT price FROM fuel_prices
+                    WHERE region = :region AND fuel_type = :fuel_type
+                    ORDER BY ts DESC LIMIT 1
+                ), -1) != :price
+            """, [
+                {"ts": now, "fuel_type": fuel_type, "region": FUEL_PRICE_REGION, "price": prices[fuel_type]}
+                for fuel_type in ('benzin', 'motorin')
+            ])
+            # Fiyat aynı kaldıysa özet tablosunun tamamını yeniden yazmaya gerek yok
+            if changed:
+                self._refresh_summary_fuel_prices(cursor)
+
+        try:
+            self._write(write_fuel_prices)
+            # Fiyat değişmediyse sadece zaman damgası yazılır; sonuç önbelleği korunur
+            self._update_settings_cache(dict(fuel_updates, last_fuel_price_update=now) if changed
+                                        else {'last_fuel_price_update': now})
+            print(f"🌍 Fiyatlar güncellendi: Benzin {prices['benzin']}, Motorin {prices['motorin']}")
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️ Ayarlar güncellenemedi: {e}")
+            return False
 
     # --- VERİ GİRİŞİ (INSERT) FONKSİYONLARI ---
 
@@ -179,11 +214,12 @@ class VehicleManager:
                 VALUES ({', '.join(['?']*len(keys))})
             """
             
-            cursor = self.conn.cursor()
-            cursor.execute(query, tuple(values))
-            vehicle_id = cursor.lastrowid
-            
-            self.conn.commit()
+            def insert_vehicle(cursor):
+                cursor.execute(query, tuple(values))
+                return cursor.lastrowid
+
+            vehicle_id = self._write(insert_vehicle)
+            self.result_cache.invalidate_vehicle(vehicle_id)
             return vehicle_id
 
         except sqlite3.Error as e:
@@ -203,9 +239,11 @@ class VehicleManager:
             values.append(vehicle_id)
             query = f"UPDATE vehicles SET {', '.join(set_clauses)} WHERE id = ?"
             
-            cursor = self.conn.cursor()
-            cursor.execute(query, tuple(values))
-            self.conn.commit()
+            def update_vehicle_row(cursor):
+                cursor.execute(query, tuple(values))
+
+            self._write(update_vehicle_row)
+            self.result_cache.invalidate_vehicle(vehicle_id)
             return True
         except sqlite3.Error as e:
             print(f"❌ Araç güncelleme hatası: {e}")
@@ -214,13 +252,16 @@ class VehicleManager:
     def delete_vehicle(self, vehicle_id: int) -> bool:
         """Aracı ve ilişkili parçalarını siler."""
         try:
-            cursor = self.conn.cursor()
-            # Önce ilişkili parçaları ve servis kayıtlarını sil (Cascade Logic)
-            cursor.execute("DELETE FROM consumables WHERE vehicle_id = ?", (vehicle_id,))
-            cursor.execute("DELETE FROM service_logs WHERE vehicle_id = ?", (vehicle_id,))
-            # Sonra aracı sil
-            cursor.execute("DELETE FROM vehicles WHERE id = ?", (vehicle_id,))
-            self.conn.commit()
+            def delete_vehicle_rows(cursor):
+                # Önce ilişkili parçaları, servis kayıtlarını ve km geçmişini sil (Cascade Logic)
+                cursor.execute("DELETE FROM consumables WHERE vehicle_id = ?", (vehicle_id,))
+                cursor.execute("DELETE FROM service_logs WHERE vehicle_id = ?", (vehicle_id,))
+                cursor.execute("DELETE FROM odometer_readings WHERE vehicle_id = ?", (vehicle_id,))
+                # Sonra aracı sil
+                cursor.execute("DELETE FROM vehicles WHERE id = ?", (vehicle_id,))
+
+            self._write(delete_vehicle_rows)
+            self.result_cache.forget_vehicle(vehicle_id)
             return True
         except sqlite3.Error as e:
             print(f"❌ Araç silme hatası: {e}")
@@ -242,17 +283,28 @@ class VehicleManager:
                 INSERT INTO consumables (vehicle_id, parca_adi, maliyet, omur_km)
                 VALUES (?, ?, ?, ?)
             """
-            cursor = self.conn.cursor()
-            cursor.execute(query, (vehicle_id, parca_adi, maliyet, omur_km))
-            self.conn.commit()
+            def insert_consumable(cursor):
+                cursor.execute(query, (vehicle_id, parca_adi, maliyet, omur_km))
+
+            self._write(insert_consumable)
+            self.result_cache.invalidate_vehicle(vehicle_id)
         except sqlite3.Error as e:
             print(f"❌ Parça ekleme hatası: {e}")
     
     def get_vehicle_consumables(self, vehicle_id: int) -> List[Dict]:
         """Araca ait sarf malzemeleri getirir."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM consumables WHERE vehicle_id = ?", (vehicle_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {CONSUMABLE_SELECT} FROM consumables WHERE vehicle_id = ? ORDER BY id", (vehicle_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_vehicle_consumables_json(self, vehicle_id: int) -> bytes:
+        """get_vehicle_consumables ile aynı liste, doğrudan JSON bayt olarak (API yanıtı için)."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(f"SELECT {CONSUMABLE_SELECT} FROM consumables WHERE vehicle_id = ? ORDER BY id", (vehicle_id,))
+            return rows_to_json(cursor.description, cursor.fetchall())
 
     def update_consumable(self, consumable_id: int, data: Dict) -> bool:
         """Parça bilgilerini günceller."""
@@ -270,9 +322,14 @@ class VehicleManager:
             values.append(consumable_id)
             query = f"UPDATE consumables SET {', '.join(set_clauses)} WHERE id = ?"
             
-            cursor = self.conn.cursor()
-            cursor.execute(query, tuple(values))
-            self.conn.commit()
+            def update_consumable_row(cursor):
+                vehicle_id = self._consumable_vehicle_id(cursor, consumable_id)
+                cursor.execute(query, tuple(values))
+                return vehicle_id
+
+            vehicle_id = self._write(update_consumable_row)
+            if vehicle_id is not None:
+                self.result_cache.invalidate_vehicle(vehicle_id)
             return True
         except sqlite3.Error as e:
             print(f"❌ Parça güncelleme hatası: {e}")
@@ -281,40 +338,73 @@ class VehicleManager:
     def delete_consumable(self, consumable_id: int) -> bool:
         """Parçayı siler."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM consumables WHERE id = ?", (consumable_id,))
-            self.conn.commit()
+            def delete_consumable_row(cursor):
+                vehicle_id = self._consumable_vehicle_id(cursor, consumable_id)
+                cursor.execute("DELETE FROM consumables WHERE id = ?", (consumable_id,))
+                return vehicle_id
+
+            vehicle_id = self._write(delete_consumable_row)
+            if vehicle_id is not None:
+                self.result_cache.invalidate_vehicle(vehicle_id)
             return True
         except sqlite3.Error as e:
             print(f"❌ Parça silme hatası: {e}")
             return False
 
+    def _consumable_vehicle_id(self, cursor: sqlite3.Cursor, consumable_id: int) -> Optional[int]:
+        """Parçanın ait olduğu aracın ID'si (önbellek geçersiz kılma için)."""
+        cursor.execute("SELECT vehicle_id FROM consumables WHERE id = ?", (consumable_id,))
+        row = cursor.fetchone()
+        return row['vehicle_id'] if row else None
+
     # --- HESAPLAMA MOTORU (THE ENGINE) ---
 
-    def calculate_total_km_cost(self, vehicle_id: int) -> Dict:
+    @timed
+    @cached_per_vehicle
+    def calculate_total_km_cost(self, vehicle_id: int, as_of: Optional[str] = None) -> Dict:
         """
         1 KM Başına Gerçek Maliyeti ve Dökümünü Hesaplar.
+        as_of verilirse (normalize_as_of formatında) yakıt o tarihteki fiyattan hesaplanır.
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM vehicles WHERE id = ?", (vehicle_id,))
-        vehicle = cursor.fetchone()
-        if not vehicle: return {}
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM vehicles WHERE id = ?", (vehicle_id,))
+            vehicle = cursor.fetchone()
+            if not vehicle: return {}
 
-        v = dict(vehicle)
+            v = dict(vehicle)
+            if as_of is None:
+                fuel_settings = self._get_fuel_settings()
+            else:
+                fuel_settings = self._fuel_settings_from_prices(self.get_fuel_prices_as_of(as_of))
+            consumables = self.get_vehicle_consumables(vehicle_id)
+            return self._compute_cost(v, consumables, fuel_settings)
 
-        # 1. Yakıt Maliyeti
+    def _resolve_fuel_price(self, yakit_tipi: Optional[str], fuel_settings: Dict) -> float:
+        """Araç yakıt tipine ve ayarlara göre kullanılacak litre fiyatını seçer."""
         # Canlı çekilen fiyatı al (Settings'den)
-        benzin_price = float(self.get_setting('current_benzin_price') or 45.0)
-        motorin_price = float(self.get_setting('current_motorin_price') or 45.0)
-        
+        benzin_price = float(fuel_settings.get('current_benzin_price') or 45.0)
+        motorin_price = float(fuel_settings.get('current_motorin_price') or 45.0)
+
         # Araç yakıt tipine göre fiyat seç
-        yakit_tipi = v.get('yakit_tipi', 'benzin') or 'benzin'
-        fuel_price = motorin_price if yakit_tipi == 'dizel' else benzin_price 
-        
+        yakit_tipi = yakit_tipi or 'benzin'
+        fuel_price = motorin_price if yakit_tipi == 'dizel' else benzin_price
+
         # Manuel Override Kontrolü (Settings'de 'manual_fuel_price' varsa onu kullan)
-        manual_price = self.get_setting('manual_fuel_price')
+        manual_price = fuel_settings.get('manual_fuel_price')
         if manual_price:
             fuel_price = float(manual_price)
+        return fuel_price
+
+    def _compute_cost(self, v: Dict, consumables: List[Dict], fuel_settings: Dict) -> Dict:
+        """
+        Önceden yüklenmiş araç satırı, parçaları ve yakıt ayarlarından maliyet dökümünü üretir.
+        Veritabanına dokunmaz; tekil ve toplu (filo) hesaplamalar aynı formülü kullanır.
+        """
+        vehicle_id = v['id']
+
+        # 1. Yakıt Maliyeti
+        fuel_price = self._resolve_fuel_price(v.get('yakit_tipi', 'benzin'), fuel_settings)
 
         avg_consumption = v.get('ortalama_tuketim_l_100km', 0) or 0
         fuel_cost = (avg_consumption / 100) * fuel_price
@@ -325,7 +415,6 @@ class VehicleManager:
         maintenance_unit_cost = self.div_safely(maint_cost, maint_km)
 
         # 3. Parça Eskime Payı
-        consumables = self.get_vehicle_consumables(vehicle_id)
         consumable_cost = 0.0
         consumable_details = []
         for c in consumables:
@@ -395,63 +484,574 @@ class VehicleManager:
             }
         }
 
+    def _cost_from_engine(self, v: Dict, consumables: List[Dict], engine_out: Dict,
+                          i: int, part_costs: List[float]) -> Dict:
+        """
+        Vektörel motorun (cost_engine) i. araç için ürettiği ham değerleri
+        _compute_cost ile aynı çıktı formatına dönüştürür.
+        """
+        consumable_details = [
+            {
+                "parca_adi": c['parca_adi'],
+                "km_basi_maliyet": round(part_cost, 4),
+                "toplam_maliyet": c['maliyet'],
+                "omur_km": c['omur_km']
+            }
+            for c, part_cost in zip(consumables, part_costs)
+        ]
+        yillik_sigorta = v.get('yillik_sigorta', 0) or 0
+        yillik_mtv = v.get('yillik_mtv', 0) or 0
+        fixed_total = yillik_sigorta + yillik_mtv
+
+        return {
+            "vehicle_id": v['id'],
+            "total_cost_per_km": round(float(engine_out['total_cost_per_km'][i]), 4),
+            "total_fixed_cost_yearly": round(fixed_total, 2),
+            "breakdown": {
+                "fuel_cost": round(float(engine_out['fuel_cost'][i]), 4),
+                "maintenance_cost": round(float(engine_out['maintenance_cost'][i]), 4),
+                "consumable_cost": round(float(engine_out['consumable_cost'][i]), 4),
+                "depreciation_cost": round(float(engine_out['depreciation_cost'][i]), 4),
+                "fixed_cost_per_km": round(float(engine_out['fixed_cost_per_km'][i]), 4)
+            },
+            "consumable_details": consumable_details,
+            "fixed_details": {
+                "yillik_sigorta": yillik_sigorta,
+                "yillik_mtv": yillik_mtv,
+                "yillik_ortalama_km": v.get('yillik_ortalama_km', 15000) or 15000,
+                "total_fixed_yearly": fixed_total
+            },
+            "params": {
+                "fuel_price_used": float(engine_out['fuel_price'][i]),
+                "current_km": v.get('guncel_km', 0) or 0,
+                "avg_consumption": v.get('ortalama_tuketim_l_100km', 0) or 0
+            }
+        }
+
     def list_vehicles(self):
         """Araçları listeler."""
         print("\n🚗 --- KAYITLI ARAÇLAR --- 🚗")
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM vehicles")
-        rows = cursor.fetchall()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM vehicles")
+            rows = cursor.fetchall()
 
-        if not rows:
-            print("Henüz kayıtlı araç yok.")
-            return
+            if not rows:
+                print("Henüz kayıtlı araç yok.")
+                return
 
-        for row in rows:
-            print(f"ID: {row['id']} | {row['marka']} {row['model']}")
-            print("-" * 40)
+            for row in rows:
+                print(f"ID: {row['id']} | {row['marka']} {row['model']}")
+                print("-" * 40)
 
     # --- API YARDIMCI METODLARI ---
 
     def get_all_vehicles(self) -> List[Dict]:
         """Tüm araçları sözlük listesi olarak döndürür."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM vehicles")
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM vehicles")
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    def get_all_vehicles_json(self, fields: Optional[List[str]] = None) -> bytes:
+        """
+        Tüm araçlar doğrudan JSON bayt olarak (ara dict'ler olmadan).
+        fields verilirse iter_vehicles(fields=...) ile aynı alanlar ve id sırası.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            if fields is None:
+                cursor.execute("SELECT * FROM vehicles")
+            else:
+                cursor.execute(f"SELECT {self._vehicle_select_columns(fields)} FROM vehicles ORDER BY id")
+            return rows_to_json(cursor.description, cursor.fetchall())
+
+    def _vehicle_select_columns(self, fields: Optional[List[str]]) -> str:
+        """
+        İstenen alanları doğrular ve SELECT listesi üretir.
+        Keyset sayfalama için 'id' her zaman dahil edilir. Bilinmeyen alan -> ValueError.
+        """
+        if not fields:
+            return "*"
+        unknown = [f for f in fields if f not in VEHICLE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Bilinmeyen alan(lar): {', '.join(unknown)}")
+        selected = ['id'] + [f for f in VEHICLE_COLUMNS if f in fields and f != 'id']
+        return ', '.join(selected)
+
+    def get_vehicles_page(self, after_id: Optional[int] = None, limit: int = 100,
+                          fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Araçları id sırasıyla sayfa sayfa döndürür (keyset pagination).
+        after_id: önceki sayfanın son id'si; OFFSET yerine indeksli aralık taraması yapılır.
+        """
+        columns = self._vehicle_select_columns(fields)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {columns} FROM vehicles WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id if after_id is not None else -1, limit)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def iter_vehicles(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                      fields: Optional[List[str]] = None, batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Araçları tüm listeyi belleğe almadan tek tek üretir (streaming yanıtlar için).
+        Her parti ayrı bir kısa bağlantı kullanımıyla okunur; böylece yavaş bir istemci
+        havuzdaki bir bağlantıyı yanıt boyunca meşgul etmez.
+        """
+        self._vehicle_select_columns(fields)  # alanlar üretici başlamadan (hemen) doğrulanır
+        return self._iter_vehicle_pages(after_id, limit, fields, batch_size)
+
+    def _iter_vehicle_pages(self, after_id: Optional[int], limit: Optional[int],
+                            fields: Optional[List[str]], batch_size: int) -> Iterator[Dict]:
+        remaining = limit
+        last_id = after_id
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            page = self.get_vehicles_page(last_id, size, fields)
+            yield from page
+            if len(page) < size:
+                return
+            last_id = page[-1]['id']
+            if remaining is not None:
+                remaining -= len(page)
 
     def get_vehicle_by_id(self, vehicle_id: int) -> Optional[Dict]:
         """ID'ye göre tek bir araç döndürür."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM vehicles WHERE id=?", (vehicle_id,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM vehicles WHERE id=?", (vehicle_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    # --- AYARLAR (SETTINGS) ÖNBELLEĞİ ---
+    # Ayarlar nadiren değişir (fiyat güncellemesi veya POST /settings); tüm anahtarlar
+    # bir kez yüklenir ve yazma işlemlerinde önbellek yerinde güncellenir (write-through).
+    # Not: Önbellek süreç başınadır; ayarlar başka bir süreçten yazılırsa
+    # invalidate_settings_cache() çağrılmalıdır.
+
+    def _load_settings(self) -> Dict[str, str]:
+        """Önbellek boşsa tüm ayarları tek sorguda yükler."""
+        with self._settings_lock:
+            if self._settings_cache is None:
+                self.settings_cache_misses += 1
+                with self.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT key, value FROM settings")
+                    self._settings_cache = {row['key']: row['value'] for row in cursor.fetchall()}
+            else:
+                self.settings_cache_hits += 1
+            return self._settings_cache
+
+    def _update_settings_cache(self, updates: Dict[str, str]):
+        """Veritabanına yazılan değerleri önbelleğe de yansıtır."""
+        with self._settings_lock:
+            if self._settings_cache is not None:
+                self._settings_cache.update(updates)
+        # Yakıt fiyatı değiştiyse tüm araçların maliyet sonuçları geçersizdir
+        if FUEL_SETTING_KEYS.intersection(updates):
+            self.result_cache.clear()
+
+    def invalidate_settings_cache(self):
+        """Önbelleği boşaltır; bir sonraki okuma veritabanından yapılır."""
+        with self._settings_lock:
+            self._settings_cache = None
+        self.result_cache.clear()
+
+    def settings_cache_stats(self) -> Dict:
+        """Ayar önbelleği isabet (hit) / ıskalama (miss) sayaçları."""
+        total = self.settings_cache_hits + self.settings_cache_misses
+        return {
+            "hits": self.settings_cache_hits,
+            "misses": self.settings_cache_misses,
+            "hit_ratio": round(self.settings_cache_hits / total, 4) if total else 0.0
+        }
+
+    def cache_stats(self) -> Dict[str, tuple]:
+        """Önbelleklerin (isabet, ıska) sayıları; /metrics tarafından okunur."""
+        return {
+            "result": (self.result_cache.hits, self.result_cache.misses),
+            "settings": (self.settings_cache_hits, self.settings_cache_misses)
+        }
+
+    def _upsert_settings(self, cursor: sqlite3.Cursor, updates: Dict[str, str]) -> int:
+        """
+        Ayarları yazar; değeri aynı kalan satırlara dokunulmaz (değişiklik sayacı tetikleyicileri
+        çalışmaz, ETag'ler geçerli kalır). Değişen / eklenen satır sayısını döndürür.
+        """
+        cursor.executemany("""
+            INSERT INTO settings (key, value) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value WHERE value IS NOT excluded.value
+        """, list(updates.items()))
+        return cursor.rowcount
 
     def get_setting(self, key: str) -> Optional[str]:
-        """Ayarlardan bir değer okur."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
-        row = cursor.fetchone()
-        return row['value'] if row else None
+        """Ayarlardan bir değer okur (önbellekten)."""
+        return self._load_settings().get(key)
+
+    def set_setting(self, key: str, value: str) -> bool:
+        """Ayarlara bir değer yazar (varsa üzerine yazar)."""
+        try:
+            changed = 0
+            def write_setting(cursor):
+                nonlocal changed
+                changed = self._upsert_settings(cursor, {key: value})
+                if changed and key in FUEL_SETTING_KEYS:
+                    self._refresh_summary_fuel_prices(cursor)
+
+            self._write(write_setting)
+            if changed:
+                self._update_settings_cache({key: value})
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Ayar kaydetme hatası: {e}")
+            return False
+
+    # --- MALİYET ÖZETİ (vehicle_cost_summary) ---
+
+    def _refresh_summary_fuel_prices(self, cursor: sqlite3.Cursor):
+        """Yakıt ayarı değişti: tüm özet satırlarının yakıt fiyatı tek toplu UPDATE ile yenilenir."""
+        cursor.execute(f"UPDATE vehicle_cost_summary SET fuel_price = {fuel_price_sql('fuel_type')}")
+
+    def get_cost_summaries(self, vehicle_ids: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Önceden hesaplanmış km maliyeti dökümleri (id sırasıyla). Parça/sabit gider
+        detayları içermez; detay için calculate_total_km_cost kullanılır.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            if vehicle_ids is None:
+                cursor.execute("SELECT * FROM vehicle_cost_summary ORDER BY vehicle_id")
+            else:
+                cursor.execute(
+                    "SELECT * FROM vehicle_cost_summary WHERE vehicle_id IN (SELECT value FROM json_each(?)) "
+                    "ORDER BY vehicle_id",
+                    (json.dumps([int(i) for i in vehicle_ids]),)
+                )
+            rows = cursor.fetchall()
+
+        # + 0.0: artımlı toplamlardaki -0.0'ı temizler
+        return [{
+            "vehicle_id": row['vehicle_id'],
+            "total_cost_per_km": round(row['total_cost_per_km'], 4) + 0.0,
+            "total_fixed_cost_yearly": round(row['total_fixed_yearly'], 2),
+            "breakdown": {
+                "fuel_cost": round(row['fuel_cost'], 4),
+                "maintenance_cost": round(row['maintenance_cost'], 4),
+                "consumable_cost": round(row['consumable_cost'], 4) + 0.0,
+                "depreciation_cost": round(row['depreciation_cost'], 4),
+                "fixed_cost_per_km": round(row['fixed_cost_per_km'], 4)
+            },
+            "params": {
+                "fuel_price_used": row['fuel_price'],
+                "avg_consumption": row['consumption']
+            }
+        } for row in rows]
+
+    def get_cost_summary_totals(self) -> Dict:
+        """Filo geneli ortalama km maliyeti ve bileşenleri (özet tablosunun tek taraması)."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) AS vehicle_count,
+                       AVG(total_cost_per_km) AS avg_cost_per_km,
+                       AVG(fuel_cost) AS avg_fuel_cost,
+                       AVG(maintenance_cost) AS avg_maintenance_cost,
+                       AVG(consumable_cost) AS avg_consumable_cost,
+                       AVG(depreciation_cost) AS avg_depreciation_cost,
+                       AVG(fixed_cost_per_km) AS avg_fixed_cost_per_km,
+                       SUM(total_fixed_yearly) AS total_fixed_yearly
+                FROM vehicle_cost_summary
+            """)
+            row = dict(cursor.fetchone())
+        return {k: (round(v, 4) if isinstance(v, float) else (v or 0)) for k, v in row.items()}
+
+    def rebuild_cost_summary(self) -> bool:
+        """Özet tablosunu baştan hesaplar (artımlı güncellemelerde biriken yuvarlama farkları için)."""
+        try:
+            self._write(rebuild_cost_summary)
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Maliyet özeti yeniden hesaplanamadı: {e}")
+            return False
+
+    # --- DEĞİŞİKLİK SAYAÇLARI (ETag) ---
+
+    def get_versions(self, keys: List[int]) -> Dict[int, int]:
+        """
+        Anahtarların değişiklik sayaçları (tek birincil anahtar sorgusu). Tetikleyicilerle
+        artırılır; hiç değişmemiş anahtar 0 döner.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT entity_key, version FROM entity_versions WHERE entity_key IN (SELECT value FROM json_each(?))",
+                (json.dumps([int(k) for k in keys]),)
+            )
+            found = {row['entity_key']: row['version'] for row in cursor.fetchall()}
+        return {k: found.get(k, 0) for k in keys}
+
+    # --- FİLO ANALİTİĞİ ---
+
+    def _analytics_group_columns(self, group_by: Optional[List[str]]) -> List[str]:
+        columns = []
+        for key in group_by or []:
+            if key not in ANALYTICS_GROUPS:
+                raise ValueError(f"Geçersiz gruplama: {key} (izin verilenler: {', '.join(ANALYTICS_GROUPS)})")
+            columns += [c for c in ANALYTICS_GROUPS[key] if c not in columns]
+        return columns
+
+    @timed
+    def get_cost_analytics(self, group_by: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Km maliyeti istatistikleri (ortalama / min / max, bileşen ortalamaları, yıllık
+        sabit gider toplamı). group_by verilmezse tek satır: filo geneli.
+        Toplama SQL'de, özet tablosu üzerinde yapılır.
+        """
+        columns = self._analytics_group_columns(group_by)
+        group_sql = ", ".join(f"v.{c}" for c in columns)
+        query = f"""
+            SELECT {''.join(f'v.{c} AS {c}, ' for c in columns)}
+                   COUNT(*) AS vehicle_count,
+                   AVG(s.total_cost_per_km) AS avg_cost_per_km,
+                   MIN(s.total_cost_per_km) AS min_cost_per_km,
+                   MAX(s.total_cost_per_km) AS max_cost_per_km,
+                   AVG(s.fuel_cost) AS avg_fuel_cost,
+                   AVG(s.maintenance_cost) AS avg_maintenance_cost,
+                   AVG(s.consumable_cost) AS avg_consumable_cost,
+                   AVG(s.depreciation_cost) AS avg_depreciation_cost,
+                   AVG(s.fixed_cost_per_km) AS avg_fixed_cost_per_km,
+                   SUM(s.total_fixed_yearly) AS total_fixed_yearly
+            FROM vehicle_cost_summary s
+            {'JOIN vehicles v ON v.id = s.vehicle_id' if columns else ''}
+            {f'GROUP BY {group_sql} ORDER BY {group_sql}' if columns else ''}
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            rows = cursor.fetchall()
+
+        result = []
+        for row in rows:
+            item = {"group": {c: row[c] for c in columns}}
+            for key in row.keys()[len(columns):]:
+                value = row[key] or 0
+                if isinstance(value, float):
+                    value = round(value, 2 if key == 'total_fixed_yearly' else 4) + 0.0
+                item[key] = value
+            result.append(item)
+        return result
+
+    @timed
+    def get_cost_percentiles(self, percentiles: List[float] = (50, 90, 95, 99),
+                             group_by: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Km maliyeti dağılımı (nearest-rank yüzdelikler). Filo geneli için her yüzdelik
+        total_cost_per_km indeksinde tek OFFSET okumasıdır; gruplu sorguda pencere
+        fonksiyonlarıyla sadece istenen sıradaki satırlar döner.
+        """
+        if not percentiles or any(not 0 < p <= 100 for p in percentiles):
+            raise ValueError("Yüzdelikler 0 ile 100 arasında olmalı (0 hariç).")
+        columns = self._analytics_group_columns(group_by)
+        labels = [f"p{p:g}" for p in percentiles]
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            if not columns:
+                cursor.execute("SELECT COUNT(*) FROM vehicle_cost_summary")
+                count = cursor.fetchone()[0]
+                if count == 0:
+                    return []
+                values = {}
+                for label, p in zip(labels, percentiles):
+                    cursor.execute(
+                        "SELECT total_cost_per_km FROM vehicle_cost_summary "
+                        "ORDER BY total_cost_per_km LIMIT 1 OFFSET ?",
+                        (max(1, math.ceil(count * p / 100)) - 1,)
+                    )
+                    values[label] = round(cursor.fetchone()[0], 4) + 0.0
+                return [{"group": {}, "vehicle_count": count, "percentiles": values}]
+
+            # Sıra = ceil(n * p / 100), en az 1 (SQLite'ta ceil her derlemede yok)
+            ranks = [f"MAX(1, CAST(cnt * :p{i} / 100.0 AS INTEGER) + "
+                     f"(cnt * :p{i} / 100.0 > CAST(cnt * :p{i} / 100.0 AS INTEGER)))"
+                     for i in range(len(percentiles))]
+            partition = ", ".join(f"v.{c}" for c in columns)
+            cursor.execute(f"""
+                SELECT {', '.join(columns)}, total, rn, cnt FROM (
+                    SELECT {', '.join(f'v.{c} AS {c}' for c in columns)},
+                           s.total_cost_per_km AS total,
+                           ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY s.total_cost_per_km) AS rn,
+                           COUNT(*) OVER (PARTITION BY {partition}) AS cnt
+                    FROM vehicle_cost_summary s JOIN vehicles v ON v.id = s.vehicle_id
+                )
+                WHERE rn IN ({', '.join(ranks)})
+                ORDER BY {', '.join(columns)}, rn
+            """, {f"p{i}": float(p) for i, p in enumerate(percentiles)})
+            rows = cursor.fetchall()
+
+        groups: Dict[tuple, Dict] = {}
+        for row in rows:
+            key = tuple(row[c] for c in columns)
+            item = groups.setdefault(key, {"group": dict(zip(columns, key)), "vehicle_count": row['cnt'],
+                                           "percentiles": {}})
+            for label, p in zip(labels, percentiles):
+                if max(1, math.ceil(row['cnt'] * p / 100)) == row['rn']:
+                    item["percentiles"][label] = round(row['total'], 4) + 0.0
+        return list(groups.values())
+
+    @timed
+    def get_monthly_service_spend(self, start_month: Optional[str] = None, end_month: Optional[str] = None,
+                                  vehicle_ids: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Ay bazında servis harcaması. start_month / end_month: 'YYYY-MM' (dahil).
+        Filo geneli service_spend_monthly özet tablosundan okunur; vehicle_ids verilirse
+        o araçların kayıtları vehicle_id indeksiyle toplanır.
+        """
+        for month in (start_month, end_month):
+            if month and not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", month):
+                raise ValueError(f"Ay 'YYYY-AA' biçiminde olmalı: {month}")
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            if vehicle_ids is None:
+                cursor.execute("""
+                    SELECT month, log_count, total_spend FROM service_spend_monthly
+                    WHERE month >= COALESCE(?, '') AND month <= COALESCE(?, '9999-12')
+                    ORDER BY month
+                """, (start_month, end_month))
+            else:
+                cursor.execute("""
+                    SELECT substr(tarih, 1, 7) AS month, COUNT(*) AS log_count,
+                           SUM(COALESCE(toplam_maliyet, 0)) AS total_spend
+                    FROM service_logs
+                    WHERE vehicle_id IN (SELECT value FROM json_each(?))
+                      AND substr(tarih, 1, 7) >= COALESCE(?, '') AND substr(tarih, 1, 7) <= COALESCE(?, '9999-12')
+                    GROUP BY month
+                    ORDER BY month
+                """, (json.dumps([int(i) for i in vehicle_ids]), start_month, end_month))
+            rows = cursor.fetchall()
+
+        return [{
+            "month": row['month'],
+            "log_count": row['log_count'],
+            "total_spend": round(row['total_spend'], 2) + 0.0,
+            "avg_spend": round(self.div_safely(row['total_spend'], row['log_count']), 2)
+        } for row in rows]
+
+    # --- KİLOMETRE (ODOMETRE) OKUMALARI ---
+
+    def apply_odometer_readings(self, readings: Dict[int, tuple], warning_threshold_km: int = 500) -> Dict:
+        """
+        Araç başına birleştirilmiş son okumaları ({vehicle_id: (ts, km)}) tek transaction'da yazar:
+        araç başına tek UPDATE ve saatlik geçmiş satırı. Kayıtlı okumadan eski (ts) veya
+        düşük (km) okumalar ile bilinmeyen araçlar atlanır.
+        Bir parça veya periyodik bakım eşiğini (uyarı eşiği ya da bitiş km'si) geçen araçların
+        uyarıları yeniden hesaplanır; diğerlerinin sadece önbelleği temizlenir.
+        Returns: {"updated": int, "stale": int, "unknown": int, "crossed": {vehicle_id: uyarılar}}
+        """
+        if not readings:
+            return {"updated": 0, "stale": 0, "unknown": 0, "crossed": {}}
+
+        def write_readings(cursor):
+            cursor.execute("""
+                SELECT id, COALESCE(guncel_km, 0) AS guncel_km, km_updated_at,
+                       COALESCE(son_bakim_km, 0) + COALESCE(NULLIF(bakim_araligi, 0), 2000) AS gelecek_bakim_km
+                FROM vehicles WHERE id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(list(readings)),))
+            current = {row['id']: row for row in cursor.fetchall()}
+
+            moves, stale = [], 0
+            for vehicle_id, (ts, km) in readings.items():
+                row = current.get(vehicle_id)
+                if row is None:
+                    continue
+                if km < row['guncel_km'] or (row['km_updated_at'] is not None and ts <= row['km_updated_at']):
+                    stale += 1
+                    continue
+                moves.append((vehicle_id, row['guncel_km'], km, ts, row['gelecek_bakim_km']))
+
+            cursor.executemany("UPDATE vehicles SET guncel_km = ?, km_updated_at = ? WHERE id = ?",
+                               [(km, ts, vehicle_id) for vehicle_id, _, km, ts, _ in moves])
+            cursor.executemany("""
+                INSERT INTO odometer_readings (vehicle_id, hour, ts, km) VALUES (?, substr(?, 1, 13), ?, ?)
+                ON CONFLICT (vehicle_id, hour) DO UPDATE SET ts = excluded.ts, km = excluded.km
+                WHERE excluded.ts > ts
+            """, [(vehicle_id, ts, ts, km) for vehicle_id, _, km, ts, _ in moves])
+
+            # Eşik geçişi: (eski, yeni] aralığına bitiş km'si veya uyarı noktası (bitiş - eşik) düşen parça
+            crossed = {vehicle_id for vehicle_id, old_km, new_km, _, gelecek_bakim_km in moves
+                       if old_km < gelecek_bakim_km - warning_threshold_km <= new_km
+                       or old_km < gelecek_bakim_km <= new_km}
+            cursor.execute("""
+                SELECT DISTINCT c.vehicle_id
+                FROM json_each(:moves) m
+                CROSS JOIN consumables c
+                  ON c.vehicle_id = json_extract(m.value, '$[0]')
+                 AND ((c.bitis_km > json_extract(m.value, '$[1]') + :threshold
+                       AND c.bitis_km <= json_extract(m.value, '$[2]') + :threshold)
+                   OR (c.bitis_km > json_extract(m.value, '$[1]') AND c.bitis_km <= json_extract(m.value, '$[2]')))
+            """, {"moves": json.dumps([m[:3] for m in moves]), "threshold": warning_threshold_km})
+            crossed.update(row[0] for row in cursor.fetchall())
+            return [m[0] for m in moves], stale, crossed
+
+        updated, stale, crossed = self._write(write_readings)
+        for vehicle_id in updated:
+            self.result_cache.invalidate_vehicle(vehicle_id)
+
+        # Eşik geçen araçların uyarıları tek sorguyla (parça + bakım satırları)
+        warnings = {vehicle_id: [] for vehicle_id in sorted(crossed)}
+        if crossed:
+            for warning in self.get_fleet_warnings(warning_threshold_km, limit=-1, vehicle_ids=list(crossed)):
+                warnings[warning["vehicle_id"]].append(warning)
+        return {
+            "updated": len(updated),
+            "stale": stale,
+            "unknown": len(readings) - len(updated) - stale,
+            "crossed": warnings
+        }
+
+    def get_odometer_history(self, vehicle_id: int, start: Optional[str] = None,
+                             end: Optional[str] = None) -> List[Dict]:
+        """Aracın saatlik km geçmişi (eskiden yeniye)."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT ts, km FROM odometer_readings
+                WHERE vehicle_id = ? AND ts >= COALESCE(?, '') AND ts <= COALESCE(?, '9999')
+                ORDER BY hour
+            """, (vehicle_id, start, end))
+            return [dict(row) for row in cursor.fetchall()]
 
     # --- SERVİS TAKİBİ FONKSİYONLARI ---
 
     def add_service_log(self, vehicle_id: int, tarih: str, km: int, 
                         yapilan_islemler: str, toplam_maliyet: float, 
                         degisen_parcalar: Optional[str] = None) -> int:
-        """Yeni servis kaydı ekler."""
+        """
+        Yeni servis kaydı ekler. Değişen parçalar service_log_parts'a yazılır; adı eşleşen
+        parçaların degisim_km'si aynı transaction'da servis km'sine çekilir.
+        """
         try:
             query = """
                 INSERT INTO service_logs (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet, degisen_parcalar)
                 VALUES (?, ?, ?, ?, ?, ?)
             """
-            cursor = self.conn.cursor()
-            cursor.execute(query, (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet, degisen_parcalar))
-            log_id = cursor.lastrowid
-            
-            # Aracın son bakım km'sini güncelle
-            cursor.execute("UPDATE vehicles SET son_bakim_km = ? WHERE id = ?", (km, vehicle_id))
-            
-            self.conn.commit()
+            def insert_service_log(cursor):
+                cursor.execute(query, (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet, degisen_parcalar))
+                log_id = cursor.lastrowid
+                # Aracın son bakım km'sini güncelle
+                cursor.execute("UPDATE vehicles SET son_bakim_km = ? WHERE id = ?", (km, vehicle_id))
+                record_replaced_parts(cursor, [(log_id, vehicle_id, km, tarih, degisen_parcalar)])
+                return log_id
+
+            log_id = self._write(insert_service_log)
+            # son_bakim_km / degisim_km değişti: bakım durumu ve uyarılar yeniden hesaplanmalı
+            self.result_cache.invalidate_vehicle(vehicle_id)
             return log_id
         except sqlite3.Error as e:
             print(f"❌ Servis kaydı ekleme hatası: {e}")
@@ -459,21 +1059,32 @@ class VehicleManager:
 
     def get_service_logs(self, vehicle_id: int) -> List[Dict]:
         """Araca ait servis kayıtlarını getirir."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM service_logs WHERE vehicle_id = ? ORDER BY tarih DESC, km DESC", (vehicle_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM service_logs WHERE vehicle_id = ? ORDER BY tarih DESC, km DESC", (vehicle_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_service_logs_json(self, vehicle_id: int) -> bytes:
+        """get_service_logs ile aynı liste, doğrudan JSON bayt olarak (API yanıtı için)."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("SELECT * FROM service_logs WHERE vehicle_id = ? ORDER BY tarih DESC, km DESC", (vehicle_id,))
+            return rows_to_json(cursor.description, cursor.fetchall())
 
     def delete_service_log(self, log_id: int) -> bool:
         """Servis kaydını siler."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM service_logs WHERE id = ?", (log_id,))
-            self.conn.commit()
+            def delete_service_log_row(cursor):
+                cursor.execute("DELETE FROM service_logs WHERE id = ?", (log_id,))
+
+            self._write(delete_service_log_row)
             return True
         except sqlite3.Error as e:
             print(f"❌ Servis kaydı silme hatası: {e}")
             return False
 
+    @cached_per_vehicle
     def get_maintenance_status(self, vehicle_id: int) -> Dict:
         """
         Bakım durumu bilgilerini hesaplar.
@@ -485,7 +1096,10 @@ class VehicleManager:
         vehicle = self.get_vehicle_by_id(vehicle_id)
         if not vehicle:
             return {}
-        
+        return self._maintenance_status_from(vehicle)
+
+    def _maintenance_status_from(self, vehicle: Dict) -> Dict:
+        """Önceden yüklenmiş araç satırından bakım durumunu hesaplar."""
         son_bakim_km = vehicle.get('son_bakim_km', 0) or 0
         bakim_araligi = vehicle.get('bakim_araligi', 2000) or 2000
         guncel_km = vehicle.get('guncel_km', 0) or 0
@@ -506,6 +1120,7 @@ class VehicleManager:
             "ilerleme_yuzdesi": round(ilerleme_yuzdesi, 1)
         }
 
+    @cached_per_vehicle
     def get_critical_warnings(self, vehicle_id: int, warning_threshold_km: int = 500) -> List[Dict]:
         """
         Kritik parça uyarılarını kontrol eder.
@@ -514,9 +1129,12 @@ class VehicleManager:
         vehicle = self.get_vehicle_by_id(vehicle_id)
         if not vehicle:
             return []
-        
-        guncel_km = vehicle.get('guncel_km', 0) or 0
         consumables = self.get_vehicle_consumables(vehicle_id)
+        return self._warnings_from(vehicle, consumables, warning_threshold_km)
+
+    def _warnings_from(self, vehicle: Dict, consumables: List[Dict], warning_threshold_km: int = 500) -> List[Dict]:
+        """Önceden yüklenmiş araç ve parça satırlarından kritik uyarıları üretir."""
+        guncel_km = vehicle.get('guncel_km', 0) or 0
         warnings = []
         
         for c in consumables:
@@ -537,7 +1155,7 @@ class VehicleManager:
                 })
         
         # Bakım uyarısı da ekle
-        maint_status = self.get_maintenance_status(vehicle_id)
+        maint_status = self._maintenance_status_from(vehicle)
         if maint_status.get('kalan_km', 1000) <= warning_threshold_km:
             warnings.append({
                 "parca_id": None,
@@ -549,6 +1167,502 @@ class VehicleManager:
         
         return warnings
 
+    @timed
+    def get_fleet_warnings(self, warning_threshold_km: int = 500, limit: int = 100,
+                           after: Optional[tuple] = None, include_maintenance: bool = True,
+                           vehicle_ids: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Tüm filoda ömrünün bitmesine warning_threshold_km'den az kalan parçalar (ve
+        istenirse yaklaşan bakımlar), kalan km'ye göre artan sırada, tek sorguyla.
+        Parçalar (vehicle_id, bitis_km) indeksinden araç başına aralık taramasıyla okunur.
+        after: önceki sayfanın son satırının sıralama anahtarı
+               (kalan_omur_km, vehicle_id, parca_id; bakım satırı için parca_id 0)
+        """
+        params = {"threshold": warning_threshold_km, "limit": limit}
+        vehicle_filter = ""
+        if vehicle_ids is not None:
+            vehicle_filter = "AND v.id IN (SELECT value FROM json_each(:ids))"
+            params["ids"] = json.dumps([int(i) for i in vehicle_ids])
+
+        maintenance_query = ""
+        if include_maintenance:
+            # _maintenance_status_from ile aynı varsayılanlar
+            next_service_km = "COALESCE(v.son_bakim_km, 0) + COALESCE(NULLIF(v.bakim_araligi, 0), 2000)"
+            maintenance_query = f"""
+                UNION ALL
+                SELECT v.id, v.marka, v.model, 0, 'Periyodik Bakım', {next_service_km},
+                       {next_service_km} - COALESCE(v.guncel_km, 0)
+                FROM vehicles v
+                WHERE {next_service_km} <= COALESCE(v.guncel_km, 0) + :threshold {vehicle_filter}
+            """
+
+        page_filter = ""
+        if after is not None:
+            page_filter = "WHERE (kalan_omur_km, vehicle_id, parca_id) > (:after_kalan, :after_vehicle, :after_parca)"
+            params.update(after_kalan=after[0], after_vehicle=after[1], after_parca=after[2])
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT v.id AS vehicle_id, v.marka, v.model, c.id AS parca_id, c.parca_adi, c.bitis_km,
+                           c.bitis_km - COALESCE(v.guncel_km, 0) AS kalan_omur_km
+                    -- CROSS JOIN sırayı sabitler: dış döngü araçlar, iç döngü indeks aralığı
+                    FROM vehicles v
+                    CROSS JOIN consumables c
+                      ON c.vehicle_id = v.id AND c.bitis_km <= COALESCE(v.guncel_km, 0) + :threshold
+                    WHERE 1 {vehicle_filter}
+                    {maintenance_query}
+                )
+                {page_filter}
+                ORDER BY kalan_omur_km, vehicle_id, parca_id
+                LIMIT :limit
+            """, params)
+            rows = cursor.fetchall()
+
+        return [{
+            "vehicle_id": row["vehicle_id"],
+            "marka": row["marka"],
+            "model": row["model"],
+            "parca_id": row["parca_id"] or None,
+            "parca_adi": row["parca_adi"],
+            "kalan_omur_km": row["kalan_omur_km"],
+            "bitis_km": row["bitis_km"],
+            "kritik": row["kalan_omur_km"] <= 0
+        } for row in rows]
+
+    # --- SERVİS KAYDI ARAMASI (FTS5) ---
+
+    @staticmethod
+    def _search_match_query(text: str) -> str:
+        """
+        Serbest metni güvenli bir FTS5 sorgusuna çevirir: kelimelerin hepsi aranır (VE),
+        '*' ile biten kelime ön ek olarak eşleşir (örn. "zincir*" -> zinciri, zincirin).
+        FTS5 operatörleri / tırnaklar kelime olarak ele alınır. Kelime yoksa ValueError.
+        """
+        terms = _SEARCH_TERM.findall(text.replace('ı', 'i'))
+        if not terms:
+            raise ValueError("Arama metni en az bir kelime içermeli.")
+        return " ".join(f'"{t.rstrip("*")}"' + ("*" if t.endswith("*") else "") for t in terms)
+
+    @timed
+    def search_service_logs(self, text: str, vehicle_ids: Optional[List[int]] = None,
+                            start: Optional[str] = None, end: Optional[str] = None,
+                            limit: int = 20, offset: int = 0) -> Optional[Dict]:
+        """
+        Servis kayıtlarında (yapilan_islemler, degisen_parcalar) tam metin arama, bm25 ile sıralı.
+        start / end: servis tarihi aralığı (YYYY-MM-DD, dahil).
+        Araç filtresiyle veya en fazla SEARCH_CANDIDATES eşleşen kayıtta tüm eşleşmeler sıralanır.
+        Filtresiz ve daha yaygın terimlerde, her eşleşme için sıralama maliyeti olmasın diye en
+        yeni SEARCH_CANDIDATES eşleşme sıralanır ve truncated True döner (daha eski kayıtlar
+        sonuçlarda yer almaz).
+        Returns: {"items": [...], "truncated": bool}. Geçersiz metin -> ValueError;
+        arama indeksi yoksa (FTS5) None. Diğer veritabanı hataları yükseltilir.
+        """
+        params = {"q": self._search_match_query(text), "start": start, "end": end,
+                  "limit": limit, "offset": offset, "candidates": SEARCH_CANDIDATES}
+        date_filter = "AND s.tarih >= COALESCE(:start, '') AND s.tarih <= COALESCE(:end, '9999')"
+        columns = """
+            s.id, s.vehicle_id, s.tarih, s.km, s.yapilan_islemler, s.degisen_parcalar, s.toplam_maliyet,
+            snippet(service_logs_fts, -1, '[', ']', '…', 12) AS snippet,
+            -bm25(service_logs_fts) AS score
+        """
+        matched = f"""
+            FROM service_logs_fts f
+            CROSS JOIN service_logs s ON s.id = f.rowid
+            WHERE service_logs_fts MATCH :q {date_filter}
+        """
+        if vehicle_ids is not None:
+            # Araçların kayıt id'leri bir kez okunur, eşleşme listesi tek geçişte bu kümeyle süzülür.
+            # "+" FTS5'in her id için ayrı arama (rowid = ?) yapmasını engeller: yaygın terimlerde
+            # her arama terimin tüm listesini yeniden okur.
+            params["ids"] = json.dumps([int(i) for i in vehicle_ids])
+            matched += "AND +f.rowid IN (SELECT id FROM service_logs WHERE vehicle_id IN (SELECT value FROM json_each(:ids)))"
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                truncated = False
+                if vehicle_ids is None:
+                    # Seçici terimde eşleşmelerin hepsi sıralanır; sayım SEARCH_CANDIDATES + 1'de durur
+                    cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 {matched} LIMIT :candidates + 1)", params)
+                    truncated = cursor.fetchone()[0] > SEARCH_CANDIDATES
+                if truncated:
+                    # FTS5 eşleşmeleri rowid sırasıyla (yeniden eskiye) üretir; LIMIT ile tarama erken biter
+                    matches = f"SELECT {columns} {matched} ORDER BY f.rowid DESC LIMIT :candidates"
+                else:
+                    matches = f"SELECT {columns} {matched}"
+                cursor.execute(f"""
+                    SELECT m.*, v.marka, v.model
+                    FROM ({matches}) m
+                    LEFT JOIN vehicles v ON v.id = m.vehicle_id
+                    ORDER BY m.score DESC, m.id DESC
+                    LIMIT :limit OFFSET :offset
+                """, params)
+                return {"items": [dict(row) for row in cursor.fetchall()], "truncated": truncated}
+        except sqlite3.OperationalError as e:
+            if any(message in str(e) for message in SEARCH_UNAVAILABLE_ERRORS):
+                print(f"❌ Servis kaydı arama indeksi kullanılamıyor: {e}")
+                return None
+            print(f"❌ Servis kaydı araması yapılamadı: {e}")
+            raise
+
+    def rebuild_service_log_search(self) -> bool:
+        """Arama indeksini service_logs'tan baştan oluşturur (ilk kurulum, FTS5 sonradan gelmişse / onarım)."""
+        try:
+            return self._write(rebuild_service_log_search)
+        except sqlite3.Error as e:
+            print(f"❌ Arama indeksi yeniden oluşturulamadı: {e}")
+            return False
+
+    # --- PARÇA DEĞİŞİMLERİ (service_log_parts) ---
+    # Gözlenen ömür: aynı araçta aynı parçanın ardışık iki değişimi arasındaki km / gün.
+
+    @timed
+    def get_part_replacement_stats(self, parca: Optional[str] = None,
+                                   vehicle_ids: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Parça bazında değişim sıklığı ve gözlenen ortalama ömür (km / gün), en sık değişen önce.
+        configured_omur_km: kayıtların bağlı olduğu parçalarda tanımlı ömür (araç başına ortalama).
+        parca: tek parça (büyük/küçük harf ve Türkçe karakter duyarsız); vehicle_ids: araç filtresi.
+        part_replacement_summary'den (parça, araç) başına tek satır okunur: ardışık farkların
+        toplamı son - ilk km'dir, aralık sayısı farklı km sayısının bir eksiği (aynı km'deki
+        tekrar kayıtlar ömre katılmaz).
+        """
+        conditions, params = [], {}
+        if parca is not None:
+            conditions.append("s.parca_key = :key")
+            params["key"] = part_key(parca)
+        if vehicle_ids is not None:
+            conditions.append("s.vehicle_id IN (SELECT value FROM json_each(:ids))")
+            params["ids"] = json.dumps([int(i) for i in vehicle_ids])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT s.parca_key,
+                       (SELECT parca_adi FROM service_log_parts WHERE parca_key = s.parca_key LIMIT 1) AS parca_adi,
+                       SUM(s.replacements) AS replacements, COUNT(*) AS vehicles,
+                       SUM(s.intervals) AS observed_lifetimes,
+                       SUM(s.last_km - s.first_km) * 1.0 / NULLIF(SUM(s.intervals), 0) AS avg_lifetime_km,
+                       SUM(julianday(s.last_tarih) - julianday(s.first_tarih)) / NULLIF(SUM(s.intervals), 0)
+                           AS avg_lifetime_days,
+                       AVG(c.omur_km) AS configured_omur_km
+                FROM part_replacement_summary s
+                LEFT JOIN consumables c ON c.id = s.consumable_id
+                {where}
+                GROUP BY s.parca_key
+                ORDER BY replacements DESC, s.parca_key
+            """, params)
+            rows = cursor.fetchall()
+
+        def rounded(value, digits=None):
+            return None if value is None else round(value, digits)
+
+        return [{
+            "parca_adi": row['parca_adi'],
+            "parca_key": row['parca_key'],
+            "replacements": row['replacements'],
+            "vehicles": row['vehicles'],
+            "observed_lifetimes": row['observed_lifetimes'],
+            "avg_lifetime_km": rounded(row['avg_lifetime_km']),
+            "avg_lifetime_days": rounded(row['avg_lifetime_days'], 1),
+            "configured_omur_km": rounded(row['configured_omur_km'])
+        } for row in rows]
+
+    def get_vehicle_part_replacements(self, vehicle_id: int, parca: Optional[str] = None) -> List[Dict]:
+        """
+        Aracın parça değişimleri (parça, km sırasıyla). lifetime_km / lifetime_days: aynı parçanın
+        önceki değişiminden bu yana (ilk değişimde None). consumable_id: eşleşen parça (yoksa None).
+        """
+        key_filter = "AND p.parca_key = ?" if parca is not None else ""
+        params = (vehicle_id, part_key(parca)) if parca is not None else (vehicle_id,)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT p.parca_adi, p.parca_key, p.tarih, p.km, p.service_log_id, p.consumable_id,
+                       p.km - LAG(p.km) OVER w AS lifetime_km,
+                       CAST(julianday(p.tarih) - julianday(LAG(p.tarih) OVER w) AS INTEGER) AS lifetime_days
+                FROM service_log_parts p
+                WHERE p.vehicle_id = ? {key_filter}
+                WINDOW w AS (PARTITION BY p.parca_key ORDER BY p.km)
+                ORDER BY p.parca_key, p.km
+            """, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def rebuild_service_log_parts(self) -> bool:
+        """Değişen parçalar ve özet tablosunu servis kayıtlarından baştan oluşturur (parça eşleştirmeleri yenilenir)."""
+        try:
+            self._write(rebuild_service_log_parts)
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Değişen parçalar tablosu yeniden oluşturulamadı: {e}")
+            return False
+
+    # --- MALİYET PROJEKSİYONU ---
+
+    @timed
+    @cached_per_vehicle
+    def project_costs(self, vehicle_id: int, years: Optional[float] = None) -> Dict:
+        """
+        Aracın gelecek_km'ye (veya years yıl boyunca) kümülatif maliyet projeksiyonu.
+        Araç yoksa {} döner; ufuk belirlenemezse ValueError (bkz. projection.resolve_horizon).
+        """
+        vehicle = self.get_vehicle_by_id(vehicle_id)
+        if not vehicle:
+            return {}
+        consumables = self.get_vehicle_consumables(vehicle_id)
+        fuel_price = self._resolve_fuel_price(vehicle.get('yakit_tipi'), self._get_fuel_settings())
+        return projection.project_vehicle(vehicle, consumables, fuel_price, years=years)
+
+    @timed
+    def get_fleet_projections(self, vehicle_ids: Optional[List[int]] = None,
+                              years: float = 10) -> List[Dict]:
+        """
+        Filo için N yıllık projeksiyon özetleri (olay listesi olmadan).
+        Araçlar ve parçalar sabit sayıda sorguyla yüklenir.
+        """
+        with self.pool.connection() as conn:
+            vehicles = self._load_vehicles_with_consumables(conn.cursor(), vehicle_ids)
+        fuel_settings = self._get_fuel_settings()
+        return [
+            projection.project_vehicle(
+                v, consumables, self._resolve_fuel_price(v.get('yakit_tipi'), fuel_settings),
+                years=years, include_events=False
+            )
+            for v, consumables in vehicles
+        ]
+
+    # --- YAKIT FİYATI GEÇMİŞİ ---
+
+    def get_fuel_prices_as_of(self, as_of: str) -> Dict[str, Optional[float]]:
+        """
+        Verilen tarihte geçerli olan (o tarihten önceki son) benzin ve motorin fiyatları.
+        Kayıt yoksa ilgili değer None olur.
+        """
+        prices = {'benzin': None, 'motorin': None}
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for fuel_type in prices:
+                cursor.execute("""
+                    SELECT price FROM fuel_prices
+                    WHERE region = ? AND fuel_type = ? AND ts <= ?
+                    ORDER BY ts DESC LIMIT 1
+                """, (FUEL_PRICE_REGION, fuel_type, as_of))
+                row = cursor.fetchone()
+                if row:
+                    prices[fuel_type] = row['price']
+        return prices
+
+    def _fuel_settings_from_prices(self, prices: Dict[str, Optional[float]]) -> Dict:
+        """
+        Geçmiş fiyatları _resolve_fuel_price'ın beklediği ayar formatına çevirir.
+        Geçmiş hesaplar piyasa fiyatını kullanır; manuel fiyat uygulanmaz.
+        """
+        return {
+            'current_benzin_price': prices.get('benzin'),
+            'current_motorin_price': prices.get('motorin'),
+            'manual_fuel_price': None
+        }
+
+    def get_fuel_price_history(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """Tarih aralığındaki fiyat değişimleri (eskiden yeniye)."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT ts, fuel_type, region, price FROM fuel_prices
+                WHERE region = ? AND ts >= ? AND ts <= ?
+                ORDER BY ts, fuel_type
+            """, (FUEL_PRICE_REGION, start or '', end or '9999'))
+            return [dict(row) for row in cursor.fetchall()]
+
+    @timed
+    def get_cost_history(self, vehicle_ids: Optional[List[int]] = None,
+                         start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """
+        Araç(lar)ın km başı maliyet eğrisi: başlangıçta geçerli fiyatla bir nokta ve
+        aralıktaki her fiyat değişiminde bir nokta. Fiyat geçmişi tek bir aralık
+        taramasıyla okunur (tarih başına sorgu yok); yakıt dışındaki bileşenler aracın
+        güncel verisinden bir kez hesaplanır, her noktada sadece yakıt payı değişir.
+        Noktalar calculate_total_km_cost(as_of=ts) ile aynı değerleri verir.
+        Returns: [{vehicle_id, fuel_type, points: [{ts, fuel_price, fuel_cost, total_cost_per_km}]}]
+        """
+        end = end or datetime.now().isoformat(timespec='seconds')
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            # Başlangıçtan önceki son fiyat da gerektiği için tarama aralık sonuna kadar yapılır
+            cursor.execute("""
+                SELECT ts, fuel_type, price FROM fuel_prices
+                WHERE region = ? AND ts <= ?
+                ORDER BY ts
+            """, (FUEL_PRICE_REGION, end))
+            changes = cursor.fetchall()
+
+            # Değişimler süpürülerek her zaman noktasında geçerli fiyatlar çıkarılır
+            timeline: List[tuple] = []  # (ts, benzin, motorin)
+            current = {'benzin': None, 'motorin': None}
+            for row in changes:
+                if start and row['ts'] > start and not timeline and any(current.values()):
+                    timeline.append((start, current['benzin'], current['motorin']))
+                current[row['fuel_type']] = row['price']
+                if start and row['ts'] <= start:
+                    continue
+                point = (row['ts'], current['benzin'], current['motorin'])
+                if timeline and timeline[-1][0] == row['ts']:
+                    timeline[-1] = point
+                else:
+                    timeline.append(point)
+            if start and not timeline and any(current.values()):
+                timeline.append((start, current['benzin'], current['motorin']))
+
+            if cost_engine is not None:
+                fleet = cost_engine.FleetArrays.load(conn, vehicle_ids)
+                return self._cost_history_vectorized(fleet, timeline)
+
+            vehicles = self._load_vehicles_with_consumables(cursor, vehicle_ids)
+
+        results = []
+        for v, consumables in vehicles:
+            fuel_type = 'motorin' if (v.get('yakit_tipi') or 'benzin') == 'dizel' else 'benzin'
+            points = []
+            for ts, benzin, motorin in timeline:
+                if (motorin if fuel_type == 'motorin' else benzin) is None:
+                    continue
+                cost = self._compute_cost(v, consumables, self._fuel_settings_from_prices(
+                    {'benzin': benzin, 'motorin': motorin}))
+                points.append({
+                    "ts": ts,
+                    "fuel_price": cost["params"]["fuel_price_used"],
+                    "fuel_cost": cost["breakdown"]["fuel_cost"],
+                    "total_cost_per_km": cost["total_cost_per_km"]
+                })
+            results.append({"vehicle_id": v['id'], "fuel_type": fuel_type, "points": points})
+        return results
+
+    def _cost_history_vectorized(self, fleet, timeline: List[tuple]) -> List[Dict]:
+        """get_cost_history'nin NumPy yolu: (nokta x araç) matrisi tek seferde hesaplanır."""
+        curve = cost_engine.compute_cost_curve(
+            fleet, [p[1] for p in timeline], [p[2] for p in timeline]
+        )
+        # Araç başına satırlar (nokta sütunları); nan != nan ile bilinmeyen fiyatlar atlanır
+        fuel_prices = curve['fuel_price'].T.tolist()
+        fuel_costs = curve['fuel_cost'].T.tolist()
+        totals = curve['total_cost_per_km'].T.tolist()
+
+        results = []
+        for i, vehicle_id in enumerate(fleet.vehicle_ids.tolist()):
+            results.append({
+                "vehicle_id": vehicle_id,
+                "fuel_type": 'motorin' if fleet.is_diesel[i] else 'benzin',
+                "points": [
+                    {
+                        "ts": timeline[t][0],
+                        "fuel_price": price,
+                        "fuel_cost": round(fuel_costs[i][t], 4),
+                        "total_cost_per_km": round(totals[i][t], 4)
+                    }
+                    for t, price in enumerate(fuel_prices[i]) if price == price
+                ]
+            })
+        return results
+
+    # --- FİLO (TOPLU) HESAPLAMA ---
+
+    @timed
+    def get_fleet_costs(self, vehicle_ids: Optional[List[int]] = None,
+                        warning_threshold_km: int = 500) -> List[Dict]:
+        """
+        Birden fazla aracın maliyet, bakım durumu ve uyarılarını tek geçişte hesaplar.
+        Araçlar, parçalar ve yakıt ayarları sabit sayıda sorgu ile yüklenir
+        (araç sayısından bağımsız). vehicle_ids verilmezse tüm filo hesaplanır.
+        Returns: [{vehicle, cost, maintenance_status, warnings}, ...] (id sırasıyla)
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            # 1. Araçlar ve parçaları
+            vehicles = self._load_vehicles_with_consumables(cursor, vehicle_ids)
+            if not vehicles:
+                return []
+
+            # 2. Yakıt ayarları
+            fuel_settings = self._get_fuel_settings()
+
+        # 3. Maliyetler: NumPy varsa tüm filo tek seferde vektörel hesaplanır
+        engine_out = None
+        if cost_engine is not None:
+            fleet_consumables = [c for _, consumables in vehicles for c in consumables]
+            fleet = cost_engine.FleetArrays.from_rows([v for v, _ in vehicles], fleet_consumables)
+            engine_out = cost_engine.compute_fleet_costs(
+                fleet,
+                benzin_price=float(fuel_settings.get('current_benzin_price') or 45.0),
+                motorin_price=float(fuel_settings.get('current_motorin_price') or 45.0),
+                manual_price=fuel_settings.get('manual_fuel_price')
+            )
+            part_costs = engine_out['part_cost'].tolist()
+
+        results = []
+        part_offset = 0
+        for i, (v, consumables) in enumerate(vehicles):
+            if engine_out is not None:
+                cost = self._cost_from_engine(
+                    v, consumables, engine_out, i,
+                    part_costs[part_offset:part_offset + len(consumables)]
+                )
+                part_offset += len(consumables)
+            else:
+                cost = self._compute_cost(v, consumables, fuel_settings)
+            results.append({
+                "vehicle": v,
+                "cost": cost,
+                "maintenance_status": self._maintenance_status_from(v),
+                "warnings": self._warnings_from(v, consumables, warning_threshold_km)
+            })
+        return results
+
+    def _load_vehicles_with_consumables(self, cursor: sqlite3.Cursor,
+                                        vehicle_ids: Optional[List[int]] = None) -> List[tuple]:
+        """
+        Araçları ve parçalarını iki sorguda yükler (araç sayısından bağımsız).
+        Returns: [(araç, [parça, ...]), ...] (id sırasıyla, parçalar ekleme sırasıyla)
+        """
+        # ID listesi JSON dizisi olarak tek parametrede gönderilir,
+        # böylece SQLite değişken sınırına takılmadan tek sorgu yeterli olur
+        if vehicle_ids is None:
+            cursor.execute("SELECT * FROM vehicles ORDER BY id")
+            consumable_query = f"SELECT {CONSUMABLE_SELECT} FROM consumables ORDER BY id"
+            params = ()
+        else:
+            ids_json = json.dumps([int(i) for i in vehicle_ids])
+            cursor.execute(
+                "SELECT * FROM vehicles WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+                (ids_json,)
+            )
+            consumable_query = f"""
+                SELECT {CONSUMABLE_SELECT} FROM consumables
+                WHERE vehicle_id IN (SELECT value FROM json_each(?))
+                ORDER BY id
+            """
+            params = (ids_json,)
+        vehicles = [dict(row) for row in cursor.fetchall()]
+        if not vehicles:
+            return []
+
+        consumables_by_vehicle: Dict[int, List[Dict]] = {v['id']: [] for v in vehicles}
+        cursor.execute(consumable_query, params)
+        for row in cursor.fetchall():
+            c = dict(row)
+            bucket = consumables_by_vehicle.get(c['vehicle_id'])
+            if bucket is not None:
+                bucket.append(c)
+        return [(v, consumables_by_vehicle[v['id']]) for v in vehicles]
+
+    def _get_fuel_settings(self) -> Dict:
+        """Maliyet hesabında kullanılan yakıt ayarlarını (önbellekten) okur."""
+        settings = self._load_settings()
+        return {key: settings.get(key) for key in FUEL_SETTING_KEYS}
+
     def add_consumable_with_km(self, vehicle_id: int, parca_adi: str, maliyet: float, omur_km: int, degisim_km: int = 0):
         """Parça/Sarf Malzeme ekler (değişim km'si ile)."""
         try:
@@ -562,11 +1676,168 @@ class VehicleManager:
                 INSERT INTO consumables (vehicle_id, parca_adi, maliyet, omur_km, degisim_km)
                 VALUES (?, ?, ?, ?, ?)
             """
-            cursor = self.conn.cursor()
-            cursor.execute(query, (vehicle_id, parca_adi, maliyet, omur_km, degisim_km))
-            self.conn.commit()
+            def insert_consumable(cursor):
+                cursor.execute(query, (vehicle_id, parca_adi, maliyet, omur_km, degisim_km))
+
+            self._write(insert_consumable)
+            self.result_cache.invalidate_vehicle(vehicle_id)
         except sqlite3.Error as e:
             print(f"❌ Parça ekleme hatası: {e}")
 
+    # --- TOPLU İÇE AKTARMA (BULK INSERT) ---
+    # Satırlar parça parça (chunk) tek transaction + executemany ile yazılır; her satır için
+    # ayrı commit (fsync) yapılmaz. Doğrulama çağıran tarafta (bulk_import.py) yapılır.
+
+    def _bulk_execute(self, sql: str, params: List[tuple], row_numbers: List[int],
+                      after=None) -> Dict:
+        """
+        params listesini tek transaction'da executemany ile yazar.
+        Bir satır veritabanı hatası verirse parça satır satır tekrar denenir ve
+        sadece hatalı satırlar raporlanır. after(cursor, inserted) aynı transaction içinde çalışır.
+        Returns: {"inserted": int, "errors": [{"row": int, "error": str}]}
+        """
+        def write_rows(cursor):
+            errors = []
+            cursor.execute("SAVEPOINT bulk_rows")
+            try:
+                cursor.executemany(sql, params)
+                inserted = len(params)
+            except sqlite3.Error:
+                cursor.execute("ROLLBACK TO bulk_rows")
+                inserted = 0
+                for row_no, p in zip(row_numbers, params):
+                    try:
+                        cursor.execute(sql, p)
+                        inserted += 1
+                    except sqlite3.Error as e:
+                        errors.append({"row": row_no, "error": str(e)})
+            cursor.execute("RELEASE bulk_rows")
+            if after is not None:
+                after(cursor, inserted)
+            return {"inserted": inserted, "errors": errors}
+
+        return self._write(write_rows)
+
+    def _existing_vehicle_ids(self, vehicle_ids) -> set:
+        """Verilen ID'lerden veritabanında bulunanları tek sorguda döndürür."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id FROM vehicles WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(set(vehicle_ids))),)
+            )
+            return {row['id'] for row in cursor.fetchall()}
+
+    def _split_unknown_vehicles(self, rows: List[Dict], row_numbers: List[int]):
+        """Var olmayan araçlara ait satırları ayıklar (hata olarak raporlanır)."""
+        existing = self._existing_vehicle_ids(r['vehicle_id'] for r in rows)
+        valid_rows, valid_numbers, errors = [], [], []
+        for row_no, r in zip(row_numbers, rows):
+            if r['vehicle_id'] in existing:
+                valid_rows.append(r)
+                valid_numbers.append(row_no)
+            else:
+                errors.append({"row": row_no, "error": f"Araç bulunamadı: {r['vehicle_id']}"})
+        return valid_rows, valid_numbers, errors
+
+    def bulk_add_vehicles(self, rows: List[Dict], row_numbers: Optional[List[int]] = None) -> Dict:
+        """Araçları toplu ekler (add_vehicle ile aynı sütunlar)."""
+        row_numbers = row_numbers or list(range(1, len(rows) + 1))
+        keys = VEHICLE_COLUMNS[1:]
+        sql = f"INSERT INTO vehicles ({', '.join(keys)}) VALUES ({', '.join(['?'] * len(keys))})"
+        params = [tuple(r.get(k) for k in keys) for r in rows]
+        inserted_ids: List[int] = []
+
+        def collect_inserted_ids(cursor, inserted):
+            # AUTOINCREMENT: bu transaction'da eklenen araçlar en yüksek id'lerdir
+            cursor.execute("SELECT id FROM vehicles ORDER BY id DESC LIMIT ?", (inserted,))
+            inserted_ids.extend(row['id'] for row in cursor.fetchall())
+
+        try:
+            result = self._bulk_execute(sql, params, row_numbers, after=collect_inserted_ids)
+        except sqlite3.Error as e:
+            print(f"❌ Toplu araç ekleme hatası: {e}")
+            return {"inserted": 0, "errors": [{"row": n, "error": str(e)} for n in row_numbers]}
+
+        for vehicle_id in inserted_ids:
+            self.result_cache.invalidate_vehicle(vehicle_id)
+        return result
+
+    def bulk_add_consumables(self, rows: List[Dict], row_numbers: Optional[List[int]] = None) -> Dict:
+        """
+        Parçaları toplu ekler. add_consumable_with_km ile aynı kural:
+        degisim_km verilmemişse (0) aracın güncel km'si kullanılır.
+        """
+        row_numbers = row_numbers or list(range(1, len(rows) + 1))
+        try:
+            rows, row_numbers, errors = self._split_unknown_vehicles(rows, row_numbers)
+            sql = """
+                INSERT INTO consumables (vehicle_id, parca_adi, maliyet, omur_km, degisim_km)
+                SELECT ?, ?, ?, ?, CASE WHEN ? THEN ?
+                    ELSE COALESCE((SELECT guncel_km FROM vehicles WHERE id = ?), 0) END
+            """
+            params = [
+                (r['vehicle_id'], r['parca_adi'], r['maliyet'], r['omur_km'],
+                 bool(r.get('degisim_km')), r.get('degisim_km'), r['vehicle_id'])
+                for r in rows
+            ]
+            result = self._bulk_execute(sql, params, row_numbers)
+        except sqlite3.Error as e:
+            print(f"❌ Toplu parça ekleme hatası: {e}")
+            return {"inserted": 0, "errors": [{"row": n, "error": str(e)} for n in row_numbers]}
+
+        for vehicle_id in {r['vehicle_id'] for r in rows}:
+            self.result_cache.invalidate_vehicle(vehicle_id)
+        result["errors"] = sorted(errors + result["errors"], key=lambda e: e["row"])
+        return result
+
+    def bulk_add_service_logs(self, rows: List[Dict], row_numbers: Optional[List[int]] = None) -> Dict:
+        """
+        Servis kayıtlarını toplu ekler. Geçmiş kayıtlar sırasız gelebileceği için
+        aracın son_bakim_km değeri, mevcut değer ile eklenen en yüksek km'nin büyüğü olur;
+        değişen parçalar add_service_log'daki gibi kaydedilir (degisim_km sadece ileri).
+        """
+        row_numbers = row_numbers or list(range(1, len(rows) + 1))
+        try:
+            rows, row_numbers, errors = self._split_unknown_vehicles(rows, row_numbers)
+            sql = """
+                INSERT INTO service_logs (vehicle_id, tarih, km, yapilan_islemler, toplam_maliyet, degisen_parcalar)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """
+            params = [
+                (r['vehicle_id'], r['tarih'], r['km'], r['yapilan_islemler'],
+                 r.get('toplam_maliyet', 0.0), r.get('degisen_parcalar'))
+                for r in rows
+            ]
+            max_km: Dict[int, int] = {}
+
+            def update_last_service_km(cursor, inserted):
+                # AUTOINCREMENT: bu transaction'da eklenen kayıtlar en yüksek id'lerdir.
+                # En yüksek km sadece gerçekten eklenen satırlardan hesaplanır (reddedilenler hariç).
+                cursor.execute("""
+                    SELECT id, vehicle_id, km, tarih, degisen_parcalar FROM service_logs
+                    ORDER BY id DESC LIMIT ?
+                """, (inserted,))
+                inserted_logs = cursor.fetchall()
+                for log in inserted_logs:
+                    max_km[log['vehicle_id']] = max(max_km.get(log['vehicle_id'], 0), log['km'])
+                cursor.executemany(
+                    "UPDATE vehicles SET son_bakim_km = MAX(COALESCE(son_bakim_km, 0), ?) WHERE id = ?",
+                    [(km, vehicle_id) for vehicle_id, km in max_km.items()]
+                )
+                record_replaced_parts(cursor, inserted_logs)
+
+            result = self._bulk_execute(sql, params, row_numbers, after=update_last_service_km)
+        except sqlite3.Error as e:
+            print(f"❌ Toplu servis kaydı ekleme hatası: {e}")
+            return {"inserted": 0, "errors": [{"row": n, "error": str(e)} for n in row_numbers]}
+
+        for vehicle_id in max_km:
+            self.result_cache.invalidate_vehicle(vehicle_id)
+        result["errors"] = sorted(errors + result["errors"], key=lambda e: e["row"])
+        return result
+
     def close(self):
-        self.conn.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close()
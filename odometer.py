@@ -0,0 +1,165 @@
+"""
+Km (Odometre) Okuma Toplayıcısı
+Telematik cihazlarından gelen (araç, km, zaman) okumalarını bellekte biriktirir ve
+belirli aralıklarla (veya bekleyen araç sayısı sınırı aşılınca) tek seferde yazar.
+Araç başına sadece en yeni okuma tutulur: aralıkta kaç okuma gelirse gelsin araç
+başına tek UPDATE yapılır. Eski (zamanı geride) veya km'si geriye giden okumalar atılır.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_reading_ts(value: str) -> str:
+    """Okuma zamanını karşılaştırılabilir ISO metnine çevirir (saat dilimli ise yerel saate). Geçersizse ValueError."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat(timespec='seconds')
+
+
+class OdometerIngestor:
+    """
+    Okumaları biriktirip periyodik olarak VehicleManager.apply_odometer_readings ile yazar.
+    submit() event loop'tan çağrılabilir (veritabanına dokunmaz); yazma ayrı thread'de yapılır.
+    """
+
+    def __init__(self, manager, flush_interval_seconds: float = 5.0, max_pending: int = 10000,
+                 warning_threshold_km: int = 500):
+        self.manager = manager
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.warning_threshold_km = warning_threshold_km
+        # vehicle_id -> (ts, km): henüz yazılmamış en yeni okuma
+        self._pending: Dict[int, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # İstatistikler
+        self.received = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush: Optional[Dict] = None
+        # Son eşik geçişleri (araç ve yeniden hesaplanan uyarıları)
+        self.recent_crossings: deque = deque(maxlen=200)
+
+    def submit(self, readings: List[Tuple[int, int, str]]) -> Dict:
+        """
+        (vehicle_id, km, ts) okumalarını kabul eder. Aynı istekteki ve bekleyen okumalara göre
+        eski / km'si geriye giden okumalar atılır. Veritabanındaki değere göre kontrol yazmada yapılır.
+        Returns: {"accepted": int, "dropped": [{"index": int, "reason": str}], "pending": int}
+        """
+        dropped = []
+        parsed = []
+        for index, (vehicle_id, km, ts) in enumerate(readings):
+            try:
+                parsed.append((normalize_reading_ts(ts), index, vehicle_id, km))
+            except ValueError:
+                dropped.append({"index": index, "reason": "invalid_ts"})
+        # Aynı araç için okumalar zaman sırasıyla değerlendirilir
+        parsed.sort()
+
+        with self._lock:
+            for ts, index, vehicle_id, km in parsed:
+                last = self._pending.get(vehicle_id)
+                if last is not None:
+                    if ts <= last[0]:
+                        dropped.append({"index": index, "reason": "stale"})
+                        continue
+                    if km < last[1]:
+                        dropped.append({"index": index, "reason": "non_monotonic"})
+                        continue
+                self._pending[vehicle_id] = (ts, km)
+            pending = len(self._pending)
+            self.received += len(readings)
+            self.dropped += len(dropped)
+
+        if pending >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+        dropped.sort(key=lambda d: d["index"])
+        return {"accepted": len(readings) - len(dropped), "dropped": dropped, "pending": pending}
+
+    def flush(self) -> Dict:
+        """Bekleyen okumaları yazar (bloklayıcı; thread'de çalıştırılmalı)."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            started = datetime.now()
+            try:
+                result = self.manager.apply_odometer_readings(batch, self.warning_threshold_km)
+            except Exception:
+                # Yazılamayan okumalar kaybolmasın: bu arada gelen daha yeni okumalar korunur
+                with self._lock:
+                    for vehicle_id, reading in batch.items():
+                        if vehicle_id not in self._pending:
+                            self._pending[vehicle_id] = reading
+                raise
+            for vehicle_id, warnings in result["crossed"].items():
+                self.recent_crossings.append({
+                    "vehicle_id": vehicle_id,
+                    "at": started.isoformat(timespec='seconds'),
+                    "warnings": warnings
+                })
+            self.flushes += 1
+            self.last_flush = {
+                "at": started.isoformat(timespec='seconds'),
+                "vehicles": len(batch),
+                "updated": result["updated"],
+                "stale": result["stale"],
+                "unknown": result["unknown"],
+                "crossed": len(result["crossed"]),
+                "duration_ms": round((datetime.now() - started).total_seconds() * 1000, 1)
+            }
+            return self.last_flush
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._pending:
+                continue
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"⚠️ Km okumaları yazılamadı: {e}")
+
+    def start(self):
+        """Arka plan görevini başlatır (çalışan bir event loop içinden çağrılmalı)."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arka plan görevini durdurur ve bekleyen okumaları yazar."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await asyncio.to_thread(self.flush)
+
+    def status(self) -> Dict:
+        """Toplayıcının durum bilgisi (/odometer/status için)."""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "max_pending": self.max_pending,
+            "pending": pending,
+            "received": self.received,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush": self.last_flush,
+            "running": self._task is not None and not self._task.done(),
+            "recent_crossings": list(self.recent_crossings)[-20:]
+        }
@@ -0,0 +1,103 @@
+"""
+Yakıt Fiyatı Arka Plan Güncelleyicisi
+Fiyat çekme işlemini uygulama açılışından ayırır ve belirli aralıklarla
+arka planda (asyncio görevi olarak) çalıştırır.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class FuelPriceRefresher:
+    """
+    Fiyatları periyodik olarak günceller.
+    provider (fuel_prices.FuelPriceProvider) verilmişse fiyatlar event loop üzerinde
+    asenkron çekilir, sadece veritabanı yazımı thread'e gider. Verilmemişse
+    bloklayıcı VehicleManager.update_fuel_prices_if_needed() ayrı bir thread'de çalışır.
+    """
+
+    def __init__(self, manager, interval_seconds: int = 6 * 3600, retry_seconds: int = 300,
+                 provider=None):
+        self.manager = manager
+        self.provider = provider
+        self.interval_seconds = interval_seconds
+        # Başarısız denemeden sonra tam aralığı beklemek yerine daha kısa sürede tekrar dene
+        self.retry_seconds = min(retry_seconds, interval_seconds)
+        self.last_attempt: Optional[datetime] = None
+        self.last_success: Optional[datetime] = self._read_last_success()
+        self.consecutive_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _read_last_success(self) -> Optional[datetime]:
+        """Veritabanındaki son başarılı güncelleme zamanını okur (eski 'Just Now' kayıtları yok sayılır)."""
+        value = self.manager.get_setting('last_fuel_price_update')
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except ValueError:
+            return None
+
+    def _seconds_until_due(self) -> float:
+        """Bir sonraki denemeye kalan süre. Fiyatlar tazeyse (örn. --reload sonrası) hemen çekmez."""
+        if self.last_success is None:
+            return 0
+        elapsed = (datetime.now() - self.last_success).total_seconds()
+        return max(0.0, self.interval_seconds - elapsed)
+
+    async def refresh_once(self) -> bool:
+        """Fiyatları bir kez çeker. Başarılıysa True döner."""
+        self.last_attempt = datetime.now()
+        try:
+            if self.provider is not None:
+                prices = await self.provider.fetch()
+                ok = bool(prices) and await asyncio.to_thread(self.manager.store_fuel_prices, prices)
+            else:
+                ok = await asyncio.to_thread(self.manager.update_fuel_prices_if_needed)
+        except Exception as e:
+            print(f"⚠️ Arka plan fiyat güncellemesi başarısız: {e}")
+            ok = False
+
+        if ok:
+            self.last_success = datetime.now()
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+        return ok
+
+    async def _run(self):
+        delay = self._seconds_until_due()
+        while True:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            ok = await self.refresh_once()
+            delay = self.interval_seconds if ok else self.retry_seconds
+
+    def start(self):
+        """Arka plan görevini başlatır (çalışan bir event loop içinden çağrılmalı)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arka plan görevini durdurur."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.provider is not None:
+            await self.provider.aclose()
+
+    def status(self) -> Dict:
+        """Güncelleyicinin durum bilgisi (/settings için)."""
+        return {
+            "interval_seconds": self.interval_seconds,
+            "last_attempt": self.last_attempt.isoformat(timespec='seconds') if self.last_attempt else None,
+            "last_success": self.last_success.isoformat(timespec='seconds') if self.last_success else None,
+            "consecutive_failures": self.consecutive_failures,
+            "running": self._task is not None and not self._task.done(),
+            "provider": type(self.provider).__name__ if self.provider is not None else "sync",
+            "not_modified_count": getattr(self.provider, "not_modified_count", None),
+            "downloaded_count": getattr(self.provider, "downloaded_count", None)
+        }
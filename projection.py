@@ -0,0 +1,150 @@
+"""
+Kilometre Bazlı Maliyet Projeksiyonu (Toplam Sahip Olma Maliyeti)
+Aracı guncel_km'den gelecek_km'ye ya da N yıl boyunca (yillik_ortalama_km ile)
+ileriye doğru simüle eder ve kümülatif maliyet eğrisini üretir:
+- Parça değişimleri: degisim_km + omur_km, sonra her omur_km'de bir
+- Periyodik bakımlar: son_bakim_km + bakim_araligi, sonra her bakim_araligi'nda bir
+- Yıllık sabit giderler: her yılın başında yillik_sigorta ve yillik_mtv
+- Yakıt ve değer kaybı: km ile doğrusal artan sürekli giderler
+Olaylar km km ilerlemek yerine aritmetik dizi olarak hesaplanır; olay sayısı
+ufuktaki değişim sayısı kadardır, mesafeden bağımsızdır.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+# Olay türleri
+EVENT_PARCA = "parca"
+EVENT_BAKIM = "bakim"
+EVENT_SABIT = "sabit"
+
+
+def _or_default(value, default):
+    return value if value else default
+
+
+def resolve_horizon(vehicle: Dict, years: Optional[float] = None) -> float:
+    """
+    Projeksiyonun bitiş km'si. years verilirse yillik_ortalama_km ile hesaplanır,
+    verilmezse gelecek_km kullanılır. İkisi de geçerli değilse ValueError.
+    """
+    start_km = vehicle.get('guncel_km', 0) or 0
+    if years is not None:
+        if years <= 0:
+            raise ValueError("years pozitif olmalı.")
+        return start_km + years * _or_default(vehicle.get('yillik_ortalama_km'), 15000)
+    future_km = vehicle.get('gelecek_km', 0) or 0
+    if future_km <= start_km:
+        raise ValueError("gelecek_km güncel km'den büyük değil; years parametresi verin.")
+    return future_km
+
+
+def recurring_events(first_km: float, interval_km: float, start_km: float, end_km: float) -> List[float]:
+    """
+    first_km'den başlayıp her interval_km'de tekrarlanan olayların [start_km, end_km]
+    aralığındaki km'leri. first_km geçmişte kalmışsa ilk olay start_km'de olur.
+    """
+    if interval_km <= 0:
+        return []
+    first = max(first_km, start_km)
+    if first > end_km:
+        return []
+    count = int(math.floor((end_km - first) / interval_km)) + 1
+    return [first + k * interval_km for k in range(count)]
+
+
+def project_vehicle(vehicle: Dict, consumables: List[Dict], fuel_price: float,
+                    years: Optional[float] = None, include_events: bool = True) -> Dict:
+    """
+    Tek araç için maliyet projeksiyonu.
+    Returns: {vehicle_id, start_km, end_km, horizon_km, years, per_km, totals, events, curve}
+    """
+    start_km = vehicle.get('guncel_km', 0) or 0
+    end_km = resolve_horizon(vehicle, years)
+    horizon_km = end_km - start_km
+    annual_km = _or_default(vehicle.get('yillik_ortalama_km'), 15000)
+
+    # Sürekli (km ile doğrusal) giderler: calculate_total_km_cost ile aynı formüller
+    fuel_per_km = (_or_default(vehicle.get('ortalama_tuketim_l_100km'), 0) / 100) * fuel_price
+    current_price = vehicle.get('su_anki_fiyat', 0) or 0
+    future_price = vehicle.get('gelecek_fiyat', 0) or 0
+    km_diff = (vehicle.get('gelecek_km', 0) or 0) - start_km
+    depreciation_per_km = max(0.0, (current_price - future_price) / km_diff) if km_diff > 0 else 0.0
+
+    # Kesikli olaylar: (km, tür, ad, maliyet)
+    events = []
+    for c in consumables:
+        omur_km = _or_default(c.get('omur_km'), 10000)
+        first_km = (c.get('degisim_km', 0) or 0) + omur_km
+        cost = c.get('maliyet', 0) or 0
+        for km in recurring_events(first_km, omur_km, start_km, end_km):
+            events.append((km, EVENT_PARCA, c.get('parca_adi'), cost))
+
+    bakim_araligi = _or_default(vehicle.get('bakim_araligi'), 2000)
+    bakim_maliyeti = vehicle.get('periyodik_bakim_maliyeti', 0) or 0
+    first_service_km = (vehicle.get('son_bakim_km', 0) or 0) + bakim_araligi
+    for km in recurring_events(first_service_km, bakim_araligi, start_km, end_km):
+        events.append((km, EVENT_BAKIM, "Periyodik Bakım", bakim_maliyeti))
+
+    # Sabit giderler her (başlamış) yılın başında ödenir
+    year_count = int(math.ceil(horizon_km / annual_km - 1e-9)) if horizon_km > 0 else 0
+    for year in range(year_count):
+        km = start_km + year * annual_km
+        for name, key in (("Sigorta", 'yillik_sigorta'), ("MTV", 'yillik_mtv')):
+            cost = vehicle.get(key, 0) or 0
+            if cost:
+                events.append((km, EVENT_SABIT, name, cost))
+
+    events.sort(key=lambda e: e[0])
+
+    totals = {EVENT_PARCA: 0.0, EVENT_BAKIM: 0.0, EVENT_SABIT: 0.0}
+    curve = [{"km": start_km, "yil": 0.0, "cumulative_cost": 0.0}]
+    discrete_total = 0.0
+    for i, (km, kind, _, cost) in enumerate(events):
+        totals[kind] += cost
+        discrete_total += cost
+        # Aynı km'deki olaylar tek noktada birleşir
+        if i + 1 < len(events) and events[i + 1][0] == km:
+            continue
+        continuous = (fuel_per_km + depreciation_per_km) * (km - start_km)
+        point = {"km": km, "yil": round((km - start_km) / annual_km, 3),
+                 "cumulative_cost": round(continuous + discrete_total, 2)}
+        if curve[-1]["km"] == km:
+            curve[-1] = point
+        else:
+            curve.append(point)
+
+    fuel_total = fuel_per_km * horizon_km
+    depreciation_total = depreciation_per_km * horizon_km
+    grand_total = fuel_total + depreciation_total + discrete_total
+    if curve[-1]["km"] != end_km:
+        curve.append({"km": end_km, "yil": round(horizon_km / annual_km, 3),
+                      "cumulative_cost": round(grand_total, 2)})
+
+    result = {
+        "vehicle_id": vehicle.get('id'),
+        "start_km": start_km,
+        "end_km": end_km,
+        "horizon_km": horizon_km,
+        "years": round(horizon_km / annual_km, 3),
+        "per_km": {
+            "fuel": round(fuel_per_km, 4),
+            "depreciation": round(depreciation_per_km, 4),
+            "total": round(grand_total / horizon_km, 4) if horizon_km > 0 else 0.0
+        },
+        "totals": {
+            "fuel": round(fuel_total, 2),
+            "depreciation": round(depreciation_total, 2),
+            "consumables": round(totals[EVENT_PARCA], 2),
+            "maintenance": round(totals[EVENT_BAKIM], 2),
+            "fixed": round(totals[EVENT_SABIT], 2),
+            "total": round(grand_total, 2)
+        },
+        "curve": curve
+    }
+    if include_events:
+        result["events"] = [
+            {"km": km, "yil": round((km - start_km) / annual_km, 3), "type": kind, "name": name, "cost": cost}
+            for km, kind, name, cost in events
+        ]
+    return result
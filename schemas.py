@@ -0,0 +1,98 @@
+"""
+API İstek Şemaları (Pydantic Modelleri)
+Hem FastAPI endpoint'leri (main.py) hem de toplu içe aktarma (bulk_import.py)
+aynı doğrulama kurallarını kullanır.
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class VehicleBase(BaseModel):
+    marka: str
+    model: str
+    yil: int = Field(..., ge=1900, le=2030)
+    fotograf_url: Optional[str] = None
+    
+    # KM Bilgileri
+    baslangic_km: int = 0
+    guncel_km: int = 0
+    
+    # Yakıt
+    yakit_tipi: str = "benzin"  # benzin veya dizel
+    ortalama_tuketim_l_100km: float = 0.0
+    
+    # Bakım
+    periyodik_bakim_km: int = 10000
+    periyodik_bakim_maliyeti: float = 0.0
+    
+    # Servis Takibi (YENİ)
+    son_bakim_km: int = 0
+    bakim_araligi: int = 2000
+    
+    # Sabit Giderler
+    yillik_sigorta: float = 0.0
+    yillik_mtv: float = 0.0
+    yillik_ortalama_km: int = 15000
+    
+    # Değer Kaybı
+    su_anki_fiyat: float = 0.0
+    gelecek_fiyat: float = 0.0
+    gelecek_km: int = 0
+
+class VehicleCreate(BaseModel):
+    # Zorunlu Alanlar
+    marka: str = Field(..., min_length=1, description="Araç Markası")
+    model: str = Field(..., min_length=1, description="Araç Modeli")
+    yil: int = Field(..., ge=1900, le=2030, description="Üretim Yılı")
+    guncel_km: int = Field(..., ge=0, description="Güncel Kilometre")
+
+    # Opsiyonel / Varsayılan Değerli Alanlar
+    fotograf_url: Optional[str] = None
+    baslangic_km: Optional[int] = 0
+    yakit_tipi: Optional[str] = "benzin"
+    ortalama_tuketim_l_100km: Optional[float] = 0.0
+    periyodik_bakim_km: Optional[int] = 10000
+    periyodik_bakim_maliyeti: Optional[float] = 0.0
+    son_bakim_km: Optional[int] = 0
+    bakim_araligi: Optional[int] = 2000
+    yillik_sigorta: Optional[float] = 0.0
+    yillik_mtv: Optional[float] = 0.0
+    yillik_ortalama_km: Optional[int] = 15000
+    su_anki_fiyat: Optional[float] = 0.0
+    gelecek_fiyat: Optional[float] = 0.0
+    gelecek_km: Optional[int] = 0
+
+class VehicleUpdate(VehicleBase):
+    pass
+
+class ComponentCreate(BaseModel):
+    vehicle_id: int
+    parca_adi: str = Field(..., min_length=1)
+    maliyet: float = Field(..., ge=0)
+    omur_km: int = Field(..., gt=0, description="Parçanın ömrü 0 olamaz")
+    degisim_km: Optional[int] = Field(0, ge=0)
+
+class ServiceLogCreate(BaseModel):
+    vehicle_id: int
+    tarih: str
+    km: int = Field(..., ge=0)
+    yapilan_islemler: str = Field(..., min_length=1)
+    toplam_maliyet: float = Field(0.0, ge=0)
+    degisen_parcalar: Optional[str] = None
+
+class SettingsUpdate(BaseModel):
+    manual_fuel_price: Optional[float] = Field(None, ge=0)
+
+class ComponentUpdate(BaseModel):
+    parca_adi: Optional[str] = None
+    maliyet: Optional[float] = None
+    omur_km: Optional[int] = None
+    degisim_km: Optional[int] = None
+
+class OdometerReading(BaseModel):
+    vehicle_id: int
+    km: int = Field(..., ge=0)
+    ts: str = Field(..., description="Okuma zamanı (ISO 8601)")
+
+class OdometerBatch(BaseModel):
+    readings: List[OdometerReading]
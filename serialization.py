@@ -0,0 +1,49 @@
+"""
+Satırdan Doğrudan JSON
+Büyük liste yanıtlarında (araçlar, parçalar, servis kayıtları) SQLite satırları
+dict'e, sonra jsonable_encoder ile tekrar dict'e çevrilip serileştirilmez: cursor
+tuple'ları sütun listesinden bir kez üretilen şablonla doğrudan JSON'a yazılır.
+Çıktı FastAPI'nin JSONResponse'u ile bayt bayt aynıdır:
+json.dumps(ensure_ascii=False, allow_nan=False, separators=(",", ":")).
+"""
+
+import functools
+from json.encoder import encode_basestring  # json.dumps(ensure_ascii=False) ile aynı (C hızlandırmalı)
+from typing import Callable, Iterable, Sequence, Tuple
+
+
+def _encode_float(value: float) -> str:
+    # JSONResponse allow_nan=False: NaN / sonsuz değerler hata verir
+    if value != value or value in (float('inf'), float('-inf')):
+        raise ValueError("Out of range float values are not JSON compliant: " + repr(value))
+    return float.__repr__(value)
+
+
+# SQLite'ın döndürebileceği tipler (bytes: jsonable_encoder gibi decode edilir)
+_ENCODERS = {
+    int: int.__repr__,
+    float: _encode_float,
+    str: encode_basestring,
+    type(None): lambda _: "null",
+    bytes: lambda value: encode_basestring(value.decode()),
+}
+
+
+@functools.lru_cache(maxsize=64)
+def row_template(columns: Tuple[str, ...]) -> Callable[[Sequence], str]:
+    """
+    Sütun listesi için satır kodlayıcı: anahtarlar şablona bir kez yazılır,
+    her satırda sadece değerler kodlanır.
+    """
+    template = "{" + ",".join(encode_basestring(c).replace("%", "%%") + ":%s" for c in columns) + "}"
+    encoders = _ENCODERS
+
+    def encode_row(row: Sequence) -> str:
+        return template % tuple([encoders[type(v)](v) for v in row])
+    return encode_row
+
+
+def rows_to_json(description, rows: Iterable[Sequence]) -> bytes:
+    """cursor.description ve tuple satırlardan JSON dizisi (bayt) üretir."""
+    encode_row = row_template(tuple(d[0] for d in description))
+    return ("[" + ",".join(map(encode_row, rows)) + "]").encode("utf-8")
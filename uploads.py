@@ -0,0 +1,152 @@
+"""
+Fotoğraf Yükleme ve Küçük Resimler (Thumbnail)
+Yüklenen dosya parça parça (chunk) diske yazılır; tamamı belleğe alınmaz.
+Boyut sınırı kopyalama sırasında uygulanır, dosya türü uzantıya veya
+Content-Type başlığına değil ilk baytlara (magic bytes) bakılarak belirlenir.
+Küçük resimler (WebP) ayrı süreçlerde (ProcessPoolExecutor) üretilir; Pillow
+kurulu değilse sadece orijinal dosya saklanır.
+
+Küçük resim adları sabit bir kurala göre türetilir:
+    <uuid>.<uzantı>  ->  <uuid>_card.webp, <uuid>_modal.webp
+"""
+
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+
+# İmza -> (uzantı); WebP için RIFF....WEBP ayrıca kontrol edilir
+_SIGNATURES = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+]
+
+# Boyut adı -> (genişlik, yükseklik, kırpma)
+# card: VehicleCard resim alanı (h-40, tam genişlik) için 2x çözünürlük, kırpılır
+# modal: düzenleme / detay penceresi için en-boy oranı korunur
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int, bool]] = {
+    "card": (720, 320, True),
+    "modal": (1280, 960, False),
+}
+
+
+class UploadError(Exception):
+    """Yükleme reddedildi (status_code ile birlikte)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Dosyanın ilk baytlarından resim türünü (uzantı olarak) bulur; tanınmazsa None."""
+    for signature, ext in _SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def save_upload(source: BinaryIO, dest_dir: str, max_bytes: int) -> str:
+    """
+    Yüklenen dosyayı dest_dir içine parça parça kopyalar ve dosya adını döndürür.
+    Bloklayıcıdır; event loop'u durdurmaması için thread'de çağrılmalıdır.
+    Tür tanınmazsa 415, boyut aşılırsa 413 ile UploadError fırlatır (yarım dosya silinir).
+    """
+    head = source.read(CHUNK_SIZE)
+    ext = sniff_image_type(head)
+    if ext is None:
+        raise UploadError(415, "Sadece resim dosyaları yüklenebilir (JPEG, PNG, GIF, WebP).")
+
+    file_id = uuid.uuid4().hex
+    filename = f"{file_id}.{ext}"
+    final_path = os.path.join(dest_dir, filename)
+    tmp_path = final_path + ".part"
+
+    written = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            chunk = head
+            while chunk:
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadError(413, f"Dosya çok büyük (en fazla {max_bytes // (1024 * 1024)} MB).")
+                out.write(chunk)
+                chunk = source.read(CHUNK_SIZE)
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filename
+
+
+def thumbnail_name(filename: str, size: str) -> str:
+    return f"{os.path.splitext(filename)[0]}_{size}.webp"
+
+
+def generate_thumbnails(path: str) -> Dict[str, str]:
+    """
+    Orijinal resimden THUMBNAIL_SIZES'daki her boyut için WebP üretir.
+    Process pool içinde çalışır (CPU yoğun); üretilen dosya adlarını döndürür.
+    """
+    if Image is None:
+        return {}
+    directory, filename = os.path.split(path)
+    results = {}
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)  # Telefon fotoğraflarının yönünü düzelt
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        for size, (width, height, crop) in THUMBNAIL_SIZES.items():
+            if crop:
+                thumb = ImageOps.fit(img, (width, height), method=Image.LANCZOS)
+            else:
+                thumb = img.copy()
+                thumb.thumbnail((width, height), Image.LANCZOS)
+            name = thumbnail_name(filename, size)
+            thumb.save(os.path.join(directory, name), "WEBP", quality=80, method=4)
+            results[size] = name
+    return results
+
+
+class ThumbnailWorker:
+    """Küçük resim üretimi için tembel (lazy) oluşturulan process pool."""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.max_workers > 0
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def remove_upload(dest_dir: str, filename: str):
+    """Orijinali ve küçük resimlerini siler (hatalı yüklemelerin temizliği için)."""
+    for name in [filename] + [thumbnail_name(filename, size) for size in THUMBNAIL_SIZES]:
+        path = os.path.join(dest_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
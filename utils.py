@@ -1,7 +1,9 @@
 import requests
 from bs4 import BeautifulSoup
 import re
+from metrics import track_scrape
 
+@track_scrape("utils")
 def get_current_fuel_prices():
     """
     Petrol Ofisi web sitesinden İstanbul Avrupa yakası güncel akaryakıt fiyatlarını çeker.